@@ -1,76 +1,113 @@
 #!/usr/bin/env python3
 
 import asyncio
+import heapq
 import json
 import logging
-from typing import Dict, Any, List
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 import argparse
 
-import httpx
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from pydantic_settings import BaseSettings
 
-
-class Settings(BaseSettings):
-    database_url: str = "postgresql://ranjanshahajishitole@localhost:5432/polymarket_db"
-    openai_api_key: str = ""
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+from config import settings
+from db import connect_database
+from differences import EVENT_DIFF_COLUMNS, MAX_PRICE_MOVE_SQL, read_event_differences, read_max_price_move
+from profiling import StageProfiler, stage
+from query_tracing import QueryTracer, report
 
 
-settings = Settings()
 logger = logging.getLogger(__name__)
 
+DIFF_NOTIFY_CHANNEL = 'new_differences'
+
+DIFFERENCES_QUERY = f"""
+    SELECT 
+        dd.id AS difference_id,
+        dd.event_id,
+        e.title as event_title,
+        e.description as event_description,
+        e.is_financial,
+        e.is_crypto,
+        e.is_big_event,
+        {', '.join(f'dd.{column}' for column in EVENT_DIFF_COLUMNS)},
+        {MAX_PRICE_MOVE_SQL} AS max_price_move,
+        dd.compared_at
+    FROM data_differences dd
+    JOIN events e ON dd.event_id = e.id
+"""
+
+FED_TRUMP_FINANCE_FILTER = """
+    AND (
+        e.is_financial = true 
+        OR e.is_big_event = true
+        OR LOWER(e.title) LIKE '%fed%' 
+        OR LOWER(e.title) LIKE '%federal reserve%'
+        OR LOWER(e.title) LIKE '%trump%'
+        OR LOWER(e.title) LIKE '%fomc%'
+    )
+"""
+
 
 class AIAnalyzer:
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self._client = None
         self.db_conn = None
+        self.query_tracer: Optional[QueryTracer] = None
+        self.profiler: Optional[StageProfiler] = None
+        self.tokens_used = 0
+        self.max_completion_tokens = 150
+        self.min_price_move = 0.01
+        self.stream_file = None
+        self.stream_pending = 0
+        self.fsync_every = 10
+        self.completed_keys = set()
+        self.budget_exhausted = False
+        
+        self.category_weights = {
+            'financial': 1.5,
+            'crypto': 1.3,
+            'politics_war': 1.2,
+            'other': 1.0
+        }
+        
+        self.metric_weights = {
+            'volume_change': 1.0,
+            'volume24hr_change': 1.5,
+            'liquidity_change': 0.75,
+            'liquidity_clob_change': 0.5
+        }
+    
+    @property
+    def client(self):
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=30.0)
+        return self._client
     
     async def close(self):
-        await self.client.aclose()
+        if self._client:
+            await self._client.aclose()
+        self.close_stream()
         if self.db_conn:
             self.db_conn.close()
     
     def get_db_connection(self):
         if not self.db_conn or self.db_conn.closed:
-            self.db_conn = psycopg2.connect(settings.database_url)
+            self.db_conn = connect_database(self.query_tracer)
         return self.db_conn
     
     def fetch_recent_differences(self, limit: int = None, fed_trump_finance_only: bool = False) -> List[Dict[str, Any]]:
         conn = self.get_db_connection()
         cursor = conn.cursor(cursor_factory=RealDictCursor)
         
-        query = """
-            SELECT 
-                dd.event_id,
-                e.title as event_title,
-                e.description as event_description,
-                e.is_financial,
-                e.is_crypto,
-                e.is_big_event,
-                dd.differences_data,
-                dd.compared_at
-            FROM data_differences dd
-            JOIN events e ON dd.event_id = e.id
-            WHERE dd.compared_at >= NOW() - INTERVAL '24 hours'
-        """
+        query = DIFFERENCES_QUERY + " WHERE dd.compared_at >= NOW() - INTERVAL '24 hours'"
         
         if fed_trump_finance_only:
-            query += """
-                AND (
-                    e.is_financial = true 
-                    OR e.is_big_event = true
-                    OR LOWER(e.title) LIKE '%fed%' 
-                    OR LOWER(e.title) LIKE '%federal reserve%'
-                    OR LOWER(e.title) LIKE '%trump%'
-                    OR LOWER(e.title) LIKE '%fomc%'
-                )
-            """
+            query += FED_TRUMP_FINANCE_FILTER
         
         query += " ORDER BY dd.compared_at DESC"
         
@@ -87,7 +124,41 @@ class AIAnalyzer:
         cursor.close()
         return results
     
-    def extract_key_changes(self, differences_data: Dict[str, Any]) -> Dict[str, Any]:
+    def fetch_differences_by_ids(self, diff_ids: List[int], fed_trump_finance_only: bool = False) -> List[Dict[str, Any]]:
+        conn = self.get_db_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        
+        query = DIFFERENCES_QUERY + " WHERE dd.id = ANY(%s)"
+        if fed_trump_finance_only:
+            query += FED_TRUMP_FINANCE_FILTER
+        
+        cursor.execute(query, (list(diff_ids),))
+        results = [dict(row) for row in cursor.fetchall()]
+        
+        cursor.close()
+        conn.commit()
+        return results
+    
+    def fetch_difference_ids_after(self, after_id: int) -> List[Tuple[int, int]]:
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, event_id FROM data_differences WHERE id > %s ORDER BY id", (after_id,))
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.commit()
+        return rows
+    
+    def latest_difference_id(self) -> int:
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM data_differences")
+        latest = cursor.fetchone()[0]
+        cursor.close()
+        conn.commit()
+        return latest
+    
+    def extract_key_changes(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        differences_data = read_event_differences(event)
         changes = {
             'volume_change': None,
             'volume24hr_change': None,
@@ -198,12 +269,45 @@ class AIAnalyzer:
         else:
             return 'other'
     
-    async def get_ai_analysis(self, event_title: str, event_description: str, changes: Dict[str, Any], topic: str) -> str:
-        if not settings.openai_api_key:
-            return "OpenAI API key not configured. Please set OPENAI_API_KEY in .env file."
+    def max_price_move(self, event: Dict[str, Any]) -> float:
+        return read_max_price_move(event)
+    
+    def score_event(self, changes: Dict[str, Any], price_move: float, topic: str) -> float:
+        score = 0.0
+        for key, weight in self.metric_weights.items():
+            change = changes.get(key)
+            if change:
+                score += weight * abs(change.get('percent_change') or 0)
         
-        try:
-            prompt = f"""
+        score += price_move * 100
+        return score * self.category_weights.get(topic, 1.0)
+    
+    def is_significant(self, changes: Dict[str, Any], price_move: float) -> bool:
+        return bool(changes.get('significant_events')) or price_move >= self.min_price_move
+    
+    def build_priority_queue(self, events: List[Dict[str, Any]]) -> List[Tuple[float, int, Dict[str, Any]]]:
+        queue = []
+        skipped = 0
+        
+        for seq, event in enumerate(events):
+            changes = self.extract_key_changes(event)
+            price_move = self.max_price_move(event)
+            if not self.is_significant(changes, price_move):
+                skipped += 1
+                continue
+            
+            topic = self.categorize_topic(event)
+            event['changes'] = changes
+            event['topic'] = topic
+            event['priority_score'] = self.score_event(changes, price_move, topic)
+            queue.append((-event['priority_score'], seq, event))
+        
+        heapq.heapify(queue)
+        logger.info(f"Queued {len(queue)} events for analysis, skipped {skipped} without significant changes")
+        return queue
+    
+    def build_prompt(self, event_title: str, event_description: str, changes: Dict[str, Any], topic: str) -> str:
+        return f"""
 Analyze this Polymarket event and provide 3-4 line market impact analysis:
 
 TOPIC: {event_title}
@@ -215,6 +319,18 @@ MARKET CHANGES: {', '.join(changes.get('significant_events', ['No significant ch
 METRICS: Volume ${changes.get('market_metrics', {}).get('old_volume', 0) or 0:,.0f}→${changes.get('market_metrics', {}).get('new_volume', 0) or 0:,.0f} | Liquidity ${changes.get('market_metrics', {}).get('old_liquidity', 0) or 0:,.0f}→${changes.get('market_metrics', {}).get('new_liquidity', 0) or 0:,.0f}
 
 Provide ONLY 3-4 concise sentences covering: (1) what specific outcome is likely and why based on the event description, (2) why it matters and specific impact on crypto/stocks, (3) trader sentiment/behavior shown by volume changes, (4) short-term price/market impact. Include specific numbers and probabilities."""
+    
+    def estimate_tokens(self, prompt: str) -> int:
+        return len(prompt) // 4 + self.max_completion_tokens
+    
+    async def get_ai_analysis(self, event_title: str, event_description: str, changes: Dict[str, Any], topic: str) -> Optional[str]:
+        # None means no analysis: the caller leaves the event unrecorded so a later batch or --resume retries it
+        if not settings.openai_api_key:
+            logger.error("OpenAI API key not configured. Please set OPENAI_API_KEY in .env file.")
+            return None
+        
+        try:
+            prompt = self.build_prompt(event_title, event_description, changes, topic)
             
             headers = {
                 "Authorization": f"Bearer {settings.openai_api_key}",
@@ -226,7 +342,7 @@ Provide ONLY 3-4 concise sentences covering: (1) what specific outcome is likely
                 "messages": [
                     {"role": "user", "content": prompt}
                 ],
-                "max_tokens": 150,
+                "max_tokens": self.max_completion_tokens,
                 "temperature": 0.7
             }
             
@@ -238,48 +354,86 @@ Provide ONLY 3-4 concise sentences covering: (1) what specific outcome is likely
             
             if response.status_code == 200:
                 result = response.json()
+                self.tokens_used += (result.get('usage') or {}).get('total_tokens') or self.estimate_tokens(prompt)
                 ai_response = result['choices'][0]['message']['content'].strip()
                 logger.debug(f"OpenAI response received: {len(ai_response)} characters")
                 if not ai_response or len(ai_response) < 10:
                     logger.warning("OpenAI returned empty or very short response")
-                    return "OpenAI API returned an empty response. Please try again."
+                    return None
                 return ai_response
             else:
                 error_text = response.text if hasattr(response, 'text') else 'Unknown error'
                 logger.error(f"OpenAI API error: {response.status_code} - {error_text}")
-                return f"OpenAI API error {response.status_code}: {error_text}"
+                return None
                 
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {e}")
-            return f"OpenAI API error: {str(e)}. Please check your connection and API key."
+            return None
     
     
-    async def analyze_events(self, limit: int = None, fed_trump_finance_only: bool = False) -> List[Dict[str, Any]]:
+    async def analyze_events(self, limit: int = None, fed_trump_finance_only: bool = False,
+                             time_budget: Optional[float] = None, token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
         limit_text = f"{limit} events" if limit else "all events"
         filter_text = " (Fed/Trump/Finance only)" if fed_trump_finance_only else ""
         logger.info(f"Fetching recent differences for {limit_text}{filter_text}...")
-        events = self.fetch_recent_differences(limit, fed_trump_finance_only)
-        logger.info(f"Found {len(events)} events with recent changes")
+        with stage(self.profiler, 'fetch_differences'):
+            rows = self.fetch_recent_differences(None, fed_trump_finance_only)
+            # An event that moves every cycle has one row per cycle; only its newest diff is worth a prompt
+            events = self.latest_per_event(rows)
+        logger.info(f"Found {len(rows)} recent differences across {len(events)} events")
         
+        with stage(self.profiler, 'prioritize'):
+            queue = self.build_priority_queue(events)
+        return await self.analyze_queue(queue, limit, time_budget, token_budget)
+    
+    async def analyze_queue(self, queue: List[Tuple[float, int, Dict[str, Any]]], limit: int = None,
+                            time_budget: Optional[float] = None, token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        # With --stream every analysis goes straight to the NDJSON file, so memory stays bounded by the queue
         analyzed_events = []
+        failed = []
+        analyzed = 0
+        started = time.monotonic()
         
-        for event in events:
+        while queue:
+            if limit and analyzed >= limit:
+                break
+            
+            if time_budget and time.monotonic() - started >= time_budget:
+                logger.warning(f"Time budget of {time_budget}s exhausted, {len(queue)} events left unanalyzed")
+                break
+            
+            entry = heapq.heappop(queue)
+            _, _, event = entry
+            
+            if self.analysis_key(event.get('event_id'), event.get('compared_at')) in self.completed_keys:
+                logger.debug(f"Skipping already analyzed event {event.get('event_id')}")
+                continue
+            
             try:
-                logger.info(f"Analyzing: {event.get('event_title', 'Unknown')}")
+                changes = event['changes']
+                topic = event['topic']
                 
-                differences_data = event.get('differences_data', {})
-                if isinstance(differences_data, str):
-                    differences_data = json.loads(differences_data) if differences_data else {}
-                changes = self.extract_key_changes(differences_data)
+                if token_budget:
+                    prompt = self.build_prompt(event.get('event_title', ''), event.get('event_description', '') or '', changes, topic)
+                    if self.tokens_used + self.estimate_tokens(prompt) > token_budget:
+                        # Back on the queue, so listen() carries it over and the high-water mark stays below it
+                        heapq.heappush(queue, entry)
+                        logger.warning(f"Token budget of {token_budget} exhausted, {len(queue)} events left unanalyzed")
+                        self.budget_exhausted = True
+                        break
                 
-                topic = self.categorize_topic(event)
+                logger.info(f"Analyzing: {event.get('event_title', 'Unknown')} (score {event['priority_score']:.1f})")
                 
-                ai_analysis = await self.get_ai_analysis(
-                    event.get('event_title', ''),
-                    event.get('event_description', ''),
-                    changes,
-                    topic
-                )
+                with stage(self.profiler, 'ai_request'):
+                    ai_analysis = await self.get_ai_analysis(
+                        event.get('event_title', ''),
+                        event.get('event_description', ''),
+                        changes,
+                        topic
+                    )
+                if ai_analysis is None:
+                    failed.append(entry)
+                    continue
                 
                 analysis = {
                     'topic': event.get('event_title'),
@@ -287,6 +441,7 @@ Provide ONLY 3-4 concise sentences covering: (1) what specific outcome is likely
                     'category': topic,
                     'event_id': event.get('event_id'),
                     'compared_at': event.get('compared_at').isoformat() if event.get('compared_at') else None,
+                    'priority_score': round(event['priority_score'], 4),
                     'market_changes': changes,
                     'ai_analysis': ai_analysis,
                     'classification': {
@@ -296,13 +451,183 @@ Provide ONLY 3-4 concise sentences covering: (1) what specific outcome is likely
                     }
                 }
                 
-                analyzed_events.append(analysis)
+                analyzed += 1
+                if self.stream_file:
+                    self.append_analysis(analysis)
+                else:
+                    analyzed_events.append(analysis)
                 logger.info(f"Analysis complete for: {event.get('event_title')}")
                 
             except Exception as e:
                 logger.error(f"Error analyzing event {event.get('event_id', 'unknown')}: {e}")
+                failed.append(entry)
                 continue
         
+        # Failed events go back on the queue unrecorded, so listen() carries them over and --resume retries them
+        for entry in failed:
+            heapq.heappush(queue, entry)
+        if failed:
+            logger.warning(f"{len(failed)} events failed analysis and were left for retry")
+        logger.info(f"Analyzed {analyzed} events in {time.monotonic() - started:.1f}s using ~{self.tokens_used} tokens")
+        return analyzed_events
+    
+    def queue_notification(self, pending: Dict[str, Dict[str, Any]], payload: str):
+        try:
+            notice = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring malformed {DIFF_NOTIFY_CHANNEL} payload: {payload!r}")
+            return
+        self.queue_difference(pending, notice['event_id'], notice['id'])
+    
+    def queue_difference(self, pending: Dict[str, Dict[str, Any]], event_id: Any, diff_id: int, ready: bool = False):
+        now = time.monotonic()
+        # Caught-up rows are already older than any debounce, so they count as quiet from the start
+        seen = float('-inf') if ready else now
+        entry = pending.setdefault(str(event_id), {'first_seen': seen, 'last_seen': seen, 'diff_ids': set()})
+        if not ready:
+            entry['last_seen'] = now
+        entry['diff_ids'].add(int(diff_id))
+    
+    def load_high_water(self, filename: str) -> Optional[int]:
+        if not os.path.exists(filename):
+            return None
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f).get('difference_id')
+    
+    def save_high_water(self, filename: str, difference_id: int):
+        tmp_file = f"{filename}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'difference_id': difference_id}, f)
+        os.replace(tmp_file, filename)
+    
+    def handled_through(self, high_water: int, pending: Dict[str, Dict[str, Any]], leftovers: List[Dict[str, Any]]) -> int:
+        # Everything below the oldest diff still waiting (debouncing or cut by a budget) has been handled
+        waiting = [diff_id for entry in pending.values() for diff_id in entry['diff_ids']]
+        waiting += [event['difference_id'] for event in leftovers]
+        return min(high_water, min(waiting) - 1) if waiting else high_water
+    
+    def open_listen_connection(self):
+        listen_conn = connect_database()
+        listen_conn.autocommit = True
+        cursor = listen_conn.cursor()
+        cursor.execute(f"LISTEN {DIFF_NOTIFY_CHANNEL}")
+        cursor.close()
+        return listen_conn
+    
+    def ready_events(self, pending: Dict[str, Dict[str, Any]], debounce: float, max_wait: float) -> List[int]:
+        now = time.monotonic()
+        ready = [
+            event_id for event_id, entry in pending.items()
+            if now - entry['last_seen'] >= debounce or now - entry['first_seen'] >= max_wait
+        ]
+        diff_ids = []
+        for event_id in ready:
+            diff_ids.extend(pending.pop(event_id)['diff_ids'])
+        return diff_ids
+    
+    def next_deadline(self, pending: Dict[str, Dict[str, Any]], debounce: float, max_wait: float) -> Optional[float]:
+        if not pending:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(
+            min(entry['last_seen'] + debounce, entry['first_seen'] + max_wait) - now
+            for entry in pending.values()
+        ))
+    
+    def latest_per_event(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        latest = {}
+        for event in events:
+            current = latest.get(event['event_id'])
+            if current is None or event['compared_at'] > current['compared_at']:
+                latest[event['event_id']] = event
+        return list(latest.values())
+    
+    async def listen(self, fed_trump_finance_only: bool = False, debounce: float = 5.0, max_wait: float = 30.0,
+                     limit: int = None, time_budget: Optional[float] = None,
+                     token_budget: Optional[int] = None, high_water_file: Optional[str] = None,
+                     catch_up: bool = True, reconnect_delay: float = 5.0) -> List[Dict[str, Any]]:
+        # Diffs written while nobody was listening are caught up from the persisted high-water id,
+        # on start and after every reconnect; without one, listening starts at the newest diff
+        high_water = self.load_high_water(high_water_file) if high_water_file and catch_up else None
+        if high_water is None:
+            high_water = self.latest_difference_id()
+        handled = high_water
+        
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        pending: Dict[str, Dict[str, Any]] = {}
+        leftovers: List[Dict[str, Any]] = []
+        analyzed_events = []
+        listen_conn = None
+        listen_fd = None
+        
+        try:
+            while not self.budget_exhausted:
+                if listen_conn is None:
+                    try:
+                        listen_conn = self.open_listen_connection()
+                        # LISTEN is already active, so a diff committed during the catch-up is seen at least once
+                        caught_up = self.fetch_difference_ids_after(handled)
+                    except psycopg2.OperationalError as e:
+                        logger.error(f"Could not listen on {DIFF_NOTIFY_CHANNEL}, retrying in {reconnect_delay}s: {e}")
+                        if listen_conn is not None:
+                            listen_conn.close()
+                            listen_conn = None
+                        await asyncio.sleep(reconnect_delay)
+                        continue
+                    # fileno() raises once the server has dropped the connection, so keep the registered fd
+                    listen_fd = listen_conn.fileno()
+                    loop.add_reader(listen_fd, readable.set)
+                    logger.info(f"Listening on {DIFF_NOTIFY_CHANNEL} (debounce {debounce}s, max wait {max_wait}s)")
+                    
+                    for diff_id, event_id in caught_up:
+                        self.queue_difference(pending, event_id, diff_id, ready=True)
+                        high_water = max(high_water, diff_id)
+                    if caught_up:
+                        logger.info(f"Caught up on {len(caught_up)} differences written after id {handled}")
+                
+                timeout = self.next_deadline(pending, debounce, max_wait)
+                if timeout is None and leftovers:
+                    timeout = max_wait
+                try:
+                    await asyncio.wait_for(readable.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                readable.clear()
+                
+                try:
+                    listen_conn.poll()
+                except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                    logger.error(f"Lost the {DIFF_NOTIFY_CHANNEL} listener, reconnecting: {e}")
+                    loop.remove_reader(listen_fd)
+                    listen_conn.close()
+                    listen_conn = None
+                    continue
+                while listen_conn.notifies:
+                    self.queue_notification(pending, listen_conn.notifies.pop(0).payload)
+                
+                diff_ids = self.ready_events(pending, debounce, max_wait)
+                high_water = max([high_water] + diff_ids)
+                if diff_ids or leftovers:
+                    with stage(self.profiler, 'fetch_differences'):
+                        fetched = self.fetch_differences_by_ids(diff_ids, fed_trump_finance_only) if diff_ids else []
+                        events = self.latest_per_event(leftovers + fetched)
+                    logger.info(f"Received {len(diff_ids)} new differences, {len(leftovers)} carried over, across {len(events)} events")
+                    
+                    with stage(self.profiler, 'prioritize'):
+                        queue = self.build_priority_queue(events)
+                    analyzed_events.extend(await self.analyze_queue(queue, limit, time_budget, token_budget))
+                    # Events cut by --limit or a budget go into the next batch instead of being dropped
+                    leftovers = [event for _, _, event in queue]
+                
+                handled = self.handled_through(high_water, pending, leftovers)
+                if high_water_file:
+                    self.save_high_water(high_water_file, handled)
+        finally:
+            if listen_conn is not None:
+                loop.remove_reader(listen_fd)
+                listen_conn.close()
+        
         return analyzed_events
     
     def save_analysis(self, analysis_data: List[Dict[str, Any]], filename: str = 'ai_market_analysis.json'):
@@ -317,16 +642,89 @@ Provide ONLY 3-4 concise sentences covering: (1) what specific outcome is likely
         
         logger.info(f"AI analysis saved to {filename}")
         return output
+    
+    def analysis_key(self, event_id: Any, compared_at: Any) -> Tuple[str, str]:
+        if hasattr(compared_at, 'isoformat'):
+            compared_at = compared_at.isoformat()
+        return (str(event_id), str(compared_at))
+    
+    def read_stream(self, filename: str) -> List[Dict[str, Any]]:
+        records = []
+        if not os.path.exists(filename):
+            return records
+        
+        with open(filename, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring truncated record at {filename}:{line_number}")
+        return records
+    
+    def open_stream(self, filename: str, resume: bool = False, fsync_every: int = 10):
+        if resume:
+            for record in self.read_stream(filename):
+                self.completed_keys.add(self.analysis_key(record.get('event_id'), record.get('compared_at')))
+            logger.info(f"Resuming from {filename}: {len(self.completed_keys)} events already analyzed")
+        
+        self.fsync_every = max(1, fsync_every)
+        self.stream_file = open(filename, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self.stream_file.tell() > 0:
+            with open(filename, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self.stream_file.write('\n')
+    
+    def append_analysis(self, analysis: Dict[str, Any]):
+        self.stream_file.write(json.dumps(analysis, ensure_ascii=False, default=str) + '\n')
+        self.stream_file.flush()
+        self.completed_keys.add(self.analysis_key(analysis.get('event_id'), analysis.get('compared_at')))
+        
+        self.stream_pending += 1
+        if self.stream_pending >= self.fsync_every:
+            os.fsync(self.stream_file.fileno())
+            self.stream_pending = 0
+    
+    def close_stream(self):
+        if not self.stream_file:
+            return
+        if self.stream_pending:
+            self.stream_file.flush()
+            os.fsync(self.stream_file.fileno())
+            self.stream_pending = 0
+        self.stream_file.close()
+        self.stream_file = None
+    
+    def finalize_stream(self, stream_filename: str, filename: str = 'ai_market_analysis.json') -> Dict[str, Any]:
+        self.close_stream()
+        return self.save_analysis(self.read_stream(stream_filename), filename)
 
 
-async def main():
+async def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='AI-Powered Polymarket Analysis')
     parser.add_argument('--limit', type=int, default=None, help='Number of events to analyze (default: all)')
     parser.add_argument('--output', type=str, default='ai_market_analysis.json', help='Output JSON filename')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--trace-sql', type=str, default=None, metavar='FILE', help='Write a per-statement SQL timing summary to FILE')
+    parser.add_argument('--profile', type=str, nargs='?', const='profiles', default=None, metavar='DIR',
+                        help='Profile each stage (cProfile, collapsed stacks, tracemalloc) into DIR (default: profiles)')
+    parser.add_argument('--explain-slow-ms', type=float, default=None, help='Capture a plan for statements slower than this (EXPLAIN ANALYZE for reads, EXPLAIN for writes)')
     parser.add_argument('--fed-trump-finance', action='store_true', help='Only analyze Fed, Trump, and Finance events')
+    parser.add_argument('--time-budget', type=float, default=None, help='Wall-clock budget in seconds for AI calls')
+    parser.add_argument('--token-budget', type=int, default=None, help='Maximum OpenAI tokens to spend per run')
+    parser.add_argument('--stream', type=str, default=None, help='Append one NDJSON record per analyzed event to this file')
+    parser.add_argument('--resume', action='store_true', help='Keep the existing --stream file and skip events already in it')
+    parser.add_argument('--listen', action='store_true', help='Run continuously, analyzing new differences as compare publishes them')
+    parser.add_argument('--debounce', type=float, default=5.0, help='Seconds an event must be quiet before --listen analyzes it')
+    parser.add_argument('--max-wait', type=float, default=30.0, help='Longest --listen delays a continuously changing event')
+    parser.add_argument('--fsync-every', type=int, default=10, help='Records written between fsyncs of the --stream file')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.listen and not args.stream:
+        parser.error('--listen requires --stream so results survive a restart')
     
     if args.verbose:
         logging.basicConfig(level=logging.DEBUG)
@@ -334,23 +732,48 @@ async def main():
         logging.basicConfig(level=logging.INFO)
     
     analyzer = AIAnalyzer()
+    if args.verbose or args.trace_sql or args.explain_slow_ms is not None:
+        analyzer.query_tracer = QueryTracer(args.explain_slow_ms)
+    if args.profile:
+        analyzer.profiler = StageProfiler(args.profile)
     
     try:
-        analysis_data = await analyzer.analyze_events(args.limit, args.fed_trump_finance)
-        output = analyzer.save_analysis(analysis_data, args.output)
+        if args.stream:
+            analyzer.open_stream(args.stream, args.resume, args.fsync_every)
+        
+        if args.listen:
+            try:
+                await analyzer.listen(
+                    args.fed_trump_finance, args.debounce, args.max_wait,
+                    args.limit, args.time_budget, args.token_budget,
+                    high_water_file=f"{args.stream}.highwater", catch_up=args.resume
+                )
+            finally:
+                output = analyzer.finalize_stream(args.stream, args.output)
+        else:
+            analysis_data = await analyzer.analyze_events(args.limit, args.fed_trump_finance, args.time_budget, args.token_budget)
+            
+            with stage(analyzer.profiler, 'save'):
+                if args.stream:
+                    output = analyzer.finalize_stream(args.stream, args.output)
+                else:
+                    output = analyzer.save_analysis(analysis_data, args.output)
         
         print(f"\n=== AI ANALYSIS COMPLETE ===")
         print(f"Topics analyzed: {output['total_topics_analyzed']}")
         print(f"Results saved to: {args.output}")
         
         print(f"\n=== AI INSIGHTS ===")
-        for topic in analysis_data:
+        for topic in output['topics']:
             print(f"\n📊 {topic['topic']} ({topic['category'].upper()})")
             print(f"🤖 AI Analysis: {topic['ai_analysis']}")
         
     except Exception as e:
         logger.error(f"Error during analysis: {e}")
     finally:
+        report(analyzer.query_tracer, args.verbose, args.trace_sql)
+        if analyzer.profiler:
+            print(f"\n=== STAGE PROFILE ===\n{analyzer.profiler.write()}")
         await analyzer.close()
 
 
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+from ai_analyze import DIFFERENCES_QUERY, AIAnalyzer
+from config import settings
+from db import connect_database, schema_dsn
+from differences import EVENT_DIFF_METRICS, read_event_differences
+from polymarket_client import PolymarketClient
+
+
+LEGACY_DDL = """
+    DROP TABLE IF EXISTS market_differences_archive, data_differences_archive, market_differences, data_differences CASCADE;
+    CREATE TABLE data_differences (
+        id SERIAL PRIMARY KEY,
+        event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+        differences_data JSONB NOT NULL,
+        compared_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(event_id, compared_at)
+    );
+    CREATE TRIGGER data_differences_notify
+        AFTER INSERT OR UPDATE OF differences_data ON data_differences
+        FOR EACH ROW EXECUTE FUNCTION notify_new_differences();
+    CREATE TABLE market_differences (
+        id SERIAL PRIMARY KEY,
+        market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+        event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+        differences_data JSONB NOT NULL,
+        compared_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(market_id, compared_at)
+    );
+"""
+
+LEGACY_QUERY = """
+    SELECT dd.event_id, e.title as event_title, e.description as event_description,
+           e.is_financial, e.is_crypto, e.is_big_event, dd.differences_data, dd.compared_at
+    FROM data_differences dd
+    JOIN events e ON dd.event_id = e.id
+"""
+
+
+def change(old: float, new: float) -> dict:
+    return {'old': old, 'new': new, 'difference': new - old, 'percent_change': ((new - old) / old * 100) if old > 0 else 0}
+
+
+def synthetic_differences(events: int, markets_per_event: int, cycles: int):
+    random.seed(11)
+    started = datetime.now(timezone.utc) - timedelta(hours=12)
+    for cycle in range(cycles):
+        compared_at = started + timedelta(minutes=cycle)
+        for event_id in range(1, events + 1):
+            differences = {metric: change(random.uniform(1e6, 5e7), random.uniform(1e6, 5e7))
+                           for metric in EVENT_DIFF_METRICS if random.random() < 0.7}
+            markets = []
+            for j in range(markets_per_event):
+                yes_old, yes_new = round(random.random(), 3), round(random.random(), 3)
+                old, new = {'0': yes_old, '1': round(1 - yes_old, 3)}, {'0': yes_new, '1': round(1 - yes_new, 3)}
+                markets.append({
+                    'market_id': (event_id - 1) * markets_per_event + j + 1,
+                    'event_id': event_id,
+                    'differences': {
+                        'volume': change(random.uniform(1e4, 5e6), random.uniform(1e4, 5e6)),
+                        'volume24hr': change(random.uniform(1e4, 5e6), random.uniform(1e4, 5e6)),
+                        'prices': {'old': old, 'new': new, 'differences': {k: new[k] - old[k] for k in old if abs(new[k] - old[k]) > 0.0001}}
+                    },
+                    'compared_at': compared_at.isoformat()
+                })
+            differences['markets'] = markets
+            yield {'event_id': event_id, 'differences': differences, 'compared_at': compared_at}
+
+
+def seed(client: PolymarketClient, schema: str, events: int, markets_per_event: int, cycles: int):
+    conn = connect_database()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {schema}")
+    conn.commit()
+    conn.close()
+
+    settings.database_url = schema_dsn(settings.database_url, schema)
+    client.create_tables()
+    conn = client.get_db_connection()
+    cursor = conn.cursor()
+
+    execute_values(cursor, "INSERT INTO events (id, title, description, active, volume) VALUES %s", [
+        (i, f"Fed event {i}", "Synthetic benchmark event " * 8, True, 5e6 + i) for i in range(1, events + 1)
+    ], page_size=5000)
+    execute_values(cursor, "INSERT INTO markets (id, event_id, question, active) VALUES %s", [
+        (i, (i - 1) // markets_per_event + 1, f"Market {i}?", True) for i in range(1, events * markets_per_event + 1)
+    ], page_size=5000)
+
+    # The pre-migration layout: full JSON per event with every market diff nested again, plus one JSON row per market
+    cursor.execute(LEGACY_DDL)
+    event_rows, market_rows = [], []
+    for diff in synthetic_differences(events, markets_per_event, cycles):
+        event_rows.append((diff['event_id'], json.dumps(diff['differences']), diff['compared_at']))
+        market_rows += [(m['market_id'], diff['event_id'], json.dumps(m['differences']), diff['compared_at'])
+                        for m in diff['differences']['markets']]
+    execute_values(cursor, "INSERT INTO data_differences (event_id, differences_data, compared_at) VALUES %s", event_rows, page_size=5000)
+    execute_values(cursor, "INSERT INTO market_differences (market_id, event_id, differences_data, compared_at) VALUES %s", market_rows, page_size=5000)
+    conn.commit()
+    cursor.close()
+    return len(event_rows), len(market_rows)
+
+
+def table_sizes(client: PolymarketClient) -> dict:
+    conn = client.get_db_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    sizes = {}
+    for table in ('data_differences', 'market_differences'):
+        cursor.execute(f"VACUUM FULL ANALYZE {table}")
+        cursor.execute("SELECT pg_total_relation_size(%s)", (table,))
+        sizes[table] = cursor.fetchone()[0]
+    cursor.close()
+    conn.autocommit = False
+    return sizes
+
+
+def read_legacy(analyzer: AIAnalyzer) -> dict:
+    cursor = analyzer.get_db_connection().cursor(cursor_factory=RealDictCursor)
+    cursor.execute(LEGACY_QUERY)
+    results = {}
+    for row in cursor.fetchall():
+        differences = row['differences_data']
+        move = 0.0
+        for market_diff in differences.get('markets') or []:
+            for diff in ((market_diff.get('differences') or {}).get('prices') or {}).get('differences', {}).values():
+                move = max(move, abs(float(diff)))
+        results[(row['event_id'], row['compared_at'])] = ({k: v for k, v in differences.items() if k != 'markets'}, move)
+    cursor.close()
+    return results
+
+
+def read_typed(analyzer: AIAnalyzer) -> dict:
+    cursor = analyzer.get_db_connection().cursor(cursor_factory=RealDictCursor)
+    cursor.execute(DIFFERENCES_QUERY)
+    results = {}
+    for row in cursor.fetchall():
+        analyzer.extract_key_changes(row)
+        results[(row['event_id'], row['compared_at'])] = (read_event_differences(row), analyzer.max_price_move(row))
+    cursor.close()
+    return results
+
+
+def measure(label: str, read, analyzer: AIAnalyzer, sizes: dict, repeat: int) -> dict:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = read(analyzer)
+        best = min(best, time.perf_counter() - started)
+    total = sum(sizes.values())
+    print(f"{label:<8} data_differences={sizes['data_differences'] / 1024 / 1024:8.1f} MiB  "
+          f"market_differences={sizes['market_differences'] / 1024 / 1024:8.1f} MiB  "
+          f"total={total / 1024 / 1024:8.1f} MiB  read={best * 1000:8.1f} ms  rows={len(results)}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSONB vs typed difference storage across the setup backfill and the legacy column drop')
+    parser.add_argument('--events', type=int, default=500, help='Events with differences per cycle')
+    parser.add_argument('--markets-per-event', type=int, default=10, help='Changed markets per event diff')
+    parser.add_argument('--cycles', type=int, default=20, help='Compare cycles to seed')
+    parser.add_argument('--repeat', type=int, default=3, help='Reads per layout (best is reported)')
+    parser.add_argument('--schema', type=str, default='bench_diff_storage', help='Scratch schema (dropped afterwards)')
+    args = parser.parse_args()
+
+    client = PolymarketClient()
+    analyzer = AIAnalyzer()
+    try:
+        event_rows, market_rows = seed(client, args.schema, args.events, args.markets_per_event, args.cycles)
+        print(f"seeded event_diffs={event_rows} market_diffs={market_rows}")
+        analyzer.db_conn = client.get_db_connection()
+
+        before = measure('jsonb', read_legacy, analyzer, table_sizes(client), args.repeat)
+        started = time.perf_counter()
+        client.create_tables()
+        print(f"backfill={time.perf_counter() - started:.2f}s")
+        # The backfill keeps differences_data, so these sizes carry both layouts
+        measure('backfill', read_typed, analyzer, table_sizes(client), args.repeat)
+
+        conn = client.get_db_connection()
+        cursor = conn.cursor()
+        mismatches = client.verify_differences_backfill(cursor)
+        conn.commit()
+        cursor.close()
+        print(f"verify: {mismatches}")
+
+        started = time.perf_counter()
+        client.drop_legacy_differences()
+        print(f"drop={time.perf_counter() - started:.2f}s")
+        after = measure('typed', read_typed, analyzer, table_sizes(client), args.repeat)
+
+        mismatched = [key for key, (metrics, move) in before.items()
+                      if key not in after or after[key][0] != metrics or abs(after[key][1] - move) > 1e-9]
+        print(f"mismatched rows after migration: {len(mismatched)}")
+    finally:
+        analyzer.db_conn = None
+        conn = client.get_db_connection()
+        conn.rollback()
+        conn.cursor().execute(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gamma_models import parse_events
+from polymarket_client import PolymarketClient, settings
+
+
+TITLE_WORDS = ['fed', 'rate cut', 'bitcoin', 'trump', 'ukraine', 'election', 'inflation', 'nba game', 'oscar award', 'tariff']
+
+
+def build_payload(events: int, markets_per_event: int) -> bytes:
+    random.seed(7)
+    payload = []
+    for i in range(1, events + 1):
+        markets = []
+        for j in range(markets_per_event):
+            yes = round(random.random(), 3)
+            markets.append({
+                'id': str(i * 1000 + j),
+                'question': f"Will outcome {j} of event {i} happen?",
+                'description': "Synthetic market description. " * 6,
+                'slug': f"market-{i}-{j}",
+                'endDate': '2026-12-31T00:00:00Z',
+                'active': True,
+                'closed': False,
+                'volume': str(random.uniform(0, 2e7)),
+                'volume24hr': random.uniform(0, 2e7),
+                'liquidity': str(random.uniform(0, 1e6)),
+                'outcomes': json.dumps(['Yes', 'No']),
+                'outcomePrices': json.dumps([str(yes), str(round(1 - yes, 3))]),
+                'clobTokenIds': json.dumps([str(random.getrandbits(128)), str(random.getrandbits(128))]),
+                'image': f"https://example.invalid/{i}/{j}.png"
+            })
+        payload.append({
+            'id': str(i),
+            'title': f"{' '.join(random.sample(TITLE_WORDS, 2))} event {i}",
+            'description': "Synthetic event description. " * 10,
+            'category': random.choice(['Politics', 'Crypto', 'Economy', 'Sports']),
+            'slug': f"event-{i}",
+            'endDate': '2026-12-31T00:00:00Z',
+            'active': True,
+            'closed': False,
+            'volume': random.uniform(0, 5e7),
+            'volume24hr': random.uniform(0, 5e6),
+            'liquidity': random.uniform(0, 5e6),
+            'liquidityClob': random.uniform(0, 5e6),
+            'resolutionSource': '',
+            'tags': [{'id': '1', 'label': 'Politics', 'slug': 'politics'}],
+            'markets': markets
+        })
+    return json.dumps(payload).encode('utf-8')
+
+
+def legacy_float(value) -> float:
+    try:
+        return float(value) if value else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def parse_legacy(content: bytes):
+    events = json.loads(content)
+    for event in events:
+        for field in ('volume', 'volume24hr', 'liquidity', 'liquidityClob'):
+            event[field] = legacy_float(event.get(field))
+        for market in event.get('markets') or []:
+            for field in ('volume', 'volume24hr', 'liquidity'):
+                market[field] = legacy_float(market.get(field))
+            for field in ('outcomes', 'outcomePrices'):
+                if isinstance(market.get(field), str):
+                    market[field] = json.loads(market[field])
+            market['outcomePrices'] = [float(price) for price in market.get('outcomePrices') or []]
+    return events
+
+
+def parse_typed(content: bytes):
+    return parse_events(content)
+
+
+def downstream(client: PolymarketClient, events) -> int:
+    classified = client.classify_profiles(events)
+    cleaned = [client.clean_event_data(event, client.profiles_for(event)) for event in classified['default']['all']]
+    client.attach_price_arrays(cleaned)
+    return sum(len(event.get('markets') or []) for event in cleaned)
+
+
+def measure(label: str, client: PolymarketClient, parse, content: bytes, repeat: int):
+    best_parse = best_total = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        events = parse(content)
+        parsed = time.perf_counter()
+        markets = downstream(client, events)
+        finished = time.perf_counter()
+        best_parse = min(best_parse, parsed - started)
+        best_total = min(best_total, finished - started)
+
+    tracemalloc.start()
+    downstream(client, parse(content))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} markets={markets:>7}  parse={best_parse * 1000:8.1f} ms  "
+          f"parse+downstream={best_total * 1000:8.1f} ms  peak={peak / 1024 / 1024:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gamma /events parsing: json.loads + hand coercion vs pydantic models')
+    parser.add_argument('--events', type=int, default=500, help='Events in the synthetic payload')
+    parser.add_argument('--markets-per-event', type=int, default=20, help='Markets attached to each event')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per path (best is reported)')
+    args = parser.parse_args()
+
+    settings.classification_cache_file = ''
+    client = PolymarketClient()
+    content = build_payload(args.events, args.markets_per_event)
+    print(f"payload={len(content) / 1024 / 1024:.1f} MiB  events={args.events}  markets/event={args.markets_per_event}")
+
+    measure('legacy', client, parse_legacy, content, args.repeat)
+    measure('typed', client, parse_typed, content, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cli import COMMANDS
+
+
+# Import-time budget per command in ms, measured as `cli.py COMMAND --help`
+DEFAULT_BUDGET_MS = 350.0
+BUDGETS_MS = {
+    'analyze': 330.0
+}
+
+# Modules only the commands that use them may load on the way to argument parsing
+LAZY_MODULES = ('httpx', 'transport', 'gamma_models', 'classification_cache', 'pyarrow', 'parquet_export')
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float, float]]]:
+    total_us = 0
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        if len(indent) == 1:
+            total_us += cumulative_us
+        modules.append((name, self_us / 1000, cumulative_us / 1000))
+    return total_us / 1000, modules
+
+
+def budget_for(command: str, scale: float = 1.0) -> float:
+    return BUDGETS_MS.get(command, DEFAULT_BUDGET_MS) * scale
+
+
+def lazy_leaks(modules: List[Tuple[str, float, float]]) -> List[str]:
+    loaded = {name.split('.')[0] for name, _, _ in modules} | {name for name, _, _ in modules}
+    return [name for name in LAZY_MODULES if name in loaded]
+
+
+def measure(command: str, repeat: int) -> Tuple[float, float, List[Tuple[str, float, float]]]:
+    best_import = best_wall = float('inf')
+    best_modules = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', os.path.join(ROOT, 'cli.py'), command, '--help'],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        wall = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            raise RuntimeError(f"cli.py {command} --help exited {result.returncode}:\n{result.stderr[-2000:]}")
+        import_ms, modules = parse_importtime(result.stderr)
+        if import_ms < best_import:
+            best_import, best_modules = import_ms, modules
+        best_wall = min(best_wall, wall)
+    return best_import, best_wall, best_modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI startup with -X importtime and enforce per-command budgets')
+    parser.add_argument('--commands', type=str, default=None, help='Comma-separated commands (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command (best is reported)')
+    parser.add_argument('--top', type=int, default=5, help='Slowest imports to list per command')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every budget, e.g. on slow CI hosts')
+    args = parser.parse_args()
+
+    commands = [c.strip() for c in args.commands.split(',')] if args.commands else list(COMMANDS)
+    failures = []
+    for command in commands:
+        import_ms, wall_ms, modules = measure(command, args.repeat)
+        budget = budget_for(command, args.scale)
+        leaked = lazy_leaks(modules)
+
+        status = 'ok' if import_ms <= budget and not leaked else 'FAIL'
+        print(f"{command:<8} imports={import_ms:7.1f} ms  wall={wall_ms:7.1f} ms  budget={budget:6.0f} ms  {status}")
+        for name, self_ms, cumulative_ms in sorted(modules, key=lambda m: m[1], reverse=True)[:args.top]:
+            print(f"         {self_ms:7.1f} ms self  {cumulative_ms:7.1f} ms cumulative  {name}")
+
+        if import_ms > budget:
+            failures.append(f"{command}: {import_ms:.1f} ms of imports exceeds the {budget:.0f} ms budget")
+        if leaked:
+            failures.append(f"{command}: imports {', '.join(leaked)} before dispatch")
+
+    if failures:
+        print('\n' + '\n'.join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import RealDictCursor, execute_values
+
+from config import settings
+from db import connect_database, schema_dsn
+from polymarket_client import PolymarketClient
+
+
+LEGACY_QUERY = """
+    SELECT e.*,
+           json_agg(
+               json_build_object(
+                   'id', m.id,
+                   'question', m.question,
+                   'volume', m.volume,
+                   'volume24hr', m.volume24hr,
+                   'liquidity', m.liquidity,
+                   'outcomes', m.outcomes,
+                   'outcome_prices', m.outcome_prices,
+                   'active', m.active
+               )
+           ) FILTER (WHERE m.id IS NOT NULL) as markets
+    FROM events e
+    LEFT JOIN markets m ON e.id = m.event_id
+    WHERE e.active = true
+    GROUP BY e.id
+    ORDER BY e.volume DESC
+"""
+
+
+def seed(client: PolymarketClient, schema: str, markets: int, markets_per_event: int):
+    conn = connect_database()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {schema}")
+    conn.commit()
+    conn.close()
+
+    settings.database_url = schema_dsn(settings.database_url, schema)
+    client.create_tables()
+    conn = client.get_db_connection()
+    cursor = conn.cursor()
+
+    event_count = max(1, markets // markets_per_event)
+    execute_values(cursor, """
+        INSERT INTO events (id, title, description, active, liquidity, volume, volume24hr, liquidity_clob)
+        VALUES %s
+    """, [
+        (i, f"Event {i}", "Synthetic benchmark event " * 8, True, 1e6 + i, 5e6 + i, 1e5 + i, 1e6 + i)
+        for i in range(1, event_count + 1)
+    ], page_size=5000)
+    execute_values(cursor, """
+        INSERT INTO markets (id, event_id, question, liquidity, volume, volume24hr, outcomes, outcome_prices, active)
+        VALUES %s
+    """, [
+        (i, (i - 1) // markets_per_event + 1, f"Market {i}?", 1e5 + i, 5e6 + i, 5e6 + i,
+         json.dumps(["Yes", "No"]), json.dumps({"0": 0.42, "1": 0.58}), True)
+        for i in range(1, event_count * markets_per_event + 1)
+    ], page_size=5000)
+    conn.commit()
+    cursor.close()
+
+
+def run_legacy(client: PolymarketClient) -> int:
+    cursor = client.get_db_connection().cursor(cursor_factory=RealDictCursor)
+    cursor.execute(LEGACY_QUERY)
+    markets = 0
+    for row in cursor.fetchall():
+        event = dict(row)
+        event['markets'] = [dict(m) for m in event['markets']] if event['markets'] else []
+        markets += len(event['markets'])
+    cursor.close()
+    return markets
+
+
+def run_streaming(client: PolymarketClient, itersize: int) -> int:
+    return sum(len(event['markets']) for event in client.iter_stored_events(itersize))
+
+
+def measure(label: str, func, *args):
+    # tracemalloc slows allocation-heavy loops several-fold, so wall time comes from an untraced run
+    started = time.perf_counter()
+    markets = func(*args)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} markets={markets:>8}  wall={elapsed:8.2f}s  peak={peak / 1024 / 1024:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark stored event loading')
+    parser.add_argument('--markets', type=int, default=100000, help='Number of synthetic markets to seed')
+    parser.add_argument('--markets-per-event', type=int, default=10, help='Markets attached to each event')
+    parser.add_argument('--itersize', type=int, default=500, help='Events read per page')
+    parser.add_argument('--schema', type=str, default='bench_stored_events', help='Scratch schema (dropped afterwards)')
+    args = parser.parse_args()
+
+    client = PolymarketClient()
+    try:
+        seed(client, args.schema, args.markets, args.markets_per_event)
+        measure('legacy', run_legacy, client)
+        measure('streaming', run_streaming, client, args.itersize)
+    finally:
+        conn = client.get_db_connection()
+        conn.rollback()
+        conn.cursor().execute(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx
+
+from db import connect_database, schema_dsn
+from mock_gamma import add_arguments
+from polymarket_client import PolymarketClient, settings
+
+
+class RequestRecorder:
+    def __init__(self, transport):
+        self.attempts: Dict[str, List[float]] = defaultdict(list)
+        self.calls: Dict[str, List[float]] = defaultdict(list)
+        self.outcomes: Dict[str, Counter] = defaultdict(Counter)
+        self.missing_details = 0
+        self.wrap(transport)
+
+    def wrap(self, transport):
+        send_once, request = transport.send_once, transport.request
+
+        async def timed_send(method: str, url: str, endpoint: str, **kwargs: Any):
+            started = time.perf_counter()
+            outcome = 'cancelled'
+            try:
+                response = await send_once(method, url, endpoint, **kwargs)
+                outcome = str(response.status_code)
+                return response
+            except httpx.HTTPStatusError as e:
+                outcome = str(e.response.status_code)
+                raise
+            except Exception as e:
+                outcome = type(e).__name__
+                raise
+            finally:
+                self.attempts[endpoint].append(time.perf_counter() - started)
+                self.outcomes[endpoint][outcome] += 1
+
+        async def timed_request(method: str, url: str, endpoint: str = 'default', **kwargs: Any):
+            started = time.perf_counter()
+            try:
+                return await request(method, url, endpoint, **kwargs)
+            except Exception as e:
+                self.outcomes[endpoint][f"gave up: {type(e).__name__}"] += 1
+                raise
+            finally:
+                self.calls[endpoint].append(time.perf_counter() - started)
+
+        transport.send_once, transport.request = timed_send, timed_request
+
+    def reset(self):
+        self.attempts.clear()
+        self.calls.clear()
+        self.outcomes.clear()
+        self.missing_details = 0
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99), 'max': ordered[-1] * 1000}
+
+
+def rss_mib() -> float:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_mock(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    forwarded = []
+    for name in ('events', 'markets_per_event', 'seed', 'latency_ms', 'latency_sigma', 'error_rate', 'throttle_rate',
+                 'truncate_rate', 'corrupt_rate', 'stall_rate', 'stall_seconds', 'fault_endpoints'):
+        forwarded += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'mock_gamma.py'), '--port', str(port)] + forwarded,
+        stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    if 'listening' not in line:
+        process.kill()
+        raise RuntimeError(f"Mock gamma server failed to start: {line!r}")
+    return process
+
+
+def prepare_schema(client: PolymarketClient, schema: str):
+    conn = connect_database()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {schema}")
+    conn.commit()
+    conn.close()
+
+    # The schema goes into the DSN rather than a session SET, so the client's reconnects after a dropped connection stay in it
+    settings.database_url = schema_dsn(settings.database_url, schema)
+    client.create_tables()
+
+
+async def run_cycle(client: PolymarketClient, recorder: RequestRecorder, phase: str, limit: int, trace_memory: bool) -> Dict[str, Any]:
+    recorder.reset()
+    before = dict(client.client.stats)
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    summary, error = {}, None
+    try:
+        summary = await (client.fetch_and_store(limit) if phase == 'fetch' else client.compare_data(limit))
+    except Exception as e:
+        error = repr(e)
+        client.get_db_connection().rollback()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024 if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    return {
+        'phase': phase,
+        'seconds': elapsed,
+        'summary': summary,
+        'events_per_second': (summary.get('fetched') or 0) / elapsed if elapsed else 0,
+        'error': error,
+        'transport': {key: value - before.get(key, 0) for key, value in client.client.stats.items()},
+        'attempt_latency_ms': {endpoint: percentiles(samples) for endpoint, samples in recorder.attempts.items()},
+        'call_latency_ms': {endpoint: percentiles(samples) for endpoint, samples in recorder.calls.items()},
+        'outcomes': {endpoint: dict(counts) for endpoint, counts in recorder.outcomes.items()},
+        'missing_market_details': recorder.missing_details,
+        'rss_mib': rss_mib(),
+        'traced_peak_mib': peak
+    }
+
+
+def print_cycle(index: int, cycle: Dict[str, Any]):
+    summary = cycle['summary']
+    print(f"\n[{index}] {cycle['phase']:<7} {cycle['seconds']:8.2f}s  fetched={summary.get('fetched', 0)}  "
+          f"compared={summary.get('compared', '-')}  differences={summary.get('differences', '-')}  "
+          f"events/s={cycle['events_per_second']:8.1f}  rss={cycle['rss_mib']:7.1f} MiB"
+          + (f"  traced_peak={cycle['traced_peak_mib']:7.1f} MiB" if cycle['traced_peak_mib'] is not None else ''))
+    if cycle['error']:
+        print(f"    cycle failed: {cycle['error']}")
+    print(f"    transport: {cycle['transport']}  missing market details: {cycle['missing_market_details']}")
+    for endpoint, latency in cycle['call_latency_ms'].items():
+        attempt = cycle['attempt_latency_ms'].get(endpoint, {})
+        print(f"    {endpoint:<8} call p50/p90/p99/max="
+              f"{latency['p50']:.1f}/{latency['p90']:.1f}/{latency['p99']:.1f}/{latency['max']:.1f} ms  "
+              f"attempt p50/p99={attempt.get('p50', 0):.1f}/{attempt.get('p99', 0):.1f} ms  "
+              f"outcomes={cycle['outcomes'].get(endpoint, {})}")
+
+
+async def run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    settings.polymarket_api_base_url = base_url
+    settings.classification_cache_file = ''
+    client = PolymarketClient()
+    recorder = RequestRecorder(client.client)
+    fetch_market_details = client.fetch_market_details
+
+    async def counted_market_details(market_id: str) -> Optional[Dict[str, Any]]:
+        details = await fetch_market_details(market_id)
+        if details is None:
+            recorder.missing_details += 1
+        return details
+
+    client.fetch_market_details = counted_market_details
+    cycles = []
+    try:
+        prepare_schema(client, args.schema)
+        for index, phase in enumerate(['fetch'] + ['compare'] * args.cycles):
+            cycle = await run_cycle(client, recorder, phase, args.limit, args.tracemalloc)
+            print_cycle(index, cycle)
+            cycles.append(cycle)
+    finally:
+        conn = client.get_db_connection()
+        conn.rollback()
+        conn.cursor().execute(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE")
+        conn.commit()
+        await client.close()
+
+    async with httpx.AsyncClient() as http:
+        server_stats = (await http.get(f"{base_url}/__stats")).json()
+    return {
+        'cycles': cycles,
+        'server': server_stats,
+        'max_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive fetch/compare against the mock gamma API and report throughput, latency, errors and memory')
+    add_arguments(parser)
+    parser.add_argument('--limit', type=int, default=500, help='Events requested per /events call')
+    parser.add_argument('--cycles', type=int, default=5, help='Compare cycles after the initial fetch')
+    parser.add_argument('--base-url', type=str, default=None, help='Use an already running mock instead of starting one')
+    parser.add_argument('--schema', type=str, default='bench_load_gamma', help='Scratch schema (dropped afterwards)')
+    parser.add_argument('--tracemalloc', action='store_true', help='Trace Python allocations per cycle (slower)')
+    parser.add_argument('--output', type=str, default=None, help='Also write the full report as JSON to this file')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    process = None
+    if args.base_url:
+        base_url = args.base_url.rstrip('/')
+    else:
+        port = free_port()
+        process = start_mock(args, port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    # fetch writes polymarket_data*.json into the working directory
+    os.chdir(tempfile.mkdtemp(prefix='load_gamma_'))
+    try:
+        report = asyncio.run(run(args, base_url))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    compares = [cycle for cycle in report['cycles'] if cycle['phase'] == 'compare']
+    failed = sum(1 for cycle in report['cycles'] if cycle['error'])
+    print(f"\n=== SUMMARY ({args.events} events x {args.markets_per_event} markets, limit {args.limit}) ===")
+    if compares:
+        seconds = sorted(cycle['seconds'] for cycle in compares)
+        print(f"compare cycles: {len(compares)}  median={seconds[len(seconds) // 2]:.2f}s  max={seconds[-1]:.2f}s")
+    print(f"failed cycles: {failed}  max RSS: {report['max_rss_mib']:.1f} MiB")
+    print(f"server: {report['server']}")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import signal
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+TITLE_WORDS = ['fed', 'rate cut', 'bitcoin', 'trump', 'ukraine', 'election', 'inflation', 'us recession', 'crypto etf', 'tariff']
+REASONS = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests', 500: 'Internal Server Error',
+           502: 'Bad Gateway', 503: 'Service Unavailable'}
+
+
+class GammaState:
+    def __init__(self, events: int, markets_per_event: int, seed: int = 7):
+        self.random = random.Random(seed)
+        self.tick = 0
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.markets: Dict[str, Dict[str, Any]] = {}
+
+        for i in range(1, events + 1):
+            event = {
+                'id': str(i),
+                'title': f"{' '.join(self.random.sample(TITLE_WORDS, 2))} event {i}",
+                'description': "Synthetic event generated by the mock gamma API. " * 4,
+                'category': self.random.choice(['Politics', 'Crypto', 'Economy', 'Sports']),
+                'slug': f"event-{i}",
+                'endDate': '2027-12-31T00:00:00Z',
+                'active': True,
+                'closed': False,
+                'volume': self.random.lognormvariate(17, 1.2),
+                'volume24hr': self.random.lognormvariate(14, 1.5),
+                'liquidity': self.random.lognormvariate(13, 1),
+                'liquidityClob': self.random.lognormvariate(13, 1),
+                'resolutionSource': '',
+                'market_ids': []
+            }
+            for j in range(markets_per_event):
+                market_id = str(i * 1000 + j)
+                yes = self.random.uniform(0.05, 0.95)
+                self.markets[market_id] = {
+                    'id': market_id,
+                    'question': f"Will outcome {j} of event {i} happen?",
+                    'description': "Synthetic market generated by the mock gamma API. " * 2,
+                    'slug': f"market-{i}-{j}",
+                    'endDate': '2027-12-31T00:00:00Z',
+                    'active': True,
+                    'closed': False,
+                    'volume': self.random.lognormvariate(15, 1.5),
+                    'volume24hr': self.random.lognormvariate(15, 1.5),
+                    'liquidity': self.random.lognormvariate(12, 1),
+                    'openInterest': self.random.lognormvariate(12, 1),
+                    'outcomes': ['Yes', 'No'],
+                    'yes': yes
+                }
+                event['market_ids'].append(market_id)
+            self.events[event['id']] = event
+
+    def drift(self):
+        # Volumes only grow, 24h volume and liquidity wander, prices random-walk inside (0.01, 0.99)
+        self.tick += 1
+        rand = self.random
+        for market in self.markets.values():
+            market['volume'] += market['volume'] * rand.uniform(0, 0.02)
+            market['volume24hr'] *= rand.uniform(0.97, 1.05)
+            market['liquidity'] *= rand.uniform(0.97, 1.03)
+            market['openInterest'] *= rand.uniform(0.98, 1.03)
+            market['yes'] = min(0.99, max(0.01, market['yes'] + rand.gauss(0, 0.02)))
+        for event in self.events.values():
+            event['volume'] += event['volume'] * rand.uniform(0, 0.01)
+            event['volume24hr'] *= rand.uniform(0.97, 1.05)
+            event['liquidity'] *= rand.uniform(0.97, 1.03)
+            event['liquidityClob'] *= rand.uniform(0.97, 1.03)
+
+    def market_payload(self, market: Dict[str, Any], detail: bool = False) -> Dict[str, Any]:
+        yes = round(market['yes'], 3)
+        payload = {
+            'id': market['id'],
+            'question': market['question'],
+            'description': market['description'],
+            'slug': market['slug'],
+            'endDate': market['endDate'],
+            'active': market['active'],
+            'closed': market['closed'],
+            'volume': f"{market['volume']:.4f}",
+            'volume24hr': round(market['volume24hr'], 4),
+            'liquidity': f"{market['liquidity']:.4f}",
+            'outcomes': json.dumps(market['outcomes']),
+            'outcomePrices': json.dumps([str(yes), str(round(1 - yes, 3))])
+        }
+        if detail:
+            payload.update({
+                'openInterest': round(market['openInterest'], 2),
+                'bestBid': round(max(0.0, yes - 0.01), 3),
+                'bestAsk': round(min(1.0, yes + 0.01), 3)
+            })
+        return payload
+
+    def event_payload(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {key: value for key, value in event.items() if key != 'market_ids'}
+        payload['markets'] = [self.market_payload(self.markets[market_id]) for market_id in event['market_ids']]
+        return payload
+
+    def list_events(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        self.drift()
+        limit = int(params.get('limit') or 100)
+        offset = int(params.get('offset') or 0)
+        reverse = params.get('ascending', 'false').lower() != 'true'
+        ordered = sorted(self.events.values(), key=lambda event: event.get(params.get('order') or 'volume') or 0, reverse=reverse)
+        return [self.event_payload(event) for event in ordered[offset:offset + limit]]
+
+
+class FaultInjector:
+    def __init__(self, latency_ms: float = 0.0, latency_sigma: float = 0.5, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, truncate_rate: float = 0.0, corrupt_rate: float = 0.0,
+                 stall_rate: float = 0.0, stall_seconds: float = 60.0, endpoints: Tuple[str, ...] = ('events', 'markets'),
+                 seed: int = 7):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.rates = [('stall', stall_rate), ('error', error_rate), ('throttle', throttle_rate),
+                      ('truncate', truncate_rate), ('corrupt', corrupt_rate)]
+        self.stall_seconds = stall_seconds
+        self.endpoints = endpoints
+        self.random = random.Random(seed)
+
+    def latency(self) -> float:
+        if self.latency_ms <= 0:
+            return 0.0
+        # Lognormal with the configured median, so sigma controls how heavy the tail is
+        return self.random.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    def fault(self, endpoint: str) -> Optional[str]:
+        if endpoint not in self.endpoints:
+            return None
+        roll = self.random.random()
+        for name, rate in self.rates:
+            if roll < rate:
+                return name
+            roll -= rate
+        return None
+
+
+class MockGammaServer:
+    def __init__(self, state: GammaState, faults: FaultInjector):
+        self.state = state
+        self.faults = faults
+        self.stats: Dict[str, Counter] = defaultdict(Counter)
+
+    def route(self, path: str, params: Dict[str, str]) -> Tuple[str, int, Any]:
+        parts = [part for part in path.split('/') if part]
+        if parts == ['events']:
+            return 'events', 200, self.state.list_events(params)
+        if len(parts) == 2 and parts[0] == 'events' and parts[1] in self.state.events:
+            return 'events', 200, self.state.event_payload(self.state.events[parts[1]])
+        if len(parts) == 2 and parts[0] == 'markets' and parts[1] in self.state.markets:
+            return 'markets', 200, self.state.market_payload(self.state.markets[parts[1]], detail=True)
+        if len(parts) == 2 and parts[0] in ('events', 'markets'):
+            return parts[0], 404, {'error': 'not found'}
+        if parts == ['__stats']:
+            return 'stats', 200, {'tick': self.state.tick, 'endpoints': {name: dict(counts) for name, counts in self.stats.items()}}
+        return 'unknown', 404, {'error': 'not found'}
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, body: bytes, headers: Optional[Dict[str, str]] = None,
+                      declared_length: Optional[int] = None):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}", 'Content-Type: application/json',
+                 f"Content-Length: {len(body) if declared_length is None else declared_length}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+
+                target = request_line.decode('latin-1').split(' ')[1]
+                url = urlsplit(target)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                endpoint, status, payload = self.route(url.path, params)
+                counts = self.stats[endpoint]
+                counts['requests'] += 1
+
+                delay = self.faults.latency()
+                fault = self.faults.fault(endpoint)
+                if fault == 'stall':
+                    delay += self.faults.stall_seconds
+                if delay:
+                    await asyncio.sleep(delay)
+
+                if fault == 'error':
+                    counts['5xx'] += 1
+                    await self.respond(writer, self.faults.random.choice([500, 502, 503]), b'{"error": "injected"}')
+                elif fault == 'throttle':
+                    counts['429'] += 1
+                    await self.respond(writer, 429, b'{"error": "slow down"}', {'Retry-After': '1'})
+                elif fault == 'truncate':
+                    # Full Content-Length, half the body, then the connection drops
+                    counts['truncated'] += 1
+                    body = json.dumps(payload).encode('utf-8')
+                    await self.respond(writer, status, body[:len(body) // 2], declared_length=len(body))
+                    break
+                elif fault == 'corrupt':
+                    # A well-formed HTTP response whose JSON is cut short
+                    counts['corrupt'] += 1
+                    body = json.dumps(payload).encode('utf-8')
+                    await self.respond(writer, status, body[:len(body) // 2])
+                else:
+                    counts['stalled' if fault == 'stall' else str(status)] += 1
+                    await self.respond(writer, status, json.dumps(payload).encode('utf-8'))
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Clients hang up on stalled requests, and shutdown cancels whatever is still in flight
+            pass
+        finally:
+            writer.close()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--events', type=int, default=5000, help='Synthetic events served by /events')
+    parser.add_argument('--markets-per-event', type=int, default=10, help='Markets attached to each event')
+    parser.add_argument('--seed', type=int, default=7, help='Seed for the generated data, drift and faults')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Median injected latency per request')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Lognormal sigma of the injected latency (tail weight)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 500/502/503')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='Share of responses cut mid-body by a dropped connection')
+    parser.add_argument('--corrupt-rate', type=float, default=0.0, help='Share of responses with a complete HTTP frame but truncated JSON')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='Share of requests held for --stall-seconds (client timeouts)')
+    parser.add_argument('--stall-seconds', type=float, default=60.0, help='How long a stalled request is held')
+    parser.add_argument('--fault-endpoints', type=str, default='events,markets', help='Endpoints faults apply to (events, markets)')
+
+
+def build_server(args: argparse.Namespace) -> MockGammaServer:
+    state = GammaState(args.events, args.markets_per_event, args.seed)
+    faults = FaultInjector(
+        args.latency_ms, args.latency_sigma, args.error_rate, args.throttle_rate, args.truncate_rate,
+        args.corrupt_rate, args.stall_rate, args.stall_seconds,
+        tuple(e.strip() for e in args.fault_endpoints.split(',') if e.strip()), args.seed
+    )
+    return MockGammaServer(state, faults)
+
+
+async def serve(args: argparse.Namespace):
+    server = build_server(args)
+    listener = await asyncio.start_server(server.handle, args.host, args.port)
+    port = listener.sockets[0].getsockname()[1]
+    print(f"mock gamma listening on http://{args.host}:{port} with {args.events} events x {args.markets_per_event} markets", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    async with listener:
+        await stop.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the gamma API with drifting data and fault injection')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Interface to bind')
+    parser.add_argument('--port', type=int, default=8765, help='Port to bind (0 picks a free one)')
+    add_arguments(parser)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List
+
+
+logger = logging.getLogger(__name__)
+
+
+def keyword_set_version(keyword_sets: Dict[str, List[str]]) -> str:
+    payload = json.dumps({name: sorted(set(keywords)) for name, keywords in keyword_sets.items()}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ClassificationCache:
+    def __init__(self, path: str, version: str, max_entries: int = 50000):
+        self.path = path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.touched: List[str] = []
+        self.pending: List[tuple] = []
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS classification_cache (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                matches TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_classification_cache_last_used ON classification_cache(last_used)")
+        stale = self.conn.execute("DELETE FROM classification_cache WHERE version <> ?", (version,)).rowcount
+        if stale:
+            logger.info(f"Dropped {stale} classification cache entries from an older keyword-set version")
+        self.conn.commit()
+
+    def key(self, data: Dict[str, Any]) -> str:
+        text = "\0".join([self.version, data.get('title') or '', data.get('description') or '', data.get('category') or ''])
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Iterable[str], set_names: Iterable[str]) -> Dict[str, Dict[str, bool]]:
+        keys = list(dict.fromkeys(keys))
+        set_names = list(set_names)
+        found = {}
+
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, matches FROM classification_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            for key, matches in rows:
+                matched = set(json.loads(matches))
+                found[key] = {name: name in matched for name in set_names}
+
+        self.touched.extend(found)
+        return found
+
+    def put(self, key: str, matches: Dict[str, bool]):
+        self.pending.append((key, self.version, json.dumps(sorted(name for name, hit in matches.items() if hit)), time.time()))
+
+    def flush(self):
+        now = time.time()
+        if self.touched:
+            self.conn.executemany("UPDATE classification_cache SET last_used = ? WHERE key = ?", [(now, key) for key in self.touched])
+        if self.pending:
+            self.conn.executemany("""
+                INSERT INTO classification_cache (key, version, matches, last_used) VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET matches = excluded.matches, last_used = excluded.last_used
+            """, self.pending)
+
+        excess = self.conn.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.conn.execute("""
+                DELETE FROM classification_cache WHERE key IN (
+                    SELECT key FROM classification_cache ORDER BY last_used LIMIT ?
+                )
+            """, (excess,))
+
+        self.conn.commit()
+        self.touched = []
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
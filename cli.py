@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import asyncio
+import importlib
+import sys
+from typing import List, Optional
+
+
+# command -> (module, forward the command name to the module's own parser, summary)
+COMMANDS = {
+    'setup': ('polymarket_client', True, 'Create tables, triggers and materialized views'),
+    'fetch': ('polymarket_client', True, 'Fetch events from the gamma API and store them'),
+    'compare': ('polymarket_client', True, 'Compare stored data against the live API'),
+    'enqueue': ('polymarket_client', True, 'Queue a sharded compare cycle'),
+    'worker': ('polymarket_client', True, 'Process queued compare jobs'),
+    'movers': ('polymarket_client', True, 'Show top movers'),
+    'export': ('polymarket_client', True, 'Write Parquet datasets'),
+    'analyze': ('ai_analyze', False, 'Run the AI analysis over stored differences')
+}
+
+
+def usage() -> str:
+    lines = ['usage: cli.py COMMAND [options]', '', 'commands:']
+    lines += [f"  {name:<10} {summary}" for name, (_, _, summary) in COMMANDS.items()]
+    lines += ['', "Run 'cli.py COMMAND --help' for the options of a command."]
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    if argv[0] not in COMMANDS:
+        print(f"cli.py: unknown command {argv[0]!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    # Only the module behind the chosen command is imported, so e.g. `setup`
+    # never pays for httpx or the OpenAI client
+    module_name, forward_command, _ = COMMANDS[argv[0]]
+    module = importlib.import_module(module_name)
+    asyncio.run(module.main(argv if forward_command else argv[1:]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,156 @@
 CREATE TABLE IF NOT EXISTS data_differences (
     id SERIAL PRIMARY KEY,
     event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
-    differences_data JSONB NOT NULL,
+    volume_old DOUBLE PRECISION,
+    volume_new DOUBLE PRECISION,
+    volume24hr_old DOUBLE PRECISION,
+    volume24hr_new DOUBLE PRECISION,
+    liquidity_old DOUBLE PRECISION,
+    liquidity_new DOUBLE PRECISION,
+    liquidity_clob_old DOUBLE PRECISION,
+    liquidity_clob_new DOUBLE PRECISION,
+    market_changes SMALLINT NOT NULL DEFAULT 0,
     compared_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(event_id, compared_at)
 );
 
+CREATE OR REPLACE FUNCTION notify_new_differences() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('new_differences', json_build_object('id', NEW.id, 'event_id', NEW.event_id)::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS data_differences_notify ON data_differences;
+CREATE TRIGGER data_differences_notify
+    AFTER INSERT OR UPDATE OF volume_old, volume_new, volume24hr_old, volume24hr_new, liquidity_old, liquidity_new, liquidity_clob_old, liquidity_clob_new, market_changes ON data_differences
+    FOR EACH ROW EXECUTE FUNCTION notify_new_differences();
+
 CREATE TABLE IF NOT EXISTS market_differences (
     id SERIAL PRIMARY KEY,
     market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
     event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
-    differences_data JSONB NOT NULL,
+    data_difference_id INTEGER REFERENCES data_differences(id) ON DELETE CASCADE,
+    volume_old DOUBLE PRECISION,
+    volume_new DOUBLE PRECISION,
+    volume24hr_old DOUBLE PRECISION,
+    volume24hr_new DOUBLE PRECISION,
+    liquidity_old DOUBLE PRECISION,
+    liquidity_new DOUBLE PRECISION,
+    open_interest_old DOUBLE PRECISION,
+    open_interest_new DOUBLE PRECISION,
+    best_bid_old DOUBLE PRECISION,
+    best_bid_new DOUBLE PRECISION,
+    best_ask_old DOUBLE PRECISION,
+    best_ask_new DOUBLE PRECISION,
+    price_outcomes TEXT[],
+    price_old DOUBLE PRECISION[],
+    price_new DOUBLE PRECISION[],
     compared_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(market_id, compared_at)
 );
 
+CREATE TABLE IF NOT EXISTS compare_cycles (
+    id SERIAL PRIMARY KEY,
+    total_jobs INTEGER NOT NULL DEFAULT 0,
+    started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS compare_jobs (
+    cycle_id INTEGER NOT NULL REFERENCES compare_cycles(id) ON DELETE CASCADE,
+    event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    worker_id VARCHAR(255),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    leased_until TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (cycle_id, event_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_compare_jobs_claim ON compare_jobs(cycle_id, status, leased_until);
+
+CREATE TABLE IF NOT EXISTS market_movers (
+    market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    metric VARCHAR(20) NOT NULL,
+    change DOUBLE PRECISION NOT NULL,
+    percent_change DOUBLE PRECISION NOT NULL DEFAULT 0,
+    observed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (market_id, metric, observed_at)
+);
+
+CREATE INDEX IF NOT EXISTS idx_market_movers_window ON market_movers(metric, observed_at DESC);
+
+CREATE TABLE IF NOT EXISTS market_rollups (
+    market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    resolution VARCHAR(4) NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    volume_first DOUBLE PRECISION,
+    volume_last DOUBLE PRECISION,
+    volume_max DOUBLE PRECISION,
+    volume24hr_first DOUBLE PRECISION,
+    volume24hr_last DOUBLE PRECISION,
+    volume24hr_max DOUBLE PRECISION,
+    liquidity_first DOUBLE PRECISION,
+    liquidity_last DOUBLE PRECISION,
+    liquidity_max DOUBLE PRECISION,
+    samples INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (market_id, resolution, bucket_start)
+);
+
+CREATE TABLE IF NOT EXISTS market_price_rollups (
+    market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    outcome_index SMALLINT NOT NULL,
+    resolution VARCHAR(4) NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    open DOUBLE PRECISION NOT NULL,
+    high DOUBLE PRECISION NOT NULL,
+    low DOUBLE PRECISION NOT NULL,
+    close DOUBLE PRECISION NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (market_id, resolution, bucket_start, outcome_index)
+);
+
+CREATE TABLE IF NOT EXISTS data_differences_archive (LIKE data_differences INCLUDING DEFAULTS);
+ALTER TABLE data_differences_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS market_differences_archive (LIKE market_differences INCLUDING DEFAULTS);
+ALTER TABLE market_differences_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS market_rollups_archive (LIKE market_rollups INCLUDING DEFAULTS);
+ALTER TABLE market_rollups_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS market_price_rollups_archive (LIKE market_price_rollups INCLUDING DEFAULTS);
+ALTER TABLE market_price_rollups_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
 CREATE INDEX IF NOT EXISTS idx_data_differences_event_id ON data_differences(event_id);
 CREATE INDEX IF NOT EXISTS idx_data_differences_compared_at ON data_differences(compared_at DESC);
 
 CREATE INDEX IF NOT EXISTS idx_market_differences_market_id ON market_differences(market_id);
 CREATE INDEX IF NOT EXISTS idx_market_differences_event_id ON market_differences(event_id);
 CREATE INDEX IF NOT EXISTS idx_market_differences_compared_at ON market_differences(compared_at DESC);
+CREATE INDEX IF NOT EXISTS idx_market_differences_data_difference_id ON market_differences(data_difference_id);
 
 CREATE OR REPLACE VIEW recent_event_differences AS
-SELECT 
-    dd.id,
-    dd.event_id,
-    e.title as event_title,
-    dd.differences_data,
-    dd.compared_at,
-    dd.created_at
+SELECT dd.id, dd.event_id, e.title AS event_title,
+       dd.volume_old, dd.volume_new, dd.volume24hr_old, dd.volume24hr_new, dd.liquidity_old, dd.liquidity_new, dd.liquidity_clob_old, dd.liquidity_clob_new, dd.market_changes,
+       dd.compared_at, dd.created_at
 FROM data_differences dd
 JOIN events e ON dd.event_id = e.id
 ORDER BY dd.compared_at DESC;
 
 CREATE OR REPLACE VIEW recent_market_differences AS
-SELECT 
-    md.id,
-    md.market_id,
-    md.event_id,
-    e.title as event_title,
-    m.question as market_question,
-    md.differences_data,
-    md.compared_at,
-    md.created_at
+SELECT md.id, md.market_id, md.event_id, md.data_difference_id,
+       e.title AS event_title, m.question AS market_question,
+       md.volume_old, md.volume_new, md.volume24hr_old, md.volume24hr_new, md.liquidity_old, md.liquidity_new, md.open_interest_old, md.open_interest_new, md.best_bid_old, md.best_bid_new, md.best_ask_old, md.best_ask_new, md.price_outcomes, md.price_old, md.price_new,
+       md.compared_at, md.created_at
 FROM market_differences md
 JOIN events e ON md.event_id = e.id
 JOIN markets m ON md.market_id = m.id
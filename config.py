@@ -1,14 +1,52 @@
+import os
+
 from pydantic_settings import BaseSettings
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 
 class Settings(BaseSettings):
     polymarket_api_base_url: str = "https://gamma-api.polymarket.com"
-    
+
     database_url: str = "postgresql://ranjanshahajishitole@localhost:5432/polymarket_db"
-    
+    openai_api_key: str = ""
+
+    data_dir: str = ""
+    stored_events_itersize: int = 500
+    filter_profiles_file: str = ""
+    classification_cache_file: str = ".classification_cache.sqlite"
+    classification_cache_size: int = 50000
+    state_cache: bool = True
+    state_reconcile_seconds: float = 900.0
+    lifecycle_missed_cycles: int = 3
+    lifecycle_max_checks: int = 100
+    lifecycle_recheck_seconds: float = 3600.0
+    movers_windows: str = "1h,24h"
+    movers_top_k: int = 20
+    rollup_minute_retention: str = "48h"
+
+    http_events_timeout: float = 30.0
+    http_markets_timeout: float = 10.0
+    http_max_retries: int = 3
+    http_backoff_base: float = 0.5
+    http_backoff_max: float = 8.0
+    http_breaker_failures: int = 5
+    http_breaker_reset_seconds: float = 30.0
+    http_hedge_percentile: float = 0.95
+    http_hedge_min_samples: int = 20
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    def data_path(self, filename: str) -> str:
+        # Relative paths resolve against DATA_DIR, or the repo directory, never the working directory
+        return os.path.join(os.path.expanduser(self.data_dir) or BASE_DIR, os.path.expanduser(filename))
+
     class Config:
         env_file = ".env"
         case_sensitive = False
+        extra = 'ignore'
 
 
 settings = Settings()
@@ -13,6 +13,10 @@ CREATE TABLE IF NOT EXISTS events (
     is_crypto BOOLEAN NOT NULL DEFAULT false,
     is_big_event BOOLEAN NOT NULL DEFAULT false,
     is_excluded BOOLEAN NOT NULL DEFAULT false,
+    profile_tags TEXT[] NOT NULL DEFAULT '{default}',
+    missed_cycles INTEGER NOT NULL DEFAULT 0,
+    last_seen_at TIMESTAMP WITH TIME ZONE,
+    last_checked_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -29,10 +33,28 @@ CREATE TABLE IF NOT EXISTS markets (
     outcome_prices JSONB,
     active BOOLEAN NOT NULL DEFAULT true,
     description TEXT,
+    missed_cycles INTEGER NOT NULL DEFAULT 0,
+    last_seen_at TIMESTAMP WITH TIME ZONE,
+    last_checked_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE TABLE IF NOT EXISTS market_outcome_prices (
+    market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+    outcome_index SMALLINT NOT NULL,
+    outcome TEXT,
+    price DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (market_id, outcome_index)
+);
+
+CREATE TABLE IF NOT EXISTS events_archive (LIKE events INCLUDING DEFAULTS);
+ALTER TABLE events_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS markets_archive (LIKE markets INCLUDING DEFAULTS);
+ALTER TABLE markets_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
 CREATE TABLE IF NOT EXISTS data_sync_log (
     id SERIAL PRIMARY KEY,
     sync_timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -54,6 +76,7 @@ CREATE INDEX IF NOT EXISTS idx_events_financial ON events(is_financial);
 CREATE INDEX IF NOT EXISTS idx_events_crypto ON events(is_crypto);
 CREATE INDEX IF NOT EXISTS idx_events_big_event ON events(is_big_event);
 CREATE INDEX IF NOT EXISTS idx_events_end_date ON events(end_date);
+CREATE INDEX IF NOT EXISTS idx_events_profile_tags ON events USING GIN (profile_tags);
 
 CREATE INDEX IF NOT EXISTS idx_markets_event_id ON markets(event_id);
 CREATE INDEX IF NOT EXISTS idx_markets_volume ON markets(volume DESC);
@@ -70,8 +93,10 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+DROP TRIGGER IF EXISTS update_events_updated_at ON events;
 CREATE TRIGGER update_events_updated_at
-    BEFORE UPDATE ON events
+    BEFORE UPDATE OF title, description, end_date, active, liquidity, volume, volume24hr, liquidity_clob,
+    resolution_source, is_financial, is_crypto, is_big_event, is_excluded, profile_tags ON events
     FOR EACH ROW
     EXECUTE FUNCTION update_events_updated_at();
 
@@ -83,32 +108,99 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+DROP TRIGGER IF EXISTS update_markets_updated_at ON markets;
 CREATE TRIGGER update_markets_updated_at
-    BEFORE UPDATE ON markets
+    BEFORE UPDATE OF event_id, question, end_date, liquidity, volume, volume24hr, outcomes, outcome_prices,
+    active, description ON markets
     FOR EACH ROW
     EXECUTE FUNCTION update_markets_updated_at();
 
-CREATE OR REPLACE VIEW events_with_market_stats AS
+CREATE TABLE IF NOT EXISTS state_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO state_versions (name) VALUES ('stored_state') ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_stored_state_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE state_versions SET version = version + 1 WHERE name = 'stored_state';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS events_state_version ON events;
+CREATE TRIGGER events_state_version
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF active, volume, volume24hr, liquidity, liquidity_clob ON events
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_stored_state_version();
+
+DROP TRIGGER IF EXISTS markets_state_version ON markets;
+CREATE TRIGGER markets_state_version
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF event_id, active, volume, volume24hr, liquidity, outcome_prices ON markets
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_stored_state_version();
+
+DROP TRIGGER IF EXISTS market_outcome_prices_state_version ON market_outcome_prices;
+CREATE TRIGGER market_outcome_prices_state_version
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF price ON market_outcome_prices
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_stored_state_version();
+
+CREATE TABLE IF NOT EXISTS event_market_stats (
+    event_id BIGINT PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE,
+    market_count INTEGER NOT NULL DEFAULT 0,
+    total_market_volume NUMERIC NOT NULL DEFAULT 0,
+    total_market_volume24hr NUMERIC NOT NULL DEFAULT 0,
+    total_market_liquidity NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+DO $$
+DECLARE
+    view_name TEXT;
+BEGIN
+    FOREACH view_name IN ARRAY ARRAY['active_events_recent', 'high_volume_events', 'events_with_market_stats'] LOOP
+        IF EXISTS (SELECT 1 FROM pg_views WHERE schemaname = current_schema() AND viewname = view_name) THEN
+            EXECUTE format('DROP VIEW %I CASCADE', view_name);
+        END IF;
+    END LOOP;
+END $$;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS events_with_market_stats AS
 SELECT 
     e.*,
-    COUNT(m.id) as market_count,
-    COALESCE(SUM(m.volume), 0) as total_market_volume,
-    COALESCE(SUM(m.volume24hr), 0) as total_market_volume24hr,
-    COALESCE(SUM(m.liquidity), 0) as total_market_liquidity
+    COALESCE(s.market_count, 0) as market_count,
+    COALESCE(s.total_market_volume, 0) as total_market_volume,
+    COALESCE(s.total_market_volume24hr, 0) as total_market_volume24hr,
+    COALESCE(s.total_market_liquidity, 0) as total_market_liquidity
 FROM events e
-LEFT JOIN markets m ON e.id = m.event_id AND m.active = true
-GROUP BY e.id;
-
-CREATE OR REPLACE VIEW high_volume_events AS
-SELECT *
-FROM events_with_market_stats
-WHERE volume >= 5000000
-ORDER BY volume DESC;
-
-CREATE OR REPLACE VIEW active_events_recent AS
-SELECT *
-FROM events_with_market_stats
-WHERE active = true
-    AND (volume24hr > 0 OR total_market_volume24hr > 0)
-ORDER BY COALESCE(volume24hr, total_market_volume24hr) DESC;
+LEFT JOIN event_market_stats s ON s.event_id = e.id;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS high_volume_events AS
+SELECT 
+    e.*,
+    COALESCE(s.market_count, 0) as market_count,
+    COALESCE(s.total_market_volume, 0) as total_market_volume,
+    COALESCE(s.total_market_volume24hr, 0) as total_market_volume24hr,
+    COALESCE(s.total_market_liquidity, 0) as total_market_liquidity
+FROM events e
+LEFT JOIN event_market_stats s ON s.event_id = e.id
+WHERE e.volume >= 5000000
+ORDER BY e.volume DESC;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS active_events_recent AS
+SELECT 
+    e.*,
+    COALESCE(s.market_count, 0) as market_count,
+    COALESCE(s.total_market_volume, 0) as total_market_volume,
+    COALESCE(s.total_market_volume24hr, 0) as total_market_volume24hr,
+    COALESCE(s.total_market_liquidity, 0) as total_market_liquidity
+FROM events e
+LEFT JOIN event_market_stats s ON s.event_id = e.id
+WHERE e.active = true
+    AND (e.volume24hr > 0 OR s.total_market_volume24hr > 0)
+ORDER BY COALESCE(e.volume24hr, s.total_market_volume24hr, 0) DESC;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_events_with_market_stats_id ON events_with_market_stats(id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_high_volume_events_id ON high_volume_events(id);
+CREATE INDEX IF NOT EXISTS idx_high_volume_events_sort ON high_volume_events(volume DESC);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_active_events_recent_id ON active_events_recent(id);
+CREATE INDEX IF NOT EXISTS idx_active_events_recent_sort ON active_events_recent(COALESCE(volume24hr, total_market_volume24hr, 0) DESC);
 
@@ -0,0 +1,15 @@
+from typing import Optional
+
+from psycopg2.extensions import make_dsn
+
+from config import settings
+from query_tracing import QueryTracer, connect
+
+
+def connect_database(tracer: Optional[QueryTracer] = None):
+    return connect(settings.database_url, tracer)
+
+
+def schema_dsn(dsn: str, schema: str) -> str:
+    # search_path is set at connect time, so a reconnect cannot fall back to the default schema
+    return make_dsn(dsn, options=f"-csearch_path={schema}")
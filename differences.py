@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+
+EVENT_DIFF_METRICS = ('volume', 'volume24hr', 'liquidity', 'liquidity_clob')
+MARKET_DIFF_METRICS = ('volume', 'volume24hr', 'liquidity', 'open_interest', 'best_bid', 'best_ask')
+QUOTE_METRICS = ('best_bid', 'best_ask')
+
+
+def metric_columns(metrics: Tuple[str, ...]) -> List[str]:
+    return [f"{metric}_{side}" for metric in metrics for side in ('old', 'new')]
+
+
+# Only old/new are stored; difference and percent_change are derived on read
+EVENT_DIFF_COLUMNS = metric_columns(EVENT_DIFF_METRICS) + ['market_changes']
+MARKET_DIFF_COLUMNS = metric_columns(MARKET_DIFF_METRICS) + ['price_outcomes', 'price_old', 'price_new']
+
+COLUMN_TYPES = {
+    **{column: 'DOUBLE PRECISION' for column in metric_columns(EVENT_DIFF_METRICS) + metric_columns(MARKET_DIFF_METRICS)},
+    'market_changes': 'SMALLINT NOT NULL DEFAULT 0',
+    'price_outcomes': 'TEXT[]',
+    'price_old': 'DOUBLE PRECISION[]',
+    'price_new': 'DOUBLE PRECISION[]'
+}
+
+
+def encode_metrics(differences: Dict[str, Any], metrics: Tuple[str, ...]) -> List[Optional[float]]:
+    values = []
+    for metric in metrics:
+        change = differences.get(metric)
+        values += [change['old'], change['new']] if change else [None, None]
+    return values
+
+
+def encode_event_diff(differences: Dict[str, Any]) -> tuple:
+    return tuple(encode_metrics(differences, EVENT_DIFF_METRICS) + [len(differences.get('markets') or [])])
+
+
+def encode_market_diff(differences: Dict[str, Any]) -> tuple:
+    prices = differences.get('prices')
+    if not prices or not prices.get('differences'):
+        return tuple(encode_metrics(differences, MARKET_DIFF_METRICS) + [None, None, None])
+
+    # Only the outcomes that moved are kept, with the old price missing outcomes defaulted to 0 as in the comparison
+    outcomes = sorted(prices['differences'])
+    return tuple(encode_metrics(differences, MARKET_DIFF_METRICS) + [
+        outcomes,
+        [float((prices.get('old') or {}).get(outcome, 0.0)) for outcome in outcomes],
+        [float((prices.get('new') or {}).get(outcome, 0.0)) for outcome in outcomes]
+    ])
+
+
+def metric_change(metric: str, old: float, new: float) -> Dict[str, float]:
+    change = {'old': old, 'new': new, 'difference': new - old}
+    if metric not in QUOTE_METRICS:
+        change['percent_change'] = ((new - old) / old * 100) if old > 0 else 0
+    return change
+
+
+def decode_metrics(row: Dict[str, Any], metrics: Tuple[str, ...]) -> Dict[str, Dict[str, float]]:
+    return {
+        metric: metric_change(metric, float(row[f"{metric}_old"]), float(row[f"{metric}_new"]))
+        for metric in metrics
+        if row.get(f"{metric}_old") is not None
+    }
+
+
+def read_event_differences(row: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    return decode_metrics(row, EVENT_DIFF_METRICS)
+
+
+def read_max_price_move(row: Dict[str, Any]) -> float:
+    return float(row.get('max_price_move') or 0)
+
+
+MAX_PRICE_MOVE_SQL = """(
+        SELECT MAX(ABS(p.new - p.old))
+        FROM market_differences md
+        CROSS JOIN LATERAL unnest(md.price_old, md.price_new) AS p(old, new)
+        WHERE md.data_difference_id = dd.id
+    )"""
@@ -0,0 +1,147 @@
+import json
+import logging
+import math
+from typing import Any, List, Optional, Union
+
+from pydantic import BeforeValidator, ConfigDict, Json, TypeAdapter, ValidationError
+from typing_extensions import Annotated, NotRequired, TypedDict
+
+
+logger = logging.getLogger(__name__)
+
+
+# Gamma sends '' for unknown amounts and the odd non-numeric string; like a missing field they
+# become None instead of failing validation for the whole feed
+def optional_float(value: Any) -> Optional[float]:
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return None
+    return float(value) if math.isfinite(value) else None
+
+
+def json_list(value: Any) -> Optional[List[Any]]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, list) else None
+
+
+# A price list with any unusable element is dropped whole, as parse_price_array does
+def price_list(value: Any) -> Optional[List[float]]:
+    values = json_list(value)
+    if values is None:
+        return None
+    prices = [optional_float(price) for price in values]
+    return None if None in prices else prices
+
+
+def text_list(value: Any) -> Optional[List[str]]:
+    values = json_list(value)
+    if values is None or not all(isinstance(item, (str, int, float)) for item in values):
+        return None
+    return [str(item) for item in values]
+
+
+Amount = Annotated[Optional[float], BeforeValidator(optional_float)]
+Prices = Annotated[Optional[List[float]], BeforeValidator(price_list)]
+Outcomes = Annotated[Optional[List[str]], BeforeValidator(text_list)]
+
+
+class GammaMarket(TypedDict):
+    # NaN/inf would only fail later as a Decimal, so such a batch takes the lenient path instead
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True, allow_inf_nan=False)
+
+    id: str
+    question: NotRequired[Optional[str]]
+    description: NotRequired[Optional[str]]
+    endDate: NotRequired[Optional[str]]
+    active: NotRequired[Optional[bool]]
+    volume: NotRequired[Optional[float]]
+    volume24hr: NotRequired[Optional[float]]
+    liquidity: NotRequired[Optional[float]]
+    outcomes: NotRequired[Union[Json[List[str]], List[str], None]]
+    outcomePrices: NotRequired[Union[Json[List[float]], List[float], None]]
+
+
+class GammaEvent(TypedDict):
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True, allow_inf_nan=False)
+
+    id: str
+    title: NotRequired[Optional[str]]
+    description: NotRequired[Optional[str]]
+    category: NotRequired[Optional[str]]
+    endDate: NotRequired[Optional[str]]
+    active: NotRequired[Optional[bool]]
+    volume: NotRequired[Optional[float]]
+    volume24hr: NotRequired[Optional[float]]
+    liquidity: NotRequired[Optional[float]]
+    liquidityClob: NotRequired[Optional[float]]
+    resolutionSource: NotRequired[Optional[str]]
+    markets: NotRequired[Optional[List[GammaMarket]]]
+
+
+# The same fields with Python validators, several times slower than the native ones above,
+# so they only run on a batch the strict schemas rejected
+class LenientGammaMarket(TypedDict):
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+
+    id: str
+    question: NotRequired[Optional[str]]
+    description: NotRequired[Optional[str]]
+    endDate: NotRequired[Optional[str]]
+    active: NotRequired[Optional[bool]]
+    volume: NotRequired[Amount]
+    volume24hr: NotRequired[Amount]
+    liquidity: NotRequired[Amount]
+    outcomes: NotRequired[Outcomes]
+    outcomePrices: NotRequired[Prices]
+
+
+class LenientGammaEvent(TypedDict):
+    __pydantic_config__ = ConfigDict(coerce_numbers_to_str=True)
+
+    id: str
+    title: NotRequired[Optional[str]]
+    description: NotRequired[Optional[str]]
+    category: NotRequired[Optional[str]]
+    endDate: NotRequired[Optional[str]]
+    active: NotRequired[Optional[bool]]
+    volume: NotRequired[Amount]
+    volume24hr: NotRequired[Amount]
+    liquidity: NotRequired[Amount]
+    liquidityClob: NotRequired[Amount]
+    resolutionSource: NotRequired[Optional[str]]
+    markets: NotRequired[Optional[List[LenientGammaMarket]]]
+
+
+GAMMA_EVENTS = TypeAdapter(List[GammaEvent])
+LENIENT_GAMMA_EVENT = TypeAdapter(LenientGammaEvent)
+
+
+def parse_events(content: bytes) -> List[GammaEvent]:
+    try:
+        return GAMMA_EVENTS.validate_json(content)
+    except ValidationError as error:
+        # Revalidate event by event: bad amounts and outcome lists become None, and events that are
+        # still broken (no id, a market that is not an object) are dropped. A body that is not a list still raises.
+        try:
+            payload = json.loads(content)
+        except ValueError:
+            raise error
+        if not isinstance(payload, list):
+            raise error
+
+    events = []
+    for index, item in enumerate(payload):
+        try:
+            events.append(LENIENT_GAMMA_EVENT.validate_python(item))
+        except ValidationError as e:
+            event_id = item.get('id') if isinstance(item, dict) else None
+            logger.warning(f"Skipping malformed gamma event {event_id!r} at index {index}: {e.error_count()} validation errors")
+    return events
@@ -0,0 +1,295 @@
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+from differences import EVENT_DIFF_METRICS, MARKET_DIFF_METRICS, QUOTE_METRICS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+logger = logging.getLogger(__name__)
+
+# updated_at is the writing transaction's start time, so a row can commit long after rows with later
+# timestamps. Nothing stamped at or after the oldest open transaction's start is exported yet.
+EXPORT_UPPER_BOUND_SQL = """
+    SELECT LEAST(
+        NOW(),
+        (SELECT MIN(xact_start) FROM pg_stat_activity
+         WHERE datname = current_database() AND pid <> pg_backend_pid() AND xact_start IS NOT NULL)
+    )
+"""
+
+
+def flattened_metric_columns(metrics: Tuple[str, ...]) -> Tuple[str, List[Tuple[str, str]]]:
+    selects = []
+    columns = []
+    for metric in metrics:
+        # Quotes carry no percent change, matching metric_change in differences.py
+        fields = ('old', 'new', 'difference') if metric in QUOTE_METRICS else ('old', 'new', 'difference', 'percent_change')
+        old, new = f"d.{metric}_old", f"d.{metric}_new"
+        expressions = {
+            'old': old,
+            'new': new,
+            'difference': f"{new} - {old}",
+            'percent_change': f"CASE WHEN {old} > 0 THEN ({new} - {old}) / {old} * 100 WHEN {old} IS NOT NULL THEN 0 END"
+        }
+        for field in fields:
+            column = f"{metric}_{'pct' if field == 'percent_change' else field}"
+            selects.append(f"{expressions[field]} AS {column}")
+            columns.append((column, 'float64'))
+    return ",\n                   ".join(selects), columns
+
+
+_event_diff_selects, _event_diff_columns = flattened_metric_columns(EVENT_DIFF_METRICS)
+_market_diff_selects, _market_diff_columns = flattened_metric_columns(MARKET_DIFF_METRICS)
+
+EXPORT_TABLES: Dict[str, Dict[str, Any]] = {
+    'events': {
+        'query': """
+            SELECT id, title, description, end_date, active, liquidity, volume, volume24hr,
+                   liquidity_clob, resolution_source, is_financial, is_crypto, is_big_event,
+                   is_excluded, created_at, updated_at
+            FROM events
+            WHERE updated_at > %(watermark)s AND updated_at < %(upper)s
+            ORDER BY updated_at
+        """,
+        'watermark': 'updated_at',
+        'partition': 'updated_at',
+        'columns': [
+            ('id', 'int64'), ('title', 'string'), ('description', 'string'), ('end_date', 'timestamp'),
+            ('active', 'bool'), ('liquidity', 'float64'), ('volume', 'float64'), ('volume24hr', 'float64'),
+            ('liquidity_clob', 'float64'), ('resolution_source', 'string'), ('is_financial', 'bool'),
+            ('is_crypto', 'bool'), ('is_big_event', 'bool'), ('is_excluded', 'bool'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp')
+        ]
+    },
+    'markets': {
+        'query': """
+            SELECT id, event_id, question, end_date, liquidity, volume, volume24hr,
+                   outcomes::text AS outcomes, outcome_prices::text AS outcome_prices,
+                   active, created_at, updated_at
+            FROM markets
+            WHERE updated_at > %(watermark)s AND updated_at < %(upper)s
+            ORDER BY updated_at
+        """,
+        'watermark': 'updated_at',
+        'partition': 'updated_at',
+        'columns': [
+            ('id', 'int64'), ('event_id', 'int64'), ('question', 'string'), ('end_date', 'timestamp'),
+            ('liquidity', 'float64'), ('volume', 'float64'), ('volume24hr', 'float64'),
+            ('outcomes', 'string'), ('outcome_prices', 'string'), ('active', 'bool'),
+            ('created_at', 'timestamp'), ('updated_at', 'timestamp')
+        ]
+    },
+    'data_differences': {
+        'query': f"""
+            SELECT d.id, d.event_id, d.compared_at, d.updated_at,
+                   {_event_diff_selects},
+                   d.market_changes
+            FROM data_differences d
+            WHERE d.updated_at > %(watermark)s AND d.updated_at < %(upper)s
+            ORDER BY d.updated_at
+        """,
+        'watermark': 'updated_at',
+        'partition': 'compared_at',
+        'columns': [
+            ('id', 'int64'), ('event_id', 'int64'), ('compared_at', 'timestamp'), ('updated_at', 'timestamp')
+        ] + _event_diff_columns + [('market_changes', 'int32')]
+    },
+    'market_differences': {
+        'query': f"""
+            SELECT d.id, d.market_id, d.event_id, d.compared_at, d.updated_at,
+                   {_market_diff_selects},
+                   (
+                       SELECT MAX(ABS(p.new - p.old))
+                       FROM unnest(d.price_old, d.price_new) AS p(old, new)
+                   ) AS max_price_move
+            FROM market_differences d
+            WHERE d.updated_at > %(watermark)s AND d.updated_at < %(upper)s
+            ORDER BY d.updated_at
+        """,
+        'watermark': 'updated_at',
+        'partition': 'compared_at',
+        'columns': [
+            ('id', 'int64'), ('market_id', 'int64'), ('event_id', 'int64'),
+            ('compared_at', 'timestamp'), ('updated_at', 'timestamp')
+        ] + _market_diff_columns + [('max_price_move', 'float64')]
+    },
+    'market_rollups': {
+        'query': """
+            SELECT r.market_id, r.resolution, r.bucket_start,
+                   r.volume_first, r.volume_last, r.volume_max,
+                   r.volume24hr_first, r.volume24hr_last, r.volume24hr_max,
+                   r.liquidity_first, r.liquidity_last, r.liquidity_max,
+                   r.samples, r.updated_at
+            FROM market_rollups r
+            WHERE r.updated_at > %(watermark)s AND r.updated_at < %(upper)s
+            ORDER BY r.updated_at
+        """,
+        'watermark': 'updated_at',
+        'partition': 'bucket_start',
+        'columns': [
+            ('market_id', 'int64'), ('resolution', 'string'), ('bucket_start', 'timestamp'),
+            ('volume_first', 'float64'), ('volume_last', 'float64'), ('volume_max', 'float64'),
+            ('volume24hr_first', 'float64'), ('volume24hr_last', 'float64'), ('volume24hr_max', 'float64'),
+            ('liquidity_first', 'float64'), ('liquidity_last', 'float64'), ('liquidity_max', 'float64'),
+            ('samples', 'int32'), ('updated_at', 'timestamp')
+        ]
+    },
+    'market_price_rollups': {
+        'query': """
+            SELECT p.market_id, p.outcome_index, p.resolution, p.bucket_start,
+                   p.open, p.high, p.low, p.close, p.samples, p.updated_at
+            FROM market_price_rollups p
+            WHERE p.updated_at > %(watermark)s AND p.updated_at < %(upper)s
+            ORDER BY p.updated_at
+        """,
+        'watermark': 'updated_at',
+        'partition': 'bucket_start',
+        'columns': [
+            ('market_id', 'int64'), ('outcome_index', 'int32'), ('resolution', 'string'),
+            ('bucket_start', 'timestamp'), ('open', 'float64'), ('high', 'float64'), ('low', 'float64'),
+            ('close', 'float64'), ('samples', 'int32'), ('updated_at', 'timestamp')
+        ]
+    }
+}
+
+
+class ParquetExporter:
+    def __init__(self, client, output_dir: str = 'exports', batch_size: int = 50000, compression: str = 'zstd'):
+        if pa is None:
+            raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+
+        self.client = client
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.compression = compression
+        self.run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        self.watermark_file = os.path.join(output_dir, '_watermarks.json')
+
+    def arrow_schema(self, columns: List[Tuple[str, str]]):
+        types = {
+            'int32': pa.int32(),
+            'int64': pa.int64(),
+            'float64': pa.float64(),
+            'bool': pa.bool_(),
+            'string': pa.string(),
+            'timestamp': pa.timestamp('us', tz='UTC')
+        }
+        return pa.schema([(name, types[kind]) for name, kind in columns])
+
+    def load_watermarks(self) -> Dict[str, str]:
+        if not os.path.exists(self.watermark_file):
+            return {}
+        with open(self.watermark_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_watermarks(self, watermarks: Dict[str, str]):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_file = f"{self.watermark_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(watermarks, f, indent=2)
+        os.replace(tmp_file, self.watermark_file)
+
+    def write_batch(self, table_dir: str, spec: Dict[str, Any], schema, rows: List[Dict[str, Any]], writers: Dict[str, Any]):
+        partitions: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            partition_value = row.get(spec['partition'])
+            partition = partition_value.date().isoformat() if partition_value else 'unknown'
+            partitions.setdefault(partition, []).append(row)
+
+        for partition, partition_rows in partitions.items():
+            if partition not in writers:
+                directory = os.path.join(table_dir, f"date={partition}")
+                os.makedirs(directory, exist_ok=True)
+                writers[partition] = pq.ParquetWriter(
+                    os.path.join(directory, f"part-{self.run_id}.parquet"),
+                    schema,
+                    compression=self.compression
+                )
+
+            arrays = {}
+            for name, _ in spec['columns']:
+                values = [row.get(name) for row in partition_rows]
+                arrays[name] = [float(v) if isinstance(v, Decimal) else v for v in values]
+            writers[partition].write_batch(pa.RecordBatch.from_pydict(arrays, schema=schema))
+
+    def export_upper_bound(self, conn) -> datetime:
+        cursor = conn.cursor()
+        cursor.execute(EXPORT_UPPER_BOUND_SQL)
+        upper = cursor.fetchone()[0]
+        cursor.close()
+        return upper
+
+    def replace_table_dir(self, table: str, staging_dir: str):
+        table_dir = os.path.join(self.output_dir, table)
+        retired_dir = f"{staging_dir}.old"
+        if os.path.exists(table_dir):
+            os.replace(table_dir, retired_dir)
+        if os.path.exists(staging_dir):
+            os.replace(staging_dir, table_dir)
+        shutil.rmtree(retired_dir, ignore_errors=True)
+
+    def export_table(self, table: str, watermark: Optional[str] = None, full: bool = False) -> Tuple[int, Optional[str]]:
+        spec = EXPORT_TABLES[table]
+        schema = self.arrow_schema(spec['columns'])
+        # A full export is written beside the table's directory and swapped in, so it replaces
+        # the existing partitions instead of adding a second copy of every row to them
+        table_dir = os.path.join(self.output_dir, f".{table}.full-{self.run_id}" if full else table)
+        conn = self.client.get_db_connection()
+        upper = self.export_upper_bound(conn)
+        cursor = conn.cursor(name=f"export_{table}", cursor_factory=RealDictCursor)
+        cursor.itersize = self.batch_size
+        writers: Dict[str, Any] = {}
+        exported = 0
+        latest = None if full else watermark
+        completed = False
+
+        try:
+            cursor.execute(spec['query'], {'watermark': latest or '-infinity', 'upper': upper})
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                self.write_batch(table_dir, spec, schema, rows, writers)
+                exported += len(rows)
+                latest = rows[-1][spec['watermark']].isoformat()
+            completed = True
+        finally:
+            for writer in writers.values():
+                writer.close()
+            cursor.close()
+            conn.commit()
+            if full and not completed:
+                shutil.rmtree(table_dir, ignore_errors=True)
+
+        if full:
+            self.replace_table_dir(table, table_dir)
+        logger.info(f"Exported {exported} {table} rows into {len(writers)} partitions")
+        return exported, latest
+
+    def export(self, tables: Optional[List[str]] = None, full: bool = False) -> Dict[str, int]:
+        watermarks = self.load_watermarks()
+        counts = {}
+
+        for table in tables or list(EXPORT_TABLES):
+            exported, latest = self.export_table(table, watermarks.get(table), full)
+            counts[table] = exported
+            if latest:
+                watermarks[table] = latest
+            else:
+                watermarks.pop(table, None)
+            self.save_watermarks(watermarks)
+
+        return counts
@@ -3,35 +3,230 @@
 import asyncio
 import json
 import logging
+import os
+import re
+import socket
 import sys
-from typing import Dict, Any, List, Optional
-from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Any, Iterator, List, Optional
+from datetime import datetime, timedelta, timezone
 import argparse
 
-import httpx
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from pydantic_settings import BaseSettings
+from psycopg2.extras import Json, RealDictCursor, execute_values
 
+from config import settings
+from db import connect_database
+from differences import (
+    COLUMN_TYPES, EVENT_DIFF_COLUMNS, EVENT_DIFF_METRICS, MARKET_DIFF_COLUMNS, MARKET_DIFF_METRICS,
+    encode_event_diff, encode_market_diff, metric_change, metric_columns
+)
+from profiling import StageProfiler, stage
+from query_tracing import QueryTracer, report
+from state_store import StateStore
 
-class Settings(BaseSettings):
-    polymarket_api_base_url: str = "https://gamma-api.polymarket.com"
-    database_url: str = "postgresql://ranjanshahajishitole@localhost:5432/polymarket_db"
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
-        extra = 'ignore'
+logger = logging.getLogger(__name__)
 
+DEFAULT_FILTER_PROFILE = {
+    'name': 'default',
+    'min_event_volume': 5000000,
+    'include_any': ['us', 'fed', 'crypto', 'war'],
+    'exclude': ['excluded'],
+    'min_market_volume24hr': 5000000,
+    'min_market_volume': 100
+}
 
-settings = Settings()
-logger = logging.getLogger(__name__)
+ARCHIVE_TABLES = {
+    'events': ['market_rollups', 'market_price_rollups', 'market_outcome_prices', 'market_movers',
+               'market_differences', 'data_differences', 'markets', 'events'],
+    'markets': ['market_rollups', 'market_price_rollups', 'market_outcome_prices', 'market_movers',
+                'market_differences', 'markets']
+}
+
+MOVER_METRICS = ('volume', 'volume24hr', 'liquidity', 'price')
+WINDOW_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+
+ROLLUP_RESOLUTIONS = {
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1)
+}
+
+EVENT_STATS_SELECT = """
+    SELECT e.*,
+           COALESCE(s.market_count, 0) AS market_count,
+           COALESCE(s.total_market_volume, 0) AS total_market_volume,
+           COALESCE(s.total_market_volume24hr, 0) AS total_market_volume24hr,
+           COALESCE(s.total_market_liquidity, 0) AS total_market_liquidity
+    FROM events e
+    LEFT JOIN event_market_stats s ON s.event_id = e.id
+"""
+
+MATERIALIZED_VIEWS = {
+    'events_with_market_stats': (EVENT_STATS_SELECT, None),
+    'high_volume_events': (
+        EVENT_STATS_SELECT + " WHERE e.volume >= 5000000 ORDER BY e.volume DESC",
+        'volume DESC'
+    ),
+    'active_events_recent': (
+        EVENT_STATS_SELECT + """ WHERE e.active = true
+              AND (e.volume24hr > 0 OR s.total_market_volume24hr > 0)
+            ORDER BY COALESCE(e.volume24hr, s.total_market_volume24hr, 0) DESC""",
+        'COALESCE(volume24hr, total_market_volume24hr, 0) DESC'
+    )
+}
+
+DROP_PLAIN_STATS_VIEWS_SQL = """
+    DO $$
+    DECLARE
+        view_name TEXT;
+    BEGIN
+        FOREACH view_name IN ARRAY ARRAY['active_events_recent', 'high_volume_events', 'events_with_market_stats'] LOOP
+            IF EXISTS (SELECT 1 FROM pg_views WHERE schemaname = current_schema() AND viewname = view_name) THEN
+                EXECUTE format('DROP VIEW %I CASCADE', view_name);
+            END IF;
+        END LOOP;
+    END $$;
+"""
+
+STATE_VERSION_TRIGGERS = {
+    'events': 'active, volume, volume24hr, liquidity, liquidity_clob',
+    'markets': 'event_id, active, volume, volume24hr, liquidity, outcome_prices',
+    'market_outcome_prices': 'price'
+}
+
+# Exported columns only, so bookkeeping updates like missed_cycles do not re-export unchanged rows
+UPDATED_AT_TRIGGERS = {
+    'events': 'title, description, end_date, active, liquidity, volume, volume24hr, liquidity_clob, '
+              'resolution_source, is_financial, is_crypto, is_big_event, is_excluded, profile_tags',
+    'markets': 'event_id, question, end_date, liquidity, volume, volume24hr, outcomes, outcome_prices, active, description'
+}
+
+NUMERIC_TEXT_PATTERN = r'^\s*[-+]?([0-9]+(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$'
+
+# Legacy rows can hold double-encoded or malformed JSON; markets whose prices do not all parse
+# as numbers are skipped, like parse_price_array does, instead of failing setup
+BACKFILL_OUTCOME_PRICES_SQL = """
+    CREATE OR REPLACE FUNCTION try_jsonb(value TEXT) RETURNS JSONB AS $$
+    BEGIN
+        RETURN value::jsonb;
+    EXCEPTION WHEN others THEN
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql IMMUTABLE;
+
+    INSERT INTO market_outcome_prices (market_id, outcome_index, outcome, price)
+    SELECT l.id, (p.ordinality - 1)::smallint, l.outcomes ->> (p.ordinality - 1)::int, p.value::double precision
+    FROM (
+        SELECT m.id,
+               CASE jsonb_typeof(m.outcomes)
+                   WHEN 'string' THEN try_jsonb(m.outcomes #>> '{}')
+                   ELSE m.outcomes
+               END AS outcomes,
+               CASE jsonb_typeof(m.outcome_prices)
+                   WHEN 'string' THEN try_jsonb(m.outcome_prices #>> '{}')
+                   ELSE m.outcome_prices
+               END AS prices
+        FROM markets m
+        WHERE jsonb_typeof(m.outcome_prices) IN ('array', 'string')
+    ) l
+    CROSS JOIN LATERAL jsonb_array_elements_text(
+        CASE WHEN jsonb_typeof(l.prices) = 'array' THEN l.prices ELSE '[]'::jsonb END
+    ) WITH ORDINALITY AS p(value, ordinality)
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(l.prices) = 'array' THEN l.prices ELSE '[]'::jsonb END
+        ) AS v(value)
+        WHERE v.value IS NULL OR v.value !~ %(numeric)s
+    )
+    UNION ALL
+    SELECT m.id, (o.ordinality - 1)::smallint, o.value, (m.outcome_prices ->> o.value)::double precision
+    FROM markets m
+    CROSS JOIN LATERAL jsonb_array_elements_text(
+        CASE WHEN jsonb_typeof(m.outcomes) = 'array' THEN m.outcomes ELSE '[]'::jsonb END
+    ) WITH ORDINALITY AS o(value, ordinality)
+    WHERE jsonb_typeof(m.outcome_prices) = 'object'
+      AND m.outcome_prices ? o.value
+      AND NOT EXISTS (
+          SELECT 1
+          FROM jsonb_each_text(m.outcome_prices) AS v(outcome, value)
+          WHERE v.value IS NULL OR v.value !~ %(numeric)s
+      )
+    ON CONFLICT (market_id, outcome_index) DO NOTHING
+"""
+
+RECENT_DIFFERENCE_VIEWS = {
+    'recent_event_differences': f"""
+        SELECT dd.id, dd.event_id, e.title AS event_title,
+               {', '.join(f'dd.{column}' for column in EVENT_DIFF_COLUMNS)},
+               dd.compared_at, dd.created_at
+        FROM data_differences dd
+        JOIN events e ON dd.event_id = e.id
+        ORDER BY dd.compared_at DESC
+    """,
+    'recent_market_differences': f"""
+        SELECT md.id, md.market_id, md.event_id, md.data_difference_id,
+               e.title AS event_title, m.question AS market_question,
+               {', '.join(f'md.{column}' for column in MARKET_DIFF_COLUMNS)},
+               md.compared_at, md.created_at
+        FROM market_differences md
+        JOIN events e ON md.event_id = e.id
+        JOIN markets m ON md.market_id = m.id
+        ORDER BY md.compared_at DESC
+    """
+}
+
+
+def difference_columns(columns: List[str]) -> str:
+    return ",\n                ".join(f"{column} {COLUMN_TYPES[column]}" for column in columns)
+
+
+def add_difference_columns(table: str, columns: List[str]) -> str:
+    return "".join(f"\n            ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {COLUMN_TYPES[column]};" for column in columns)
+
+
+def legacy_metric_expressions(metrics: tuple) -> Dict[str, str]:
+    return {
+        f"{metric}_{side}": f"(differences_data #>> '{{{metric},{side}}}')::double precision"
+        for metric in metrics for side in ('old', 'new')
+    }
+
+
+def legacy_metric_assignments(metrics: tuple) -> str:
+    return ",\n                        ".join(f"{column} = {expression}" for column, expression in legacy_metric_expressions(metrics).items())
+
+
+def legacy_metric_mismatches(metrics: tuple) -> str:
+    return "\n                       OR ".join(
+        f"{column} IS DISTINCT FROM {expression}" for column, expression in legacy_metric_expressions(metrics).items()
+    )
+
+
+# The moved outcome prices of a legacy market diff row `d`, as (outcomes, old_prices, new_prices)
+LEGACY_PRICES_SQL = """
+    SELECT array_agg(p.outcome ORDER BY p.outcome) AS outcomes,
+           array_agg(COALESCE((d.differences_data #>> ARRAY['prices', 'old', p.outcome])::double precision, 0) ORDER BY p.outcome) AS old_prices,
+           array_agg(COALESCE((d.differences_data #>> ARRAY['prices', 'new', p.outcome])::double precision, 0) ORDER BY p.outcome) AS new_prices
+    FROM jsonb_object_keys(COALESCE(d.differences_data #> '{prices,differences}', '{}'::jsonb)) AS p(outcome)
+"""
+
+LEGACY_DIFFERENCE_TABLES = ('data_differences', 'market_differences', 'data_differences_archive', 'market_differences_archive')
+
+
+def http_errors() -> tuple:
+    # httpx and the transport are only imported by commands that hit the API
+    import httpx
+    from transport import CircuitOpenError
+    return (httpx.HTTPError, CircuitOpenError, ValueError)
 
 
 class PolymarketClient:
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self._client = None
         self.db_conn = None
+        self.query_tracer: Optional[QueryTracer] = None
+        self.profiler: Optional[StageProfiler] = None
         
         self.financial_keywords = [
             'bitcoin', 'btc', 'ethereum', 'eth', 'crypto', 'cryptocurrency',
@@ -96,52 +291,8 @@ class PolymarketClient:
             'netherlands', 'dutch', 'romania', 'bucharest', 'argentina', 'deputies election',
             'chile', 'chilean', 'megaeth', 'mega eth', 'public sale', 'total commitments'
         ]
-    
-    async def close(self):
-        await self.client.aclose()
-        if self.db_conn:
-            self.db_conn.close()
-    
-    def get_db_connection(self):
-        if not self.db_conn or self.db_conn.closed:
-            self.db_conn = psycopg2.connect(settings.database_url)
-        return self.db_conn
-    
-    def _is_financial(self, data: Dict[str, Any]) -> bool:
-        title = (data.get('title') or '').lower()
-        description = (data.get('description') or '').lower()
-        category = (data.get('category') or '').lower()
-        text_to_check = f"{title} {description} {category}"
-        return any(keyword in text_to_check for keyword in self.financial_keywords)
-
-    def _is_crypto(self, data: Dict[str, Any]) -> bool:
-        title = (data.get('title') or '').lower()
-        description = (data.get('description') or '').lower()
-        category = (data.get('category') or '').lower()
-        text_to_check = f"{title} {description} {category}"
-        return any(keyword in text_to_check for keyword in self.crypto_keywords)
-
-    def _is_big_event(self, data: Dict[str, Any]) -> bool:
-        title = (data.get('title') or '').lower()
-        description = (data.get('description') or '').lower()
-        category = (data.get('category') or '').lower()
-        text_to_check = f"{title} {description} {category}"
-        return any(keyword in text_to_check for keyword in self.big_event_keywords)
-    
-    def _is_excluded(self, data: Dict[str, Any]) -> bool:
-        title = (data.get('title') or '').lower()
-        description = (data.get('description') or '').lower()
-        category = (data.get('category') or '').lower()
-        text_to_check = f"{title} {description} {category}"
-        return any(keyword in text_to_check for keyword in self.exclude_keywords)
-    
-    def _is_us_crypto_fed_only(self, data: Dict[str, Any]) -> bool:
-        title = (data.get('title') or '').lower()
-        description = (data.get('description') or '').lower()
-        category = (data.get('category') or '').lower()
-        text_to_check = f"{title} {description} {category}"
         
-        us_keywords = [
+        self.us_keywords = [
             'trump', 'donald trump', 'presidential nominee', 'presidential election winner',
             'presidential election', 'us presidential', 'us election', 'american presidential',
             'white house', 'us congress', 'us senate', 'us house', 'republican presidential',
@@ -152,18 +303,14 @@ class PolymarketClient:
             'us recession', 'us economy', 'us inflation', 'us unemployment'
         ]
         
-        fed_keywords = [
+        self.fed_keywords = [
             'fed', 'federal reserve', 'fomc', 'powell', 'jerome powell',
             'fed chair', 'fed governor', 'monetary policy',
             'rate cut', 'rate increase', 'interest rate',
             'fed decision', 'fomc meeting', 'fed meeting'
         ]
         
-        crypto_keywords = [
-            'bitcoin', 'btc', 'ethereum', 'eth', 'crypto', 'cryptocurrency'
-        ]
-        
-        war_keywords = [
+        self.war_keywords = [
             'ukraine', 'russia', 'putin', 'zelensky', 'nato',
             'israel', 'palestine', 'gaza', 'lebanon', 'hezbollah',
             'china', 'taiwan', 'north korea', 'iran', 'syria',
@@ -172,88 +319,264 @@ class PolymarketClient:
             'war', 'conflict', 'peace', 'treaty', 'agreement', 'ceasefire'
         ]
         
-        is_us = any(keyword in text_to_check for keyword in us_keywords)
-        is_fed = any(keyword in text_to_check for keyword in fed_keywords)
-        is_crypto = any(keyword in text_to_check for keyword in crypto_keywords)
-        is_war = any(keyword in text_to_check for keyword in war_keywords)
+        self.keyword_sets = {
+            'financial': self.financial_keywords,
+            'crypto': self.crypto_keywords,
+            'big_event': self.big_event_keywords,
+            'excluded': self.exclude_keywords,
+            'us': self.us_keywords,
+            'fed': self.fed_keywords,
+            'war': self.war_keywords
+        }
+        self.filter_profiles = self.load_filter_profiles(settings.filter_profiles_file)
+        self.keyword_patterns = self.compile_keyword_sets()
+        self.classification_cache = None
+        self.state_store = StateStore()
+        self.views_version: Optional[int] = None
+    
+    @property
+    def client(self):
+        if self._client is None:
+            from transport import ResilientTransport
+            self._client = ResilientTransport(
+                timeouts={
+                    'events': settings.http_events_timeout,
+                    'markets': settings.http_markets_timeout
+                },
+                max_retries=settings.http_max_retries,
+                backoff_base=settings.http_backoff_base,
+                backoff_max=settings.http_backoff_max,
+                failure_threshold=settings.http_breaker_failures,
+                reset_timeout=settings.http_breaker_reset_seconds,
+                hedge_endpoints={'markets'},
+                hedge_percentile=settings.http_hedge_percentile,
+                hedge_min_samples=settings.http_hedge_min_samples,
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+                http2=settings.http2
+            )
+        return self._client
+    
+    async def close(self):
+        if self._client:
+            await self._client.aclose()
+        if self.classification_cache:
+            self.classification_cache.close()
+        if self.db_conn:
+            self.db_conn.close()
+    
+    def get_db_connection(self):
+        if not self.db_conn or self.db_conn.closed:
+            self.db_conn = connect_database(self.query_tracer)
+        return self.db_conn
+    
+    def recover_db_connection(self):
+        # After a failed cycle the connection may sit in an aborted transaction or be gone entirely:
+        # roll back to reuse it, or close it so get_db_connection reconnects. The state cache may
+        # have missed a write-through, so it reloads on the next cycle either way.
+        self.state_store.invalidate()
+        if not self.db_conn or self.db_conn.closed:
+            return
+        try:
+            self.db_conn.rollback()
+        except psycopg2.Error as e:
+            logger.warning(f"Rollback failed, reconnecting on next use: {e!r}")
+            self.db_conn.close()
+    
+    def _is_us_crypto_fed_only(self, data: Dict[str, Any]) -> bool:
+        title = (data.get('title') or '').lower()
+        description = (data.get('description') or '').lower()
+        category = (data.get('category') or '').lower()
+        text_to_check = f"{title} {description} {category}"
+        
+        is_us = any(keyword in text_to_check for keyword in self.us_keywords)
+        is_fed = any(keyword in text_to_check for keyword in self.fed_keywords)
+        is_crypto = any(keyword in text_to_check for keyword in self.crypto_keywords)
+        is_war = any(keyword in text_to_check for keyword in self.war_keywords)
         
         return is_us or is_fed or is_crypto or is_war
     
     async def fetch_events(self, limit: int = 500) -> List[Dict[str, Any]]:
+        try:
+            with stage(self.profiler, 'fetch_http'):
+                response = await self.client.get(
+                    f"{settings.polymarket_api_base_url}/events",
+                    endpoint='events',
+                    params={
+                        'limit': limit,
+                        'closed': False,
+                        'order': 'volume',
+                        'ascending': False
+                    }
+                )
+            with stage(self.profiler, 'parse_json'):
+                from gamma_models import parse_events
+                return parse_events(response.content)
+        except http_errors() as e:
+            logger.error(f"Error fetching events: {e!r}")
+            raise
+    
+    async def is_closed_upstream(self, kind: str, item_id: Any) -> Optional[bool]:
         try:
             response = await self.client.get(
-                f"{settings.polymarket_api_base_url}/events",
-                params={
-                    'limit': limit,
-                    'closed': False,
-                    'order': 'volume',
-                    'ascending': False
-                }
+                f"{settings.polymarket_api_base_url}/{kind}/{item_id}",
+                endpoint=kind
             )
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f"Error fetching events: {e}")
-            return []
+            data = response.json()
+        except http_errors() as e:
+            if getattr(getattr(e, 'response', None), 'status_code', None) == 404:
+                return True
+            logger.warning(f"Could not confirm status of {kind} {item_id}: {e!r}")
+            return None
+        
+        return bool(data.get('closed') or data.get('archived') or data.get('active') is False)
     
     async def fetch_market_details(self, market_id: str) -> Optional[Dict[str, Any]]:
         try:
             response = await self.client.get(
-                f"{settings.polymarket_api_base_url}/markets/{market_id}"
+                f"{settings.polymarket_api_base_url}/markets/{market_id}",
+                endpoint='markets'
             )
-            response.raise_for_status()
             return response.json()
-        except Exception as e:
-            logger.debug(f"Error fetching market {market_id} details: {e}")
+        except http_errors() as e:
+            logger.warning(f"Error fetching market {market_id} details: {e!r}")
             return None
     
-    def classify_events(self, events_data: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-        classified = {
-            'financial': [],
-            'crypto': [],
-            'big_events': [],
-            'high_volume': [],
-            'all': []
+    def load_filter_profiles(self, filename: str = '') -> List[Dict[str, Any]]:
+        profiles = {DEFAULT_FILTER_PROFILE['name']: dict(DEFAULT_FILTER_PROFILE)}
+        
+        if filename:
+            with open(filename, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            for name, keywords in (config.get('keyword_sets') or {}).items():
+                keywords = [keyword.lower() for keyword in keywords or [] if keyword]
+                # An empty set compiles to a pattern that matches every event
+                if not keywords:
+                    raise ValueError(f"Keyword set {name!r} in {filename} has no keywords")
+                self.keyword_sets[name] = keywords
+            for profile in config.get('profiles') or []:
+                profiles[profile['name']] = {**DEFAULT_FILTER_PROFILE, 'include_any': [], 'exclude': [], **profile}
+        
+        for profile in profiles.values():
+            unknown = [name for name in profile['include_any'] + profile['exclude'] if name not in self.keyword_sets]
+            if unknown:
+                raise ValueError(f"Filter profile {profile['name']!r} references unknown keyword sets {unknown}")
+        
+        return list(profiles.values())
+    
+    def compile_keyword_sets(self) -> Dict[str, Any]:
+        return {
+            name: re.compile('|'.join(re.escape(keyword) for keyword in sorted(set(keywords), key=len, reverse=True)))
+            for name, keywords in self.keyword_sets.items()
         }
+    
+    def event_text(self, data: Dict[str, Any]) -> str:
+        title = (data.get('title') or '').lower()
+        description = (data.get('description') or '').lower()
+        category = (data.get('category') or '').lower()
+        return f"{title} {description} {category}"
+    
+    def profiles_for(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        names = set(event.get('profiles') or [DEFAULT_FILTER_PROFILE['name']])
+        return [profile for profile in self.filter_profiles if profile['name'] in names]
+    
+    def get_classification_cache(self):
+        if self.classification_cache is None and settings.classification_cache_file:
+            from classification_cache import ClassificationCache, keyword_set_version
+            self.classification_cache = ClassificationCache(
+                settings.data_path(settings.classification_cache_file),
+                keyword_set_version(self.keyword_sets),
+                settings.classification_cache_size
+            )
+        return self.classification_cache
+    
+    def keyword_matches(self, events: List[Dict[str, Any]]) -> List[Dict[str, bool]]:
+        cache = self.get_classification_cache()
+        if cache is None:
+            return [
+                {name: pattern.search(self.event_text(event)) is not None for name, pattern in self.keyword_patterns.items()}
+                for event in events
+            ]
+        
+        keys = [cache.key(event) for event in events]
+        cached = cache.get_many(keys, self.keyword_patterns)
+        results = []
+        for event, key in zip(events, keys):
+            matches = cached.get(key)
+            if matches is None:
+                text = self.event_text(event)
+                matches = {name: pattern.search(text) is not None for name, pattern in self.keyword_patterns.items()}
+                cached[key] = matches
+                cache.put(key, matches)
+                cache.misses += 1
+            else:
+                cache.hits += 1
+            results.append(matches)
+        
+        cache.flush()
+        logger.debug(f"Classification cache: {cache.hits} hits, {cache.misses} misses")
+        return results
+    
+    def classify_profiles(self, events_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        results = {
+            profile['name']: {'financial': [], 'crypto': [], 'big_events': [], 'high_volume': [], 'all': []}
+            for profile in self.filter_profiles
+        }
+        min_event_volume = min(profile['min_event_volume'] for profile in self.filter_profiles)
         
+        candidates = []
         for event in events_data:
-            if self._is_excluded(event):
-                continue
-                    
             if not event.get('active', True):
                 continue
-                    
-            if not event.get('volume') or event['volume'] < 5000000:
-                continue
             
-            if not self._is_us_crypto_fed_only(event):
-                continue
-                    
-            classified['all'].append(event)
-            
-            event['is_financial'] = self._is_financial(event)
-            event['is_crypto'] = self._is_crypto(event)
-            event['is_big_event'] = self._is_big_event(event)
-            event['is_excluded'] = False
-            
-            if event['is_financial']:
-                classified['financial'].append(event)
+            volume = event.get('volume') or 0
+            if volume and volume >= min_event_volume:
+                candidates.append((event, volume))
+        
+        matches_by_event = self.keyword_matches([event for event, _ in candidates])
+        
+        for (event, volume), matches in zip(candidates, matches_by_event):
+            tags = []
+            for profile in self.filter_profiles:
+                if not volume or volume < profile['min_event_volume']:
+                    continue
+                if any(matches[name] for name in profile['exclude']):
+                    continue
+                if profile['include_any'] and not any(matches[name] for name in profile['include_any']):
+                    continue
+                tags.append(profile['name'])
             
-            if event['is_crypto']:
-                classified['crypto'].append(event)
+            if not tags:
+                continue
             
-            if event['is_big_event']:
-                classified['big_events'].append(event)
+            event['is_financial'] = matches['financial']
+            event['is_crypto'] = matches['crypto']
+            event['is_big_event'] = matches['big_event']
+            event['is_excluded'] = matches['excluded']
+            event['profiles'] = tags
             
-            classified['high_volume'].append(event)
+            for name in tags:
+                classified = results[name]
+                classified['all'].append(event)
+                if event['is_financial']:
+                    classified['financial'].append(event)
+                if event['is_crypto']:
+                    classified['crypto'].append(event)
+                if event['is_big_event']:
+                    classified['big_events'].append(event)
+                classified['high_volume'].append(event)
         
-        return classified
+        return results
+    
+    def classify_events(self, events_data: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        return self.classify_profiles(events_data)[DEFAULT_FILTER_PROFILE['name']]
 
-    def clean_event_data(self, event: Dict[str, Any]) -> Dict[str, Any]:
+    def clean_event_data(self, event: Dict[str, Any], profiles: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         essential_event_fields = {
             'id', 'title', 'description', 'endDate', 'active',
             'liquidity', 'volume', 'is_financial', 'is_crypto', 'is_big_event', 'is_excluded',
-            'volume24hr', 'liquidityClob', 'resolutionSource'
+            'volume24hr', 'liquidityClob', 'resolutionSource', 'profiles'
         }
         
         cleaned_event = {k: v for k, v in event.items() if k in essential_event_fields}
@@ -264,16 +587,14 @@ class PolymarketClient:
             total_liquidity = 0
             
             for market in event['markets']:
-                cleaned_market = self.clean_market_data(market)
+                cleaned_market = self.clean_market_data(market, profiles)
                 if cleaned_market is None:
                     continue
                         
                 cleaned_markets.append(cleaned_market)
                 
-                if cleaned_market.get('volume'):
-                    total_volume += float(cleaned_market['volume'])
-                if cleaned_market.get('liquidity'):
-                    total_liquidity += float(cleaned_market['liquidity'])
+                total_volume += cleaned_market.get('volume') or 0
+                total_liquidity += cleaned_market.get('liquidity') or 0
             
             cleaned_event['markets'] = cleaned_markets
             
@@ -284,23 +605,14 @@ class PolymarketClient:
         
         return cleaned_event
     
-    def clean_market_data(self, market: Dict[str, Any]) -> Dict[str, Any]:
-        volume24hr = market.get('volume24hr', 0)
-        try:
-            volume24hr = float(volume24hr) if volume24hr else 0
-        except (ValueError, TypeError):
-            volume24hr = 0
-        
-        if volume24hr < 5000000:
-            return None
-        
-        market_volume = market.get('volume', 0)
-        try:
-            market_volume = float(market_volume) if market_volume else 0
-        except (ValueError, TypeError):
-            market_volume = 0
+    def clean_market_data(self, market: Dict[str, Any], profiles: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        volume24hr = market.get('volume24hr') or 0
+        market_volume = market.get('volume') or 0
         
-        if market_volume < 100:
+        if not any(
+            volume24hr >= profile['min_market_volume24hr'] and market_volume >= profile['min_market_volume']
+            for profile in profiles or [DEFAULT_FILTER_PROFILE]
+        ):
             return None
         
         essential_market_fields = {
@@ -312,15 +624,15 @@ class PolymarketClient:
         cleaned_market = {k: v for k, v in market.items() if k in essential_market_fields}
         return cleaned_market
 
-    def save_to_json(self, data, filename: str):
+    def save_to_json(self, data, filename: str, profiles: Optional[List[Dict[str, Any]]] = None):
         try:
             if isinstance(data, list):
-                cleaned_data = [self.clean_event_data(event) for event in data]
+                cleaned_data = [self.clean_event_data(event, profiles) for event in data]
             else:
                 cleaned_data = data.copy()
                 for category in ['financial_events', 'crypto_events', 'politics_war_events', 'high_volume_events', 'all_events']:
                     if category in cleaned_data:
-                        cleaned_data[category] = [self.clean_event_data(event) for event in cleaned_data[category]]
+                        cleaned_data[category] = [self.clean_event_data(event, profiles) for event in cleaned_data[category]]
             
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(cleaned_data, f, indent=2, default=str, ensure_ascii=False)
@@ -329,56 +641,101 @@ class PolymarketClient:
             logger.error(f"Error saving to {filename}: {e}")
     
     def fetch_stored_events(self) -> List[Dict[str, Any]]:
+        return list(self.iter_stored_events())
+    
+    def iter_stored_events(self, itersize: Optional[int] = None, event_ids: Optional[List[int]] = None) -> Iterator[Dict[str, Any]]:
+        for batch in self.iter_stored_event_batches(itersize, event_ids):
+            yield from batch
+
+    def iter_stored_event_batches(self, itersize: Optional[int] = None, event_ids: Optional[List[int]] = None) -> Iterator[List[Dict[str, Any]]]:
+        # Each page is read and committed before it is yielded, so callers can await HTTP
+        # between events without holding a cursor or an open transaction
+        itersize = itersize or settings.stored_events_itersize
+        id_filter = " AND e.id = ANY(%(event_ids)s)" if event_ids is not None else ""
+        params = {'event_ids': [int(event_id) for event_id in event_ids or []], 'after': None, 'limit': itersize}
         conn = self.get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute("""
-            SELECT e.*, 
-                   json_agg(
-                       json_build_object(
-                           'id', m.id,
-                           'question', m.question,
-                           'volume', m.volume,
-                           'volume24hr', m.volume24hr,
-                           'liquidity', m.liquidity,
-                           'outcomes', m.outcomes,
-                           'outcome_prices', m.outcome_prices,
-                           'active', m.active
-                       )
-                   ) FILTER (WHERE m.id IS NOT NULL) as markets
-            FROM events e
-            LEFT JOIN markets m ON e.id = m.event_id
-            WHERE e.active = true
-            GROUP BY e.id
-            ORDER BY e.volume DESC
-        """)
-        
-        events = []
-        for row in cursor.fetchall():
-            event_dict = dict(row)
-            if event_dict['markets']:
-                event_dict['markets'] = [dict(m) for m in event_dict['markets']]
-            else:
-                event_dict['markets'] = []
-            events.append(event_dict)
-        
-        cursor.close()
-        return events
+
+        while True:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    SELECT e.*
+                    FROM events e
+                    WHERE e.active = true
+                      AND (%(after)s::bigint IS NULL OR e.id > %(after)s)""" + id_filter + """
+                    ORDER BY e.id
+                    LIMIT %(limit)s
+                """, params)
+                columns = [column[0] for column in cursor.description]
+                events = [dict(zip(columns, row), markets=[]) for row in cursor.fetchall()]
+
+                if events:
+                    cursor.execute("""
+                        SELECT m.id, m.event_id, m.question, m.volume, m.volume24hr,
+                               m.liquidity, m.outcomes, m.outcome_prices, m.active,
+                               (
+                                   SELECT array_agg(p.price ORDER BY p.outcome_index)
+                                   FROM market_outcome_prices p
+                                   WHERE p.market_id = m.id
+                               ) AS prices
+                        FROM markets m
+                        WHERE m.event_id = ANY(%s)
+                        ORDER BY m.event_id, m.id
+                    """, ([event['id'] for event in events],))
+                    columns = [column[0] for column in cursor.description]
+                    by_id = {event['id']: event for event in events}
+                    for row in cursor.fetchall():
+                        market = dict(zip(columns, row))
+                        by_id[market['event_id']]['markets'].append(market)
+            finally:
+                cursor.close()
+                conn.commit()
+
+            if events:
+                yield events
+            if len(events) < itersize:
+                return
+            params['after'] = events[-1]['id']
+    
+    def parse_json_list(self, value: Any, field: str = 'value') -> List[Any]:
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError as e:
+                logger.warning(f"Unparseable {field} payload {value[:80]!r}: {e}")
+                return []
+        return value if isinstance(value, list) else []
+    
+    def parse_price_array(self, prices_data: Any) -> List[float]:
+        prices = []
+        for price in self.parse_json_list(prices_data, 'outcomePrices'):
+            try:
+                prices.append(float(price))
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid outcome price {price!r}")
+                return []
+        return prices
     
     def parse_outcome_prices(self, prices_data: Any) -> Dict[str, float]:
         if isinstance(prices_data, dict):
-            return {k: float(v) for k, v in prices_data.items()}
-        elif isinstance(prices_data, str):
             try:
-                parsed = json.loads(prices_data)
-                if isinstance(parsed, list):
-                    return {str(i): float(p) for i, p in enumerate(parsed)}
-                return {k: float(v) for k, v in parsed.items()}
-            except:
+                return {k: float(v) for k, v in prices_data.items()}
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Invalid outcome prices {prices_data!r}: {e}")
                 return {}
-        elif isinstance(prices_data, list):
-            return {str(i): float(p) for i, p in enumerate(prices_data)}
-        return {}
+        return {str(i): p for i, p in enumerate(self.parse_price_array(prices_data))}
+    
+    def attach_price_arrays(self, events: List[Dict[str, Any]]):
+        for event in events:
+            for market in event.get('markets') or []:
+                if 'prices' not in market:
+                    market['prices'] = self.parse_price_array(market.get('outcomePrices'))
+    
+    def market_prices(self, market: Dict[str, Any], raw_field: str) -> Dict[str, float]:
+        prices = market.get('prices')
+        if prices is None:
+            return self.parse_outcome_prices(market.get(raw_field))
+        return {str(i): float(p) for i, p in enumerate(prices)}
     
     def calculate_price_difference(self, old_prices: Dict[str, float], new_prices: Dict[str, float]) -> Dict[str, float]:
         differences = {}
@@ -393,6 +750,14 @@ class PolymarketClient:
         
         return differences
     
+    def changed_metric(self, metric: str, stored: Any, fresh: Optional[float], threshold: float) -> Optional[Dict[str, float]]:
+        # Fresh amounts are already floats or None from gamma_models; stored ones are DECIMAL columns.
+        # A value missing on either side is no change rather than a move from or to zero.
+        if stored is None or fresh is None:
+            return None
+        change = metric_change(metric, float(stored), fresh)
+        return change if abs(change['difference']) >= threshold else None
+    
     async def compare_market(self, stored_market: Dict[str, Any], fresh_market: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         differences = {}
         has_changes = False
@@ -401,44 +766,14 @@ class PolymarketClient:
         if str(market_id) != str(fresh_market.get('id')):
             return None
         
-        stored_volume = float(stored_market.get('volume', 0) or 0)
-        fresh_volume = float(fresh_market.get('volume', 0) or 0)
-        volume_diff = fresh_volume - stored_volume
-        if abs(volume_diff) >= 100:
-            differences['volume'] = {
-                'old': stored_volume,
-                'new': fresh_volume,
-                'difference': volume_diff,
-                'percent_change': (volume_diff / stored_volume * 100) if stored_volume > 0 else 0
-            }
-            has_changes = True
-        
-        stored_volume24hr = float(stored_market.get('volume24hr', 0) or 0)
-        fresh_volume24hr = float(fresh_market.get('volume24hr', 0) or 0)
-        volume24hr_diff = fresh_volume24hr - stored_volume24hr
-        if abs(volume24hr_diff) >= 100:
-            differences['volume24hr'] = {
-                'old': stored_volume24hr,
-                'new': fresh_volume24hr,
-                'difference': volume24hr_diff,
-                'percent_change': (volume24hr_diff / stored_volume24hr * 100) if stored_volume24hr > 0 else 0
-            }
-            has_changes = True
-        
-        stored_liquidity = float(stored_market.get('liquidity', 0) or 0)
-        fresh_liquidity = float(fresh_market.get('liquidity', 0) or 0)
-        liquidity_diff = fresh_liquidity - stored_liquidity
-        if abs(liquidity_diff) >= 100:
-            differences['liquidity'] = {
-                'old': stored_liquidity,
-                'new': fresh_liquidity,
-                'difference': liquidity_diff,
-                'percent_change': (liquidity_diff / stored_liquidity * 100) if stored_liquidity > 0 else 0
-            }
-            has_changes = True
+        for metric in ('volume', 'volume24hr', 'liquidity'):
+            change = self.changed_metric(metric, stored_market.get(metric), fresh_market.get(metric), 100)
+            if change:
+                differences[metric] = change
+                has_changes = True
         
-        stored_prices = self.parse_outcome_prices(stored_market.get('outcome_prices'))
-        fresh_prices = self.parse_outcome_prices(fresh_market.get('outcomePrices'))
+        stored_prices = self.market_prices(stored_market, 'outcome_prices')
+        fresh_prices = self.market_prices(fresh_market, 'outcomePrices')
         price_diffs = self.calculate_price_difference(stored_prices, fresh_prices)
         if price_diffs:
             differences['prices'] = {
@@ -511,53 +846,12 @@ class PolymarketClient:
         if str(event_id) != str(fresh_event.get('id')):
             return None
         
-        stored_volume = float(stored_event.get('volume', 0) or 0)
-        fresh_volume = float(fresh_event.get('volume', 0) or 0)
-        volume_diff = fresh_volume - stored_volume
-        if abs(volume_diff) >= 1000:
-            differences['volume'] = {
-                'old': stored_volume,
-                'new': fresh_volume,
-                'difference': volume_diff,
-                'percent_change': (volume_diff / stored_volume * 100) if stored_volume > 0 else 0
-            }
-            has_changes = True
-        
-        stored_volume24hr = float(stored_event.get('volume24hr', 0) or 0)
-        fresh_volume24hr = float(fresh_event.get('volume24hr', 0) or 0)
-        volume24hr_diff = fresh_volume24hr - stored_volume24hr
-        if abs(volume24hr_diff) >= 1000:
-            differences['volume24hr'] = {
-                'old': stored_volume24hr,
-                'new': fresh_volume24hr,
-                'difference': volume24hr_diff,
-                'percent_change': (volume24hr_diff / stored_volume24hr * 100) if stored_volume24hr > 0 else 0
-            }
-            has_changes = True
-        
-        stored_liquidity = float(stored_event.get('liquidity', 0) or 0)
-        fresh_liquidity = float(fresh_event.get('liquidity', 0) or 0)
-        liquidity_diff = fresh_liquidity - stored_liquidity
-        if abs(liquidity_diff) >= 1000:
-            differences['liquidity'] = {
-                'old': stored_liquidity,
-                'new': fresh_liquidity,
-                'difference': liquidity_diff,
-                'percent_change': (liquidity_diff / stored_liquidity * 100) if stored_liquidity > 0 else 0
-            }
-            has_changes = True
-        
-        stored_liquidity_clob = float(stored_event.get('liquidity_clob', 0) or 0)
-        fresh_liquidity_clob = float(fresh_event.get('liquidityClob', 0) or 0)
-        liquidity_clob_diff = fresh_liquidity_clob - stored_liquidity_clob
-        if abs(liquidity_clob_diff) >= 1000:
-            differences['liquidity_clob'] = {
-                'old': stored_liquidity_clob,
-                'new': fresh_liquidity_clob,
-                'difference': liquidity_clob_diff,
-                'percent_change': (liquidity_clob_diff / stored_liquidity_clob * 100) if stored_liquidity_clob > 0 else 0
-            }
-            has_changes = True
+        for metric, fresh_field in (('volume', 'volume'), ('volume24hr', 'volume24hr'),
+                                    ('liquidity', 'liquidity'), ('liquidity_clob', 'liquidityClob')):
+            change = self.changed_metric(metric, stored_event.get(metric), fresh_event.get(fresh_field), 1000)
+            if change:
+                differences[metric] = change
+                has_changes = True
         
         market_differences = []
         stored_markets = {str(m.get('id')): m for m in stored_event.get('markets', [])}
@@ -582,41 +876,710 @@ class PolymarketClient:
             'compared_at': datetime.now(timezone.utc).isoformat()
         }
     
-    def store_differences(self, event_differences: List[Dict[str, Any]]):
+    def store_differences(self, event_differences: List[Dict[str, Any]], lease: Optional[tuple] = None) -> int:
         conn = self.get_db_connection()
         cursor = conn.cursor()
         
+        if lease is not None:
+            # A worker whose lease expired must not store diffs for jobs another worker has reclaimed;
+            # the check and the job completion commit together with the diffs
+            cycle_id, worker_id, event_ids = lease
+            held = set(self.finish_compare_jobs(cycle_id, worker_id, event_ids, cursor=cursor))
+            if len(held) < len(event_ids):
+                logger.warning(f"Worker {worker_id} lost the lease on {len(event_ids) - len(held)} events in cycle {cycle_id}, discarding their differences")
+            event_differences = [diff for diff in event_differences if int(diff['event_id']) in held]
+        
+        event_rows = []
         for diff in event_differences:
-            event_id = diff['event_id']
-            differences_json = json.dumps(diff['differences'])
             compared_at = datetime.fromisoformat(diff['compared_at'].replace('Z', '+00:00'))
-            
-            cursor.execute("""
-                INSERT INTO data_differences (
-                    event_id, differences_data, compared_at
-                ) VALUES (%s, %s, %s)
+            event_rows.append((diff['event_id'], compared_at) + encode_event_diff(diff['differences']))
+        
+        difference_ids = {}
+        if event_rows:
+            returned = execute_values(cursor, f"""
+                INSERT INTO data_differences (event_id, compared_at, {', '.join(EVENT_DIFF_COLUMNS)})
+                VALUES %s
                 ON CONFLICT (event_id, compared_at) DO UPDATE SET
-                    differences_data = EXCLUDED.differences_data,
+                    {', '.join(f'{column} = EXCLUDED.{column}' for column in EVENT_DIFF_COLUMNS)},
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING id, event_id
+            """, event_rows, fetch=True)
+            difference_ids = {str(event_id): difference_id for difference_id, event_id in returned}
+        
+        # Event rows only count their market changes; each market diff is stored once and points at its event row
+        market_rows = []
+        for diff in event_differences:
+            compared_at = datetime.fromisoformat(diff['compared_at'].replace('Z', '+00:00'))
+            for market_diff in diff['differences'].get('markets') or []:
+                market_rows.append(
+                    (market_diff['market_id'], diff['event_id'], difference_ids[str(diff['event_id'])], compared_at)
+                    + encode_market_diff(market_diff['differences'])
+                )
+        
+        if market_rows:
+            execute_values(cursor, f"""
+                INSERT INTO market_differences (market_id, event_id, data_difference_id, compared_at, {', '.join(MARKET_DIFF_COLUMNS)})
+                VALUES %s
+                ON CONFLICT (market_id, compared_at) DO UPDATE SET
+                    data_difference_id = EXCLUDED.data_difference_id,
+                    {', '.join(f'{column} = EXCLUDED.{column}' for column in MARKET_DIFF_COLUMNS)},
                     updated_at = CURRENT_TIMESTAMP
-            """, (event_id, differences_json, compared_at))
+            """, market_rows)
+        
+        self.record_movers(cursor, event_differences)
+        
+        conn.commit()
+        cursor.close()
+        return len(event_differences)
+    
+    def parse_window(self, window: str) -> timedelta:
+        window = window.strip().lower()
+        if len(window) < 2 or window[-1] not in WINDOW_UNITS or not window[:-1].isdigit():
+            raise ValueError(f"Invalid window {window!r}, expected e.g. 15m, 1h or 7d")
+        return timedelta(**{WINDOW_UNITS[window[-1]]: int(window[:-1])})
+    
+    def mover_windows(self) -> Dict[str, timedelta]:
+        return {w.strip(): self.parse_window(w) for w in settings.movers_windows.split(',') if w.strip()}
+    
+    def mover_entries(self, market_diff: Dict[str, Any]) -> List[tuple]:
+        entries = []
+        differences = market_diff.get('differences') or {}
+        
+        for metric in ('volume', 'volume24hr', 'liquidity'):
+            change = differences.get(metric)
+            if change:
+                entries.append((metric, change['difference'], change.get('percent_change') or 0))
+        
+        prices = differences.get('prices')
+        if prices and prices.get('differences'):
+            key, diff = max(prices['differences'].items(), key=lambda item: abs(item[1]))
+            old_price = (prices.get('old') or {}).get(key) or 0
+            entries.append(('price', diff, (diff / old_price * 100) if old_price > 0 else 0))
+        
+        return entries
+    
+    def record_movers(self, cursor, event_differences: List[Dict[str, Any]]):
+        rows = []
+        for diff in event_differences:
+            compared_at = datetime.fromisoformat(diff['compared_at'].replace('Z', '+00:00'))
+            for market_diff in diff['differences'].get('markets') or []:
+                for metric, change, percent_change in self.mover_entries(market_diff):
+                    rows.append((market_diff['market_id'], diff['event_id'], metric, change, percent_change, compared_at))
+        
+        if rows:
+            execute_values(cursor, """
+                INSERT INTO market_movers (market_id, event_id, metric, change, percent_change, observed_at)
+                VALUES %s
+                ON CONFLICT (market_id, metric, observed_at) DO UPDATE SET
+                    change = EXCLUDED.change,
+                    percent_change = EXCLUDED.percent_change
+            """, rows)
+        
+        cursor.execute(
+            "DELETE FROM market_movers WHERE observed_at < NOW() - %s",
+            (self.mover_retention(),)
+        )
+    
+    def mover_retention(self) -> timedelta:
+        return max(self.mover_windows().values(), default=timedelta(days=1))
+    
+    def top_movers(self, window: str = '1h', metric: str = 'volume', rank_by: str = 'abs',
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        if metric not in MOVER_METRICS:
+            raise ValueError(f"Unknown mover metric {metric!r}, expected one of {list(MOVER_METRICS)}")
+        if rank_by not in ('abs', 'pct'):
+            raise ValueError(f"Unknown rank {rank_by!r}, expected 'abs' or 'pct'")
+        # Rows older than the longest configured window are pruned, so a wider window would silently undercount
+        span = self.parse_window(window)
+        if span > self.mover_retention():
+            raise ValueError(f"Window {window!r} exceeds the movers retention; add it to MOVERS_WINDOWS (currently {settings.movers_windows!r})")
+        
+        rank_column = 'change' if rank_by == 'abs' else 'percent_change'
+        conn = self.get_db_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(f"""
+            SELECT t.market_id, t.event_id, e.title AS event_title, m.question AS market_question,
+                   t.change, t.percent_change, t.observed_at
+            FROM (
+                SELECT DISTINCT ON (market_id)
+                       market_id, event_id, change, percent_change, observed_at
+                FROM market_movers
+                WHERE metric = %s AND observed_at >= NOW() - %s
+                ORDER BY market_id, ABS({rank_column}) DESC
+            ) t
+            JOIN events e ON e.id = t.event_id
+            JOIN markets m ON m.id = t.market_id
+            ORDER BY ABS(t.{rank_column}) DESC
+            LIMIT %s
+        """, (metric, span, limit or settings.movers_top_k))
+        
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.commit()
+        cursor.close()
+        return rows
+    
+    def store_events(self, events: List[Dict[str, Any]]):
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        prior_version = self.state_version(cursor, lock=True)
+        
+        event_rows = []
+        market_rows = []
+        price_rows = []
+        stored_events = []
+        
+        for event in events:
+            stored_event = {
+                'id': int(event['id']), 'title': event.get('title') or '', 'description': event.get('description'),
+                'active': event.get('active', True),
+                'volume': self.as_stored_decimal(event.get('volume')),
+                'volume24hr': self.as_stored_decimal(event.get('volume24hr')),
+                'liquidity': self.as_stored_decimal(event.get('liquidity')),
+                'liquidity_clob': self.as_stored_decimal(event.get('liquidityClob')),
+                'markets': []
+            }
+            stored_events.append(stored_event)
             
-            if 'markets' in diff['differences']:
-                for market_diff in diff['differences']['markets']:
-                    market_id = market_diff['market_id']
-                    market_diff_json = json.dumps(market_diff['differences'])
-                    
-                    cursor.execute("""
-                        INSERT INTO market_differences (
-                            market_id, event_id, differences_data, compared_at
-                        ) VALUES (%s, %s, %s, %s)
-                        ON CONFLICT (market_id, compared_at) DO UPDATE SET
-                            differences_data = EXCLUDED.differences_data,
-                            updated_at = CURRENT_TIMESTAMP
-                    """, (market_id, event_id, market_diff_json, compared_at))
+            event_rows.append((
+                event['id'], event.get('title') or '', event.get('description'),
+                event.get('endDate'), event.get('active', True),
+                event.get('liquidity'), event.get('volume'), event.get('volume24hr'),
+                event.get('liquidityClob'), event.get('resolutionSource'),
+                event.get('is_financial', False), event.get('is_crypto', False),
+                event.get('is_big_event', False), event.get('is_excluded', False),
+                event.get('profiles') or [DEFAULT_FILTER_PROFILE['name']]
+            ))
+            
+            for market in event.get('markets') or []:
+                outcomes = self.parse_json_list(market.get('outcomes'), 'outcomes')
+                prices = market['prices'] if 'prices' in market else self.parse_price_array(market.get('outcomePrices'))
+                
+                stored_event['markets'].append({
+                    'id': int(market['id']), 'event_id': int(event['id']), 'question': market.get('question') or '',
+                    'volume': self.as_stored_decimal(market.get('volume')),
+                    'volume24hr': self.as_stored_decimal(market.get('volume24hr')),
+                    'liquidity': self.as_stored_decimal(market.get('liquidity')),
+                    'outcomes': outcomes, 'outcome_prices': prices, 'prices': prices,
+                    'active': market.get('active', True)
+                })
+                
+                market_rows.append((
+                    market['id'], event['id'], market.get('question') or '',
+                    market.get('endDate'), market.get('liquidity'), market.get('volume'),
+                    market.get('volume24hr'), Json(outcomes), Json(prices),
+                    market.get('active', True), market.get('description')
+                ))
+                
+                for index, price in enumerate(prices):
+                    outcome = str(outcomes[index]) if index < len(outcomes) else None
+                    price_rows.append((market['id'], index, outcome, price))
+        
+        execute_values(cursor, """
+            INSERT INTO events (
+                id, title, description, end_date, active, liquidity, volume,
+                volume24hr, liquidity_clob, resolution_source, is_financial,
+                is_crypto, is_big_event, is_excluded, profile_tags
+            ) VALUES %s
+            ON CONFLICT (id) DO UPDATE SET
+                title = EXCLUDED.title,
+                description = EXCLUDED.description,
+                end_date = EXCLUDED.end_date,
+                active = EXCLUDED.active,
+                liquidity = EXCLUDED.liquidity,
+                volume = EXCLUDED.volume,
+                volume24hr = EXCLUDED.volume24hr,
+                liquidity_clob = EXCLUDED.liquidity_clob,
+                resolution_source = EXCLUDED.resolution_source,
+                is_financial = EXCLUDED.is_financial,
+                is_crypto = EXCLUDED.is_crypto,
+                is_big_event = EXCLUDED.is_big_event,
+                is_excluded = EXCLUDED.is_excluded,
+                profile_tags = EXCLUDED.profile_tags,
+                updated_at = CURRENT_TIMESTAMP
+        """, event_rows)
+        
+        if market_rows:
+            execute_values(cursor, """
+                INSERT INTO markets (
+                    id, event_id, question, end_date, liquidity, volume, volume24hr,
+                    outcomes, outcome_prices, active, description
+                ) VALUES %s
+                ON CONFLICT (id) DO UPDATE SET
+                    event_id = EXCLUDED.event_id,
+                    question = EXCLUDED.question,
+                    end_date = EXCLUDED.end_date,
+                    liquidity = EXCLUDED.liquidity,
+                    volume = EXCLUDED.volume,
+                    volume24hr = EXCLUDED.volume24hr,
+                    outcomes = EXCLUDED.outcomes,
+                    outcome_prices = EXCLUDED.outcome_prices,
+                    active = EXCLUDED.active,
+                    description = EXCLUDED.description,
+                    updated_at = CURRENT_TIMESTAMP
+            """, market_rows)
+            
+            cursor.execute(
+                "DELETE FROM market_outcome_prices WHERE market_id = ANY(%s)",
+                ([int(row[0]) for row in market_rows],)
+            )
         
+        if price_rows:
+            execute_values(cursor, """
+                INSERT INTO market_outcome_prices (market_id, outcome_index, outcome, price)
+                VALUES %s
+            """, price_rows)
+        
+        self.refresh_event_stats(cursor, [row[0] for row in event_rows])
+        current_version = self.state_version(cursor)
+        
+        conn.commit()
+        cursor.close()
+        self.write_through(prior_version, current_version, lambda store: store.upsert_events(stored_events))
+        logger.info(f"Stored {len(event_rows)} events, {len(market_rows)} markets, {len(price_rows)} outcome prices")
+    
+    def track_presence(self, fresh_events: List[Dict[str, Any]]):
+        fresh_event_ids = [int(e['id']) for e in fresh_events if e.get('id') is not None]
+        fresh_market_ids = [int(m['id']) for e in fresh_events for m in e.get('markets') or [] if m.get('id') is not None]
+        
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        for table, seen_ids in (('events', fresh_event_ids), ('markets', fresh_market_ids)):
+            cursor.execute(f"""
+                UPDATE {table}
+                SET missed_cycles = CASE WHEN id = ANY(%s) THEN 0 ELSE missed_cycles + 1 END,
+                    last_seen_at = CASE WHEN id = ANY(%s) THEN NOW() ELSE last_seen_at END
+                WHERE active = true
+            """, (seen_ids, seen_ids))
         conn.commit()
         cursor.close()
     
+    def lifecycle_candidates(self) -> Dict[str, List[int]]:
+        # Rows past end_date that upstream still reports open would otherwise be re-checked every cycle
+        recheck_after = timedelta(seconds=settings.lifecycle_recheck_seconds)
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT id FROM events
+            WHERE active = true
+              AND (missed_cycles >= %s OR end_date < NOW())
+              AND (last_checked_at IS NULL OR last_checked_at < NOW() - %s)
+            ORDER BY missed_cycles DESC, end_date
+            LIMIT %s
+        """, (settings.lifecycle_missed_cycles, recheck_after, settings.lifecycle_max_checks))
+        event_ids = [row[0] for row in cursor.fetchall()]
+        
+        cursor.execute("""
+            SELECT m.id FROM markets m
+            JOIN events e ON e.id = m.event_id
+            WHERE e.active = true
+              AND NOT (e.id = ANY(%s))
+              AND (m.missed_cycles >= %s OR m.end_date < NOW())
+              AND (m.last_checked_at IS NULL OR m.last_checked_at < NOW() - %s)
+            ORDER BY m.missed_cycles DESC, m.end_date
+            LIMIT %s
+        """, (event_ids, settings.lifecycle_missed_cycles, recheck_after, settings.lifecycle_max_checks))
+        market_ids = [row[0] for row in cursor.fetchall()]
+        
+        conn.commit()
+        cursor.close()
+        return {'events': event_ids, 'markets': market_ids}
+    
+    def mark_lifecycle_checked(self, table: str, ids: List[int], still_open: List[int]):
+        if not ids:
+            return
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            UPDATE {table}
+            SET last_checked_at = NOW(),
+                missed_cycles = CASE WHEN id = ANY(%s) THEN 0 ELSE missed_cycles END
+            WHERE id = ANY(%s)
+        """, (still_open, ids))
+        conn.commit()
+        cursor.close()
+    
+    def as_stored_decimal(self, value: Any) -> Optional[Decimal]:
+        if value is None:
+            return None
+        return Decimal(repr(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    
+    def state_version(self, cursor=None, lock: bool = False) -> Optional[int]:
+        own_cursor = cursor is None
+        if own_cursor:
+            cursor = self.get_db_connection().cursor()
+        
+        cursor.execute(
+            "SELECT version FROM state_versions WHERE name = 'stored_state'" + (" FOR UPDATE" if lock else "")
+        )
+        row = cursor.fetchone()
+        
+        if own_cursor:
+            cursor.connection.commit()
+            cursor.close()
+        return row[0] if row else None
+    
+    def write_through(self, prior_version: Optional[int], current_version: Optional[int], apply):
+        store = self.state_store
+        if store.warm and prior_version is not None and store.version == prior_version:
+            apply(store)
+            store.version = current_version
+        else:
+            store.invalidate()
+    
+    def stored_state(self):
+        if not settings.state_cache:
+            return self.iter_stored_events()
+        
+        store = self.state_store
+        version = self.state_version()
+        if store.warm and store.version == version and store.age() < settings.state_reconcile_seconds:
+            logger.info(f"Comparing against {len(store.events)} cached stored events (state version {version})")
+            return store.snapshot()
+        
+        logger.info("Streaming stored events from database into the state cache...")
+        store.load(self.iter_stored_events(), version)
+        return store.snapshot()
+    
+    def refresh_event_stats(self, cursor, event_ids: Optional[List[Any]] = None):
+        id_filter = "WHERE e.id = ANY(%(event_ids)s::bigint[])" if event_ids is not None else ""
+        cursor.execute(f"""
+            INSERT INTO event_market_stats (
+                event_id, market_count, total_market_volume, total_market_volume24hr, total_market_liquidity
+            )
+            SELECT e.id,
+                   COUNT(m.id),
+                   COALESCE(SUM(m.volume), 0),
+                   COALESCE(SUM(m.volume24hr), 0),
+                   COALESCE(SUM(m.liquidity), 0)
+            FROM events e
+            LEFT JOIN markets m ON m.event_id = e.id AND m.active = true
+            {id_filter}
+            GROUP BY e.id
+            ON CONFLICT (event_id) DO UPDATE SET
+                market_count = EXCLUDED.market_count,
+                total_market_volume = EXCLUDED.total_market_volume,
+                total_market_volume24hr = EXCLUDED.total_market_volume24hr,
+                total_market_liquidity = EXCLUDED.total_market_liquidity,
+                updated_at = CURRENT_TIMESTAMP
+        """, {'event_ids': [int(event_id) for event_id in event_ids or []]})
+    
+    def refresh_materialized_views(self):
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        # Read before refreshing, so a write that lands mid-refresh still triggers the next one
+        version = self.state_version(cursor)
+        for name in MATERIALIZED_VIEWS:
+            cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}")
+            conn.commit()
+        cursor.close()
+        self.views_version = version
+        logger.debug(f"Refreshed materialized views {list(MATERIALIZED_VIEWS)}")
+    
+    def archive_rows(self, kind: str, ids: List[int]) -> Dict[str, int]:
+        if not ids:
+            return {}
+        
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        prior_version = self.state_version(cursor, lock=True)
+        market_ids = ids
+        if kind == 'events':
+            cursor.execute("SELECT id FROM markets WHERE event_id = ANY(%s)", (ids,))
+            market_ids = [row[0] for row in cursor.fetchall()]
+        else:
+            cursor.execute("SELECT DISTINCT event_id FROM markets WHERE id = ANY(%s)", (ids,))
+            affected_events = [row[0] for row in cursor.fetchall()]
+        
+        moved = {}
+        for table in ARCHIVE_TABLES[kind]:
+            cursor.execute("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = %s AND column_name <> 'archived_at'
+                ORDER BY ordinal_position
+            """, (f"{table}_archive",))
+            columns = ', '.join(row[0] for row in cursor.fetchall())
+            
+            if table in ('events', 'data_differences'):
+                key, key_ids = ('id' if table == 'events' else 'event_id'), ids
+            else:
+                key, key_ids = ('id' if table == 'markets' else 'market_id'), market_ids
+            
+            cursor.execute(f"""
+                WITH moved AS (
+                    DELETE FROM {table} WHERE {key} = ANY(%s) RETURNING {columns}
+                )
+                INSERT INTO {table}_archive ({columns})
+                SELECT {columns} FROM moved
+            """, (key_ids,))
+            moved[table] = cursor.rowcount
+        
+        if kind == 'markets':
+            self.refresh_event_stats(cursor, affected_events)
+        current_version = self.state_version(cursor)
+        
+        conn.commit()
+        cursor.close()
+        self.write_through(
+            prior_version, current_version,
+            lambda store: store.remove_events(ids) if kind == 'events' else store.remove_markets(ids)
+        )
+        logger.info(f"Archived {kind}: {moved}")
+        return moved
+    
+    async def run_lifecycle(self, fresh_events: List[Dict[str, Any]]) -> int:
+        self.track_presence(fresh_events)
+        candidates = self.lifecycle_candidates()
+        archived = 0
+        
+        for kind in ('events', 'markets'):
+            ids = candidates[kind]
+            if not ids:
+                continue
+            
+            statuses = await asyncio.gather(*(self.is_closed_upstream(kind, item_id) for item_id in ids))
+            closed = [item_id for item_id, status in zip(ids, statuses) if status is True]
+            still_open = [item_id for item_id, status in zip(ids, statuses) if status is False]
+            
+            self.mark_lifecycle_checked(kind, ids, still_open)
+            self.archive_rows(kind, closed)
+            archived += len(closed)
+            logger.info(f"Lifecycle: checked {len(ids)} {kind}, archived {len(closed)}, {len(still_open)} still open")
+        
+        return archived
+    
+    def rollup_bucket(self, observed_at: datetime, resolution: str) -> datetime:
+        width = ROLLUP_RESOLUTIONS[resolution]
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        return epoch + ((observed_at - epoch) // width) * width
+    
+    def update_rollups(self, markets: List[Dict[str, Any]], observed_at: Optional[datetime] = None):
+        if not markets:
+            return
+        
+        observed_at = observed_at or datetime.now(timezone.utc)
+        metric_rows = []
+        price_rows = []
+        
+        for market in markets:
+            market_id = int(market['id'])
+            # Amounts are already floats or None from gamma_models; None stays NULL rather than a fake drop to 0
+            volume = market.get('volume')
+            volume24hr = market.get('volume24hr')
+            liquidity = market.get('liquidity')
+            prices = market['prices'] if 'prices' in market else self.parse_price_array(market.get('outcomePrices'))
+            
+            for resolution in ROLLUP_RESOLUTIONS:
+                bucket_start = self.rollup_bucket(observed_at, resolution)
+                metric_rows.append((
+                    market_id, resolution, bucket_start,
+                    volume, volume, volume,
+                    volume24hr, volume24hr, volume24hr,
+                    liquidity, liquidity, liquidity
+                ))
+                for index, price in enumerate(prices):
+                    price_rows.append((market_id, index, resolution, bucket_start, price, price, price, price))
+        
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        
+        execute_values(cursor, """
+            INSERT INTO market_rollups (
+                market_id, resolution, bucket_start,
+                volume_first, volume_last, volume_max,
+                volume24hr_first, volume24hr_last, volume24hr_max,
+                liquidity_first, liquidity_last, liquidity_max
+            ) VALUES %s
+            ON CONFLICT (market_id, resolution, bucket_start) DO UPDATE SET
+                volume_first = COALESCE(market_rollups.volume_first, EXCLUDED.volume_first),
+                volume_last = COALESCE(EXCLUDED.volume_last, market_rollups.volume_last),
+                volume_max = GREATEST(market_rollups.volume_max, EXCLUDED.volume_max),
+                volume24hr_first = COALESCE(market_rollups.volume24hr_first, EXCLUDED.volume24hr_first),
+                volume24hr_last = COALESCE(EXCLUDED.volume24hr_last, market_rollups.volume24hr_last),
+                volume24hr_max = GREATEST(market_rollups.volume24hr_max, EXCLUDED.volume24hr_max),
+                liquidity_first = COALESCE(market_rollups.liquidity_first, EXCLUDED.liquidity_first),
+                liquidity_last = COALESCE(EXCLUDED.liquidity_last, market_rollups.liquidity_last),
+                liquidity_max = GREATEST(market_rollups.liquidity_max, EXCLUDED.liquidity_max),
+                samples = market_rollups.samples + 1,
+                updated_at = CURRENT_TIMESTAMP
+        """, metric_rows)
+        
+        if price_rows:
+            execute_values(cursor, """
+                INSERT INTO market_price_rollups (
+                    market_id, outcome_index, resolution, bucket_start, open, high, low, close
+                ) VALUES %s
+                ON CONFLICT (market_id, resolution, bucket_start, outcome_index) DO UPDATE SET
+                    high = GREATEST(market_price_rollups.high, EXCLUDED.high),
+                    low = LEAST(market_price_rollups.low, EXCLUDED.low),
+                    close = EXCLUDED.close,
+                    samples = market_price_rollups.samples + 1,
+                    updated_at = CURRENT_TIMESTAMP
+            """, price_rows)
+        
+        # 1m buckets grow by one row per market per cycle, so they are only kept for a short window
+        retention = self.parse_window(settings.rollup_minute_retention)
+        for table in ('market_rollups', 'market_price_rollups'):
+            cursor.execute(
+                f"DELETE FROM {table} WHERE resolution = '1m' AND bucket_start < NOW() - %s",
+                (retention,)
+            )
+        
+        conn.commit()
+        cursor.close()
+        logger.debug(f"Updated rollups for {len(markets)} markets")
+    
+    def fetch_rollups(self, market_id: int, resolution: str = '1h', since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, outcome_index: int = 0) -> List[Dict[str, Any]]:
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unknown rollup resolution {resolution!r}, expected one of {list(ROLLUP_RESOLUTIONS)}")
+        
+        conn = self.get_db_connection()
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute("""
+            SELECT r.bucket_start,
+                   p.open, p.high, p.low, p.close,
+                   r.volume_first, r.volume_last, r.volume_max,
+                   r.volume24hr_first, r.volume24hr_last, r.volume24hr_max,
+                   r.liquidity_first, r.liquidity_last, r.liquidity_max,
+                   r.samples
+            FROM market_rollups r
+            LEFT JOIN market_price_rollups p
+                ON p.market_id = r.market_id
+               AND p.resolution = r.resolution
+               AND p.bucket_start = r.bucket_start
+               AND p.outcome_index = %(outcome_index)s
+            WHERE r.market_id = %(market_id)s
+              AND r.resolution = %(resolution)s
+              AND r.bucket_start >= COALESCE(%(since)s, '-infinity'::timestamptz)
+              AND r.bucket_start <= COALESCE(%(until)s, 'infinity'::timestamptz)
+            ORDER BY r.bucket_start
+        """, {
+            'market_id': market_id,
+            'resolution': resolution,
+            'since': since,
+            'until': until,
+            'outcome_index': outcome_index
+        })
+        
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.commit()
+        cursor.close()
+        return rows
+
+    def legacy_difference_tables(self, cursor) -> List[str]:
+        cursor.execute("""
+            SELECT table_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND column_name = 'differences_data' AND table_name = ANY(%s)
+            ORDER BY table_name
+        """, (list(LEGACY_DIFFERENCE_TABLES),))
+        return [row[0] for row in cursor.fetchall()]
+
+    def migrate_differences(self, cursor):
+        for table, columns in (('data_differences', EVENT_DIFF_COLUMNS), ('market_differences', MARKET_DIFF_COLUMNS)):
+            cursor.execute(add_difference_columns(f"{table}_archive", columns))
+        cursor.execute("ALTER TABLE market_differences_archive ADD COLUMN IF NOT EXISTS data_difference_id INTEGER")
+
+        legacy = self.legacy_difference_tables(cursor)
+        if not legacy:
+            return
+
+        # Views still selecting the JSONB column are replaced by the typed ones
+        cursor.execute("""
+            SELECT viewname FROM pg_views
+            WHERE schemaname = current_schema() AND viewname = ANY(%s) AND definition LIKE '%%differences_data%%'
+        """, (list(RECENT_DIFFERENCE_VIEWS),))
+        views = [row[0] for row in cursor.fetchall()]
+        for view in views:
+            cursor.execute(f"DROP VIEW {view}")
+
+        # differences_data stays until drop_legacy_differences has checked the backfill, so a bad
+        # conversion can still be redone from it. New rows no longer write it, and only rows
+        # without any typed value yet are backfilled, which makes rerunning setup cheap.
+        # Backfilled rows are history; they must not wake up `ai_analyze.py --listen`.
+        cursor.execute("ALTER TABLE data_differences DISABLE TRIGGER data_differences_notify")
+        for suffix in ('', '_archive'):
+            event_table, market_table = f"data_differences{suffix}", f"market_differences{suffix}"
+            if event_table in legacy:
+                cursor.execute(f"ALTER TABLE {event_table} ALTER COLUMN differences_data DROP NOT NULL")
+                cursor.execute(f"""
+                    UPDATE {event_table} SET
+                        {legacy_metric_assignments(EVENT_DIFF_METRICS)},
+                        market_changes = COALESCE(jsonb_array_length(differences_data -> 'markets'), 0)
+                    WHERE differences_data IS NOT NULL AND market_changes = 0
+                      AND num_nonnulls({', '.join(metric_columns(EVENT_DIFF_METRICS))}) = 0
+                """)
+                logger.info(f"Backfilled {cursor.rowcount} {event_table} rows into typed columns")
+            if market_table in legacy:
+                cursor.execute(f"ALTER TABLE {market_table} ALTER COLUMN differences_data DROP NOT NULL")
+                cursor.execute(f"""
+                    UPDATE {market_table} d SET
+                        {legacy_metric_assignments(MARKET_DIFF_METRICS)},
+                        (price_outcomes, price_old, price_new) = ({LEGACY_PRICES_SQL})
+                    WHERE differences_data IS NOT NULL AND num_nonnulls({', '.join(MARKET_DIFF_COLUMNS)}) = 0
+                """)
+                logger.info(f"Backfilled {cursor.rowcount} {market_table} rows into typed columns")
+                cursor.execute(f"""
+                    UPDATE {market_table} md SET data_difference_id = dd.id
+                    FROM {event_table} dd
+                    WHERE dd.event_id = md.event_id AND dd.compared_at = md.compared_at AND md.data_difference_id IS NULL
+                """)
+        cursor.execute("ALTER TABLE data_differences ENABLE TRIGGER data_differences_notify")
+
+        for view in views:
+            cursor.execute(f"CREATE VIEW {view} AS {RECENT_DIFFERENCE_VIEWS[view]}")
+        logger.info(f"Kept the legacy differences_data column on {legacy}; "
+                    "run `setup --drop-legacy-differences` once the typed columns are checked")
+
+    def verify_differences_backfill(self, cursor) -> Dict[str, int]:
+        # Rows whose typed columns disagree with what their JSONB would convert to
+        mismatches = {}
+        for table in self.legacy_difference_tables(cursor):
+            if table.startswith('data_differences'):
+                cursor.execute(f"""
+                    SELECT COUNT(*) FROM {table}
+                    WHERE differences_data IS NOT NULL
+                      AND ({legacy_metric_mismatches(EVENT_DIFF_METRICS)}
+                       OR market_changes IS DISTINCT FROM COALESCE(jsonb_array_length(differences_data -> 'markets'), 0))
+                """)
+            else:
+                cursor.execute(f"""
+                    SELECT COUNT(*) FROM {table} d
+                    CROSS JOIN LATERAL ({LEGACY_PRICES_SQL}) legacy
+                    WHERE d.differences_data IS NOT NULL
+                      AND ({legacy_metric_mismatches(MARKET_DIFF_METRICS)}
+                       OR d.price_outcomes IS DISTINCT FROM legacy.outcomes
+                       OR d.price_old IS DISTINCT FROM legacy.old_prices
+                       OR d.price_new IS DISTINCT FROM legacy.new_prices)
+                """)
+            mismatches[table] = cursor.fetchone()[0]
+        return mismatches
+
+    def drop_legacy_differences(self) -> List[str]:
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        try:
+            legacy = self.legacy_difference_tables(cursor)
+            if not legacy:
+                logger.info("No legacy differences_data columns left")
+                return []
+
+            mismatches = {table: count for table, count in self.verify_differences_backfill(cursor).items() if count}
+            if mismatches:
+                raise ValueError(f"Typed difference columns disagree with differences_data in {mismatches}; "
+                                 "rerun setup to backfill them before dropping the column")
+
+            for table in legacy:
+                cursor.execute(f"ALTER TABLE {table} DROP COLUMN differences_data")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        logger.info(f"Dropped differences_data from {legacy}; run VACUUM FULL on them to return the space")
+        return legacy
+
     def create_tables(self):
         conn = self.get_db_connection()
         cursor = conn.cursor()
@@ -642,6 +1605,14 @@ class PolymarketClient:
             );
         """)
         
+        cursor.execute("""
+            ALTER TABLE events ADD COLUMN IF NOT EXISTS profile_tags TEXT[] NOT NULL DEFAULT '{default}';
+            ALTER TABLE events ADD COLUMN IF NOT EXISTS missed_cycles INTEGER NOT NULL DEFAULT 0;
+            ALTER TABLE events ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP WITH TIME ZONE;
+            ALTER TABLE events ADD COLUMN IF NOT EXISTS last_checked_at TIMESTAMP WITH TIME ZONE;
+            CREATE INDEX IF NOT EXISTS idx_events_profile_tags ON events USING GIN (profile_tags);
+        """)
+        
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS markets (
                 id BIGINT PRIMARY KEY,
@@ -661,46 +1632,263 @@ class PolymarketClient:
         """)
         
         cursor.execute("""
+            ALTER TABLE markets ADD COLUMN IF NOT EXISTS missed_cycles INTEGER NOT NULL DEFAULT 0;
+            ALTER TABLE markets ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP WITH TIME ZONE;
+            ALTER TABLE markets ADD COLUMN IF NOT EXISTS last_checked_at TIMESTAMP WITH TIME ZONE;
+            CREATE INDEX IF NOT EXISTS idx_markets_event_id ON markets(event_id);
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS market_outcome_prices (
+                market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+                outcome_index SMALLINT NOT NULL,
+                outcome TEXT,
+                price DOUBLE PRECISION NOT NULL,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (market_id, outcome_index)
+            );
+        """)
+        
+        cursor.execute(BACKFILL_OUTCOME_PRICES_SQL, {'numeric': NUMERIC_TEXT_PATTERN})
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS state_versions (
+                name VARCHAR(50) PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            );
+            INSERT INTO state_versions (name) VALUES ('stored_state') ON CONFLICT (name) DO NOTHING;
+            
+            CREATE OR REPLACE FUNCTION bump_stored_state_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE state_versions SET version = version + 1 WHERE name = 'stored_state';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        
+        for table, columns in STATE_VERSION_TRIGGERS.items():
+            cursor.execute(f"""
+                DROP TRIGGER IF EXISTS {table}_state_version ON {table};
+                CREATE TRIGGER {table}_state_version
+                    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF {columns} ON {table}
+                    FOR EACH STATEMENT EXECUTE FUNCTION bump_stored_state_version();
+            """)
+        
+        for table, columns in UPDATED_AT_TRIGGERS.items():
+            cursor.execute(f"""
+                CREATE OR REPLACE FUNCTION update_{table}_updated_at() RETURNS trigger AS $$
+                BEGIN
+                    NEW.updated_at = CURRENT_TIMESTAMP;
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+                
+                DROP TRIGGER IF EXISTS update_{table}_updated_at ON {table};
+                CREATE TRIGGER update_{table}_updated_at
+                    BEFORE UPDATE OF {columns} ON {table}
+                    FOR EACH ROW EXECUTE FUNCTION update_{table}_updated_at();
+            """)
+        
+        cursor.execute(f"""
             CREATE TABLE IF NOT EXISTS data_differences (
                 id SERIAL PRIMARY KEY,
                 event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
-                differences_data JSONB NOT NULL,
+                {difference_columns(EVENT_DIFF_COLUMNS)},
                 compared_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(event_id, compared_at)
             );
         """)
+        cursor.execute(add_difference_columns('data_differences', EVENT_DIFF_COLUMNS))
         
-        cursor.execute("""
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION notify_new_differences() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('new_differences', json_build_object('id', NEW.id, 'event_id', NEW.event_id)::text);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+            
+            DROP TRIGGER IF EXISTS data_differences_notify ON data_differences;
+            CREATE TRIGGER data_differences_notify
+                AFTER INSERT OR UPDATE OF {', '.join(EVENT_DIFF_COLUMNS)} ON data_differences
+                FOR EACH ROW EXECUTE FUNCTION notify_new_differences();
+        """)
+        
+        cursor.execute(f"""
             CREATE TABLE IF NOT EXISTS market_differences (
                 id SERIAL PRIMARY KEY,
                 market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
                 event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
-                differences_data JSONB NOT NULL,
+                data_difference_id INTEGER REFERENCES data_differences(id) ON DELETE CASCADE,
+                {difference_columns(MARKET_DIFF_COLUMNS)},
                 compared_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
                 created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(market_id, compared_at)
             );
         """)
+        cursor.execute(add_difference_columns('market_differences', MARKET_DIFF_COLUMNS) + """
+            ALTER TABLE market_differences ADD COLUMN IF NOT EXISTS
+                data_difference_id INTEGER REFERENCES data_differences(id) ON DELETE CASCADE;
+            CREATE INDEX IF NOT EXISTS idx_market_differences_data_difference_id ON market_differences(data_difference_id);
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS compare_cycles (
+                id SERIAL PRIMARY KEY,
+                total_jobs INTEGER NOT NULL DEFAULT 0,
+                started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP WITH TIME ZONE
+            );
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS compare_jobs (
+                cycle_id INTEGER NOT NULL REFERENCES compare_cycles(id) ON DELETE CASCADE,
+                event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                worker_id VARCHAR(255),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                leased_until TIMESTAMP WITH TIME ZONE,
+                finished_at TIMESTAMP WITH TIME ZONE,
+                PRIMARY KEY (cycle_id, event_id)
+            );
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_compare_jobs_claim
+                ON compare_jobs(cycle_id, status, leased_until);
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS market_movers (
+                market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+                event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+                metric VARCHAR(20) NOT NULL,
+                change DOUBLE PRECISION NOT NULL,
+                percent_change DOUBLE PRECISION NOT NULL DEFAULT 0,
+                observed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                PRIMARY KEY (market_id, metric, observed_at)
+            );
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_market_movers_window
+                ON market_movers(metric, observed_at DESC);
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS market_rollups (
+                market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+                resolution VARCHAR(4) NOT NULL,
+                bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+                volume_first DOUBLE PRECISION,
+                volume_last DOUBLE PRECISION,
+                volume_max DOUBLE PRECISION,
+                volume24hr_first DOUBLE PRECISION,
+                volume24hr_last DOUBLE PRECISION,
+                volume24hr_max DOUBLE PRECISION,
+                liquidity_first DOUBLE PRECISION,
+                liquidity_last DOUBLE PRECISION,
+                liquidity_max DOUBLE PRECISION,
+                samples INTEGER NOT NULL DEFAULT 1,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (market_id, resolution, bucket_start)
+            );
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS market_price_rollups (
+                market_id BIGINT NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+                outcome_index SMALLINT NOT NULL,
+                resolution VARCHAR(4) NOT NULL,
+                bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+                open DOUBLE PRECISION NOT NULL,
+                high DOUBLE PRECISION NOT NULL,
+                low DOUBLE PRECISION NOT NULL,
+                close DOUBLE PRECISION NOT NULL,
+                samples INTEGER NOT NULL DEFAULT 1,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (market_id, resolution, bucket_start, outcome_index)
+            );
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_market_rollups_resolution_bucket
+                ON market_rollups(resolution, bucket_start);
+            CREATE INDEX IF NOT EXISTS idx_market_price_rollups_resolution_bucket
+                ON market_price_rollups(resolution, bucket_start);
+        """)
+        
+        for table in ARCHIVE_TABLES['events']:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table}_archive (LIKE {table} INCLUDING DEFAULTS);
+                ALTER TABLE {table}_archive ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+            """)
+        self.migrate_differences(cursor)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS event_market_stats (
+                event_id BIGINT PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE,
+                market_count INTEGER NOT NULL DEFAULT 0,
+                total_market_volume NUMERIC NOT NULL DEFAULT 0,
+                total_market_volume24hr NUMERIC NOT NULL DEFAULT 0,
+                total_market_liquidity NUMERIC NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        self.refresh_event_stats(cursor)
+        
+        cursor.execute(DROP_PLAIN_STATS_VIEWS_SQL)
+        for name, (query, sort_key) in MATERIALIZED_VIEWS.items():
+            cursor.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {query}")
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{name}_id ON {name}(id)")
+            if sort_key:
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_sort ON {name}({sort_key})")
         
         conn.commit()
         cursor.close()
+        self.refresh_materialized_views()
         logger.info("Database tables created successfully")
     
-    async def fetch_and_store(self):
+    async def fetch_and_store(self, limit: int = 500) -> Dict[str, int]:
         logger.info("Fetching events from API...")
-        events_data = await self.fetch_events(limit=500)
+        events_data = await self.fetch_events(limit=limit)
         logger.info(f"Fetched {len(events_data)} events")
         
         if not events_data:
             logger.warning("No events found")
-            return
+            return {'fetched': 0, 'stored': 0}
 
-        classified = self.classify_events(events_data)
+        with stage(self.profiler, 'classify_events'):
+            profile_buckets = self.classify_profiles(events_data)
+        
+        matched_events = list({id(event): event for classified in profile_buckets.values() for event in classified['all']}.values())
+        
+        with stage(self.profiler, 'clean_event_data'):
+            cleaned_events = [self.clean_event_data(event, self.profiles_for(event)) for event in matched_events]
+            self.attach_price_arrays(cleaned_events)
+        
+        with stage(self.profiler, 'store_events'):
+            self.store_events(cleaned_events)
         
-        all_data = {
+        with stage(self.profiler, 'refresh_views'):
+            self.refresh_materialized_views()
+        
+        with stage(self.profiler, 'save_json'):
+            for profile in self.filter_profiles:
+                filename = 'polymarket_data.json' if profile['name'] == DEFAULT_FILTER_PROFILE['name'] else f"polymarket_data_{profile['name']}.json"
+                self.save_to_json(self.build_output(profile_buckets[profile['name']]), filename, [profile])
+        
+        for name, classified in profile_buckets.items():
+            logger.info(f"Profile {name}: {len(classified['all'])} events")
+        logger.info(f"Processed {len(matched_events)} events across {len(profile_buckets)} filter profiles")
+        return {'fetched': len(events_data), 'stored': len(cleaned_events)}
+    
+    def build_output(self, classified: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        return {
             'summary': {
                 'total_events': len(classified['all']),
                 'financial_events': len(classified['financial']),
@@ -716,50 +1904,306 @@ class PolymarketClient:
             'high_volume_events': classified['high_volume'],
             'all_events': classified['all']
         }
-        
-        self.save_to_json(all_data, 'polymarket_data.json')
-        logger.info(f"Processed {len(classified['all'])} events")
     
-    async def compare_data(self):
-        logger.info("Fetching stored events from database...")
-        stored_events = self.fetch_stored_events()
-        logger.info(f"Found {len(stored_events)} stored events")
-        
-        logger.info("Fetching fresh events from API...")
-        fresh_events = await self.fetch_events(limit=500)
-        logger.info(f"Fetched {len(fresh_events)} fresh events")
-        
-        fresh_events_dict = {str(e.get('id')): e for e in fresh_events}
-        
+    async def compare_stored_events(self, stored_events: Iterator[Dict[str, Any]], fresh_events_dict: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
         event_differences = []
+        observed_markets = []
         compared_count = 0
+        stored_count = 0
         
         for stored_event in stored_events:
+            stored_count += 1
             event_id = str(stored_event.get('id'))
             if event_id in fresh_events_dict:
                 compared_count += 1
-                diff = await self.compare_event(stored_event, fresh_events_dict[event_id])
+                fresh_event = fresh_events_dict[event_id]
+                stored_market_ids = {str(m.get('id')) for m in stored_event.get('markets', [])}
+                observed_markets.extend(m for m in fresh_event.get('markets') or [] if str(m.get('id')) in stored_market_ids)
+                
+                diff = await self.compare_event(stored_event, fresh_event)
                 if diff:
                     event_differences.append(diff)
         
-        logger.info(f"Compared {compared_count} events, found {len(event_differences)} with changes")
+        return {
+            'differences': event_differences,
+            'observed_markets': observed_markets,
+            'compared': compared_count,
+            'stored': stored_count
+        }
+    
+    async def compare_data(self, limit: int = 500) -> Dict[str, int]:
+        logger.info("Fetching fresh events from API...")
+        fresh_events = await self.fetch_events(limit=limit)
+        logger.info(f"Fetched {len(fresh_events)} fresh events")
+        
+        with stage(self.profiler, 'parse_prices'):
+            self.attach_price_arrays(fresh_events)
+            fresh_events_dict = {str(e.get('id')): e for e in fresh_events}
+        
+        with stage(self.profiler, 'load_stored_state'):
+            stored_events = self.stored_state()
+        
+        with stage(self.profiler, 'compare'):
+            result = await self.compare_stored_events(stored_events, fresh_events_dict)
+        event_differences = result['differences']
+        
+        logger.info(f"Compared {result['compared']} of {result['stored']} stored events, found {len(event_differences)} with changes")
+        
+        with stage(self.profiler, 'update_rollups'):
+            self.update_rollups(result['observed_markets'])
         
         if event_differences:
             logger.info("Storing differences in database...")
-            self.store_differences(event_differences)
+            with stage(self.profiler, 'store_differences'):
+                self.store_differences(event_differences)
             logger.info(f"Stored {len(event_differences)} event differences")
         else:
             logger.info("No differences found")
+        
+        # Lifecycle runs last: archiving first would leave this cycle's diffs and movers pointing at moved rows
+        with stage(self.profiler, 'lifecycle'):
+            archived = await self.run_lifecycle(fresh_events)
+        
+        # The views only change with the stored state; a cycle that found nothing to write skips the refresh
+        if archived or self.views_version is None or self.state_version() != self.views_version:
+            with stage(self.profiler, 'refresh_views'):
+                self.refresh_materialized_views()
+        else:
+            logger.debug(f"Stored state unchanged at version {self.views_version}, skipping view refresh")
+        
+        logger.info(f"HTTP transport stats: {self.client.stats}")
+        return {
+            'fetched': len(fresh_events),
+            'stored': result['stored'],
+            'compared': result['compared'],
+            'differences': len(event_differences)
+        }
+    
+    def enqueue_compare_cycle(self) -> int:
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("INSERT INTO compare_cycles DEFAULT VALUES RETURNING id")
+        cycle_id = cursor.fetchone()[0]
+        
+        cursor.execute("""
+            INSERT INTO compare_jobs (cycle_id, event_id)
+            SELECT %s, id FROM events WHERE active = true
+        """, (cycle_id,))
+        total_jobs = cursor.rowcount
+        
+        cursor.execute("UPDATE compare_cycles SET total_jobs = %s WHERE id = %s", (total_jobs, cycle_id))
+        conn.commit()
+        cursor.close()
+        
+        logger.info(f"Enqueued compare cycle {cycle_id} with {total_jobs} events")
+        return cycle_id
+    
+    def latest_open_cycle(self) -> Optional[int]:
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id FROM compare_cycles
+            WHERE completed_at IS NULL
+            ORDER BY id DESC
+            LIMIT 1
+        """)
+        row = cursor.fetchone()
+        conn.commit()
+        cursor.close()
+        return row[0] if row else None
+    
+    def claim_compare_jobs(self, cycle_id: int, worker_id: str, batch_size: int, lease_seconds: int) -> List[int]:
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            UPDATE compare_jobs
+            SET status = 'running',
+                worker_id = %s,
+                attempts = attempts + 1,
+                leased_until = NOW() + make_interval(secs => %s)
+            WHERE (cycle_id, event_id) IN (
+                SELECT cycle_id, event_id
+                FROM compare_jobs
+                WHERE cycle_id = %s
+                  AND (status = 'pending' OR (status = 'running' AND leased_until < NOW()))
+                ORDER BY event_id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING event_id
+        """, (worker_id, lease_seconds, cycle_id, batch_size))
+        event_ids = [row[0] for row in cursor.fetchall()]
+        
+        conn.commit()
+        cursor.close()
+        return event_ids
+    
+    def finish_compare_jobs(self, cycle_id: int, worker_id: str, event_ids: List[int], status: str = 'done', cursor=None) -> List[int]:
+        own_cursor = cursor is None
+        if own_cursor:
+            cursor = self.get_db_connection().cursor()
+        
+        # Only jobs this worker still holds; the row locks keep them from being reclaimed until commit
+        cursor.execute("""
+            UPDATE compare_jobs
+            SET status = %s, finished_at = NOW(), leased_until = NULL
+            WHERE cycle_id = %s AND worker_id = %s AND event_id = ANY(%s)
+              AND status = 'running' AND leased_until > NOW()
+            RETURNING event_id
+        """, (status, cycle_id, worker_id, [int(event_id) for event_id in event_ids]))
+        finished = [row[0] for row in cursor.fetchall()]
+        
+        if own_cursor:
+            cursor.connection.commit()
+            cursor.close()
+        return finished
+    
+    def release_compare_jobs(self, cycle_id: int, worker_id: str, event_ids: List[int], max_attempts: int) -> int:
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        
+        # Back to pending for any worker to claim now, instead of waiting out the lease; jobs out of attempts fail
+        cursor.execute("""
+            UPDATE compare_jobs
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                finished_at = CASE WHEN attempts >= %s THEN NOW() END,
+                leased_until = NULL
+            WHERE cycle_id = %s AND worker_id = %s AND event_id = ANY(%s)
+              AND status = 'running'
+        """, (max_attempts, max_attempts, cycle_id, worker_id, [int(event_id) for event_id in event_ids]))
+        released = cursor.rowcount
+        
+        conn.commit()
+        cursor.close()
+        return released
+    
+    def fail_exhausted_jobs(self, cycle_id: int, max_attempts: int):
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE compare_jobs
+            SET status = 'failed', finished_at = NOW(), leased_until = NULL
+            WHERE cycle_id = %s AND status = 'running'
+              AND leased_until < NOW() AND attempts >= %s
+        """, (cycle_id, max_attempts))
+        if cursor.rowcount:
+            logger.warning(f"Marked {cursor.rowcount} compare jobs in cycle {cycle_id} as failed after {max_attempts} attempts")
+        conn.commit()
+        cursor.close()
+    
+    def complete_cycle_if_done(self, cycle_id: int) -> bool:
+        conn = self.get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE compare_cycles
+            SET completed_at = NOW()
+            WHERE id = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM compare_jobs
+                  WHERE cycle_id = %s AND status NOT IN ('done', 'failed')
+              )
+              AND completed_at IS NULL
+        """, (cycle_id, cycle_id))
+        cursor.execute("SELECT completed_at IS NOT NULL FROM compare_cycles WHERE id = %s", (cycle_id,))
+        row = cursor.fetchone()
+        conn.commit()
+        cursor.close()
+        return bool(row and row[0])
+    
+    async def wait_for_cycle(self, cycle_id: int, poll_interval: float = 2.0, timeout: Optional[float] = None) -> bool:
+        waited = 0.0
+        while not self.complete_cycle_if_done(cycle_id):
+            if timeout is not None and waited >= timeout:
+                logger.warning(f"Compare cycle {cycle_id} still running after {timeout}s")
+                return False
+            await asyncio.sleep(poll_interval)
+            waited += poll_interval
+        logger.info(f"Compare cycle {cycle_id} completed")
+        return True
+    
+    async def run_compare_worker(self, cycle_id: Optional[int] = None, batch_size: int = 25,
+                                 lease_seconds: int = 300, max_attempts: int = 3,
+                                 poll_interval: float = 2.0, worker_id: Optional[str] = None, limit: int = 500):
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        cycle_id = cycle_id or self.latest_open_cycle()
+        if cycle_id is None:
+            logger.info("No open compare cycle to work on")
+            return
+        
+        logger.info(f"Worker {worker_id} joining compare cycle {cycle_id}")
+        fresh_events = await self.fetch_events(limit=limit)
+        self.attach_price_arrays(fresh_events)
+        fresh_events_dict = {str(e.get('id')): e for e in fresh_events}
+        logger.info(f"Fetched {len(fresh_events)} fresh events")
+        
+        processed = 0
+        stored_differences = 0
+        
+        while True:
+            self.fail_exhausted_jobs(cycle_id, max_attempts)
+            event_ids = self.claim_compare_jobs(cycle_id, worker_id, batch_size, lease_seconds)
+            
+            if not event_ids:
+                if self.complete_cycle_if_done(cycle_id):
+                    break
+                await asyncio.sleep(poll_interval)
+                continue
+            
+            try:
+                result = await self.compare_stored_events(self.iter_stored_events(event_ids=event_ids), fresh_events_dict)
+                stored = self.store_differences(result['differences'], lease=(cycle_id, worker_id, event_ids))
+                self.update_rollups(result['observed_markets'])
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed batch of {len(event_ids)} events: {e}")
+                self.recover_db_connection()
+                try:
+                    self.release_compare_jobs(cycle_id, worker_id, event_ids, max_attempts)
+                except psycopg2.Error as release_error:
+                    # The lease still expires, so another worker picks the batch up after lease_seconds
+                    logger.error(f"Worker {worker_id} could not release its batch: {release_error}")
+                    self.recover_db_connection()
+                continue
+            
+            processed += len(event_ids)
+            stored_differences += stored
+            logger.debug(f"Worker {worker_id} finished {len(event_ids)} events")
+        
+        logger.info(f"Worker {worker_id} processed {processed} events, stored {stored_differences} differences in cycle {cycle_id}")
 
 
-async def main():
+async def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='Polymarket Monolith Client')
-    parser.add_argument('command', choices=['fetch', 'compare', 'setup'], 
-                       help='Command to run: fetch (get data), compare (compare data), setup (create tables)')
+    parser.add_argument('command', choices=['fetch', 'compare', 'setup', 'enqueue', 'worker', 'movers', 'export'], 
+                       help='Command to run: fetch (get data), compare (compare data), setup (create tables), '
+                            'enqueue (queue a sharded compare cycle), worker (process queued compare jobs), '
+                            'movers (show top movers), export (write Parquet datasets)')
     parser.add_argument('--limit', type=int, default=500, help='Number of events to fetch')
+    parser.add_argument('--interval', type=float, default=None, help='Repeat compare every N seconds, reusing the in-process state cache')
+    parser.add_argument('--cycle-id', type=int, default=None, help='Compare cycle for worker (default: latest open cycle)')
+    parser.add_argument('--batch-size', type=int, default=25, help='Events claimed per worker batch')
+    parser.add_argument('--lease-seconds', type=int, default=300, help='Lease before a claimed batch is retried by another worker')
+    parser.add_argument('--worker-id', type=str, default=None, help='Worker identifier (default: hostname-pid)')
+    parser.add_argument('--wait', action='store_true', help='After enqueue, block until the cycle completes')
+    parser.add_argument('--window', type=str, default='1h', help='Movers window, e.g. 15m, 1h, 24h')
+    parser.add_argument('--metric', choices=MOVER_METRICS, default='volume', help='Movers metric')
+    parser.add_argument('--rank-by', choices=['abs', 'pct'], default='abs', help='Rank movers by absolute or percent change')
+    parser.add_argument('--top', type=int, default=None, help='Number of movers to show')
+    parser.add_argument('--output-dir', type=str, default='exports', help='Export directory for Parquet datasets')
+    parser.add_argument('--export-batch-size', type=int, default=50000, help='Rows per Parquet record batch')
+    parser.add_argument('--compression', type=str, default='zstd', help='Parquet compression codec')
+    parser.add_argument('--tables', type=str, default=None, help='Comma-separated tables to export (default: all)')
+    parser.add_argument('--full', action='store_true', help='Ignore export watermarks and export every row')
+    parser.add_argument('--drop-legacy-differences', action='store_true',
+                        help='After setup, check the typed diff columns against the legacy JSONB column and drop it')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--trace-sql', type=str, default=None, metavar='FILE', help='Write a per-statement SQL timing summary to FILE')
+    parser.add_argument('--profile', type=str, nargs='?', const='profiles', default=None, metavar='DIR',
+                        help='Profile each stage (cProfile, collapsed stacks, tracemalloc) into DIR (default: profiles)')
+    parser.add_argument('--explain-slow-ms', type=float, default=None, help='Capture a plan for statements slower than this (EXPLAIN ANALYZE for reads, EXPLAIN for writes)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if args.verbose:
         logging.basicConfig(level=logging.DEBUG)
@@ -767,18 +2211,55 @@ async def main():
         logging.basicConfig(level=logging.INFO)
     
     client = PolymarketClient()
+    if args.verbose or args.trace_sql or args.explain_slow_ms is not None:
+        client.query_tracer = QueryTracer(args.explain_slow_ms)
+    if args.profile:
+        client.profiler = StageProfiler(args.profile)
     
     try:
         if args.command == 'setup':
             client.create_tables()
+            if args.drop_legacy_differences:
+                client.drop_legacy_differences()
         elif args.command == 'fetch':
-            await client.fetch_and_store()
+            await client.fetch_and_store(args.limit)
         elif args.command == 'compare':
-            await client.compare_data()
+            await client.compare_data(args.limit)
+            while args.interval:
+                await asyncio.sleep(args.interval)
+                try:
+                    await client.compare_data(args.limit)
+                except http_errors() as e:
+                    logger.error(f"Compare cycle failed, retrying in {args.interval}s: {e!r}")
+                except psycopg2.Error as e:
+                    logger.error(f"Compare cycle failed on the database, retrying in {args.interval}s: {e!r}")
+                    client.recover_db_connection()
+        elif args.command == 'enqueue':
+            cycle_id = client.enqueue_compare_cycle()
+            if args.wait:
+                await client.wait_for_cycle(cycle_id)
+        elif args.command == 'worker':
+            await client.run_compare_worker(args.cycle_id, args.batch_size, args.lease_seconds, worker_id=args.worker_id, limit=args.limit)
+        elif args.command == 'movers':
+            movers = client.top_movers(args.window, args.metric, args.rank_by, args.top)
+            print(f"\n=== TOP {args.metric.upper()} MOVERS ({args.window}, by {args.rank_by}) ===")
+            for rank, mover in enumerate(movers, 1):
+                print(f"{rank:>3}. {mover['change']:>+16,.4f} ({mover['percent_change']:>+8.2f}%)  "
+                      f"{mover['market_question']} [{mover['event_title']}]")
+        elif args.command == 'export':
+            from parquet_export import ParquetExporter
+            exporter = ParquetExporter(client, args.output_dir, args.export_batch_size, args.compression)
+            tables = [t.strip() for t in args.tables.split(',')] if args.tables else None
+            counts = exporter.export(tables, args.full)
+            for table, count in counts.items():
+                print(f"{table:<24} {count:>10} rows")
     except Exception as e:
         logger.error(f"Error: {e}")
         sys.exit(1)
     finally:
+        report(client.query_tracer, args.verbose, args.trace_sql)
+        if client.profiler:
+            print(f"\n=== STAGE PROFILE ===\n{client.profiler.write()}")
         await client.close()
 
 
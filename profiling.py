@@ -0,0 +1,129 @@
+import contextlib
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+
+class StageProfile:
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.allocations: Counter = Counter()
+        self.peak_bytes = 0
+        self.wall_seconds = 0.0
+        self.calls = 0
+
+
+class StageProfiler:
+    def __init__(self, profile_dir: str = 'profiles', interval: float = 0.005, top_allocations: int = 25):
+        self.profile_dir = profile_dir
+        self.interval = interval
+        self.top_allocations = top_allocations
+        self.stages: Dict[str, StageProfile] = {}
+        self.active = False
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self.active:
+            yield
+            return
+
+        stage = self.stages.setdefault(name, StageProfile(name, self.interval))
+        stage.sampler.thread_id = threading.get_ident()
+        self.active = True
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        stage.sampler.start()
+        started = time.perf_counter()
+        stage.profile.enable()
+        try:
+            yield
+        finally:
+            stage.profile.disable()
+            stage.wall_seconds += time.perf_counter() - started
+            stage.sampler.stop()
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            for diff in after.compare_to(before, 'lineno'):
+                if diff.size_diff > 0:
+                    frame = diff.traceback[0]
+                    stage.allocations[f"{frame.filename}:{frame.lineno}"] += diff.size_diff
+            stage.peak_bytes = max(stage.peak_bytes, peak)
+            stage.calls += 1
+            self.active = False
+
+    def write(self) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        summary = [f"{'stage':<24} {'calls':>6} {'wall s':>9} {'peak MiB':>9}"]
+
+        for name, stage in self.stages.items():
+            stage.profile.dump_stats(os.path.join(self.profile_dir, f"{name}.pstats"))
+
+            with open(os.path.join(self.profile_dir, f"{name}.collapsed"), 'w', encoding='utf-8') as f:
+                for stack, count in stage.sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+
+            with open(os.path.join(self.profile_dir, f"{name}.alloc.txt"), 'w', encoding='utf-8') as f:
+                for site, size in stage.allocations.most_common(self.top_allocations):
+                    f.write(f"{size / 1024:>12.1f} KiB  {site}\n")
+
+            summary.append(f"{name:<24} {stage.calls:>6} {stage.wall_seconds:>9.3f} {stage.peak_bytes / 1024 / 1024:>9.1f}")
+
+        text = "\n".join(summary)
+        with open(os.path.join(self.profile_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        logger.info(f"Stage profiles written to {self.profile_dir}")
+        return text
+
+
+def stage(profiler: Optional[StageProfiler], name: str):
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name)
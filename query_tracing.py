@@ -0,0 +1,183 @@
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUES_LIST = re.compile(r"VALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))*", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ('select', 'insert', 'update', 'delete', 'with')
+_WRITES = re.compile(r"\b(?:insert|update|delete|merge|nextval|setval|pg_notify)\b", re.IGNORECASE)
+
+
+def normalize_statement(query: Any) -> str:
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', errors='replace')
+    query = str(query)
+    query = _STRING_LITERAL.sub('?', query)
+    query = _NUMBER_LITERAL.sub('?', query)
+    query = _VALUES_LIST.sub('VALUES (...)', query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+def is_read_only(statement: str) -> bool:
+    return statement.lower().startswith(('select', 'with')) and not _WRITES.search(statement)
+
+
+class QueryTracer:
+    def __init__(self, explain_threshold_ms: Optional[float] = None):
+        self.explain_threshold_ms = explain_threshold_ms
+        self.statements: Dict[str, Dict[str, Any]] = {}
+        self.slow_queries: List[Dict[str, Any]] = []
+        self.explaining = False
+
+    def record(self, query: Any, duration: float, rows: int):
+        statement = normalize_statement(query)
+        stats = self.statements.setdefault(statement, {
+            'calls': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'rows': 0
+        })
+        stats['calls'] += 1
+        stats['total_ms'] += duration * 1000
+        stats['max_ms'] = max(stats['max_ms'], duration * 1000)
+        stats['rows'] += max(rows, 0)
+        return statement
+
+    def should_explain(self, statement: str, duration: float) -> bool:
+        if self.explain_threshold_ms is None or self.explaining:
+            return False
+        if duration * 1000 < self.explain_threshold_ms:
+            return False
+        if not statement.lower().startswith(_EXPLAINABLE):
+            return False
+        return all(slow['statement'] != statement for slow in self.slow_queries)
+
+    def explain(self, connection, statement: str, query: Any, vars: Any, duration: float):
+        # Only reads are re-run under ANALYZE; re-running a slow write would double its cost and
+        # fire its triggers and sequences again, so writes get the planner's estimate instead
+        analyze = is_read_only(statement)
+        self.explaining = True
+        cursor = psycopg2.extensions.cursor(connection)
+        try:
+            cursor.execute("SAVEPOINT query_trace_explain")
+            prefix = b"EXPLAIN (ANALYZE, BUFFERS) " if analyze else b"EXPLAIN "
+            cursor.execute(prefix + cursor.mogrify(query, vars))
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+            cursor.execute("ROLLBACK TO SAVEPOINT query_trace_explain")
+            self.slow_queries.append({
+                'statement': statement,
+                'duration_ms': duration * 1000,
+                'analyzed': analyze,
+                'plan': plan
+            })
+        except psycopg2.Error as e:
+            logger.debug(f"EXPLAIN failed for slow statement: {e}")
+            try:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_trace_explain")
+            except psycopg2.Error:
+                pass
+        finally:
+            cursor.close()
+            self.explaining = False
+
+    def summary(self, width: int = 100) -> str:
+        lines = [
+            f"{'calls':>7} {'total ms':>11} {'mean ms':>9} {'max ms':>9} {'rows':>9}  statement",
+            '-' * (width + 50)
+        ]
+        ordered = sorted(self.statements.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        for statement, stats in ordered:
+            mean_ms = stats['total_ms'] / stats['calls']
+            text = statement if len(statement) <= width else statement[:width - 3] + '...'
+            lines.append(
+                f"{stats['calls']:>7} {stats['total_ms']:>11.1f} {mean_ms:>9.2f} "
+                f"{stats['max_ms']:>9.2f} {stats['rows']:>9}  {text}"
+            )
+
+        for slow in self.slow_queries:
+            lines.append('')
+            estimated = '' if slow['analyzed'] else ', estimated plan'
+            lines.append(f"Slow statement ({slow['duration_ms']:.1f} ms{estimated}): {slow['statement']}")
+            lines.append(slow['plan'])
+
+        return "\n".join(lines)
+
+    def write(self, filename: str):
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.summary() + "\n")
+        logger.info(f"SQL trace written to {filename}")
+
+
+class TracingCursorMixin:
+    def execute(self, query, vars=None):
+        tracer = getattr(self.connection, 'tracer', None)
+        if tracer is None or tracer.explaining:
+            return super().execute(query, vars)
+
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        except Exception:
+            tracer.record(query, time.perf_counter() - started, -1)
+            raise
+
+        duration = time.perf_counter() - started
+        statement = tracer.record(query, duration, self.rowcount)
+        if self.name is None and tracer.should_explain(statement, duration):
+            tracer.explain(self.connection, statement, query, vars, duration)
+        return result
+
+    def executemany(self, query, vars_list):
+        tracer = getattr(self.connection, 'tracer', None)
+        if tracer is None:
+            return super().executemany(query, vars_list)
+
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            tracer.record(query, time.perf_counter() - started, self.rowcount)
+
+
+_traced_cursor_classes: Dict[type, type] = {}
+
+
+def traced_cursor_class(base: type) -> type:
+    if base not in _traced_cursor_classes:
+        _traced_cursor_classes[base] = type(f"Traced{base.__name__}", (TracingCursorMixin, base), {})
+    return _traced_cursor_classes[base]
+
+
+class TracingConnection(psycopg2.extensions.connection):
+    tracer: Optional[QueryTracer] = None
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = traced_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+
+def report(tracer: Optional[QueryTracer], verbose: bool = False, filename: Optional[str] = None):
+    if tracer is None:
+        return
+    if verbose:
+        print(f"\n=== SQL TRACE ===\n{tracer.summary()}")
+    if filename:
+        tracer.write(filename)
+
+
+def connect(dsn: str, tracer: Optional[QueryTracer] = None):
+    if tracer is None:
+        return psycopg2.connect(dsn)
+    conn = psycopg2.connect(dsn, connection_factory=TracingConnection)
+    conn.tracer = tracer
+    return conn
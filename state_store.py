@@ -0,0 +1,66 @@
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore:
+    def __init__(self):
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.version: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def warm(self) -> bool:
+        return self.version is not None
+
+    def age(self) -> float:
+        if self.loaded_at is None:
+            return float('inf')
+        return time.monotonic() - self.loaded_at
+
+    def load(self, events: Iterable[Dict[str, Any]], version: Optional[int]):
+        self.events = {str(event['id']): event for event in events}
+        self.version = version
+        self.loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(self.events)} stored events into the state cache at version {version}")
+
+    def invalidate(self):
+        if self.warm:
+            logger.info("State cache invalidated by an out-of-band change")
+        self.events = {}
+        self.version = None
+        self.loaded_at = None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return list(self.events.values())
+
+    def upsert_events(self, events: List[Dict[str, Any]]):
+        for event in events:
+            event_id = str(event['id'])
+            if not event.get('active', True):
+                self.events.pop(event_id, None)
+                continue
+
+            current = self.events.get(event_id)
+            if current is None:
+                self.events[event_id] = event
+                continue
+
+            markets = {str(market['id']): market for market in current['markets']}
+            for market in event['markets']:
+                markets[str(market['id'])] = {**markets.get(str(market['id']), {}), **market}
+            current.update({key: value for key, value in event.items() if key != 'markets'})
+            current['markets'] = list(markets.values())
+
+    def remove_events(self, event_ids: Iterable[Any]):
+        for event_id in event_ids:
+            self.events.pop(str(event_id), None)
+
+    def remove_markets(self, market_ids: Iterable[Any]):
+        market_ids = {str(market_id) for market_id in market_ids}
+        for event in self.events.values():
+            if any(str(market['id']) in market_ids for market in event['markets']):
+                event['markets'] = [market for market in event['markets'] if str(market['id']) not in market_ids]
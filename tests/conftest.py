@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import psycopg2
+
+from config import settings
+from db import schema_dsn
+from polymarket_client import PolymarketClient
+
+
+# Points DATABASE_URL at a fresh schema for one test, or skips when Postgres is not reachable
+@pytest.fixture
+def scratch_schema(monkeypatch):
+    try:
+        conn = psycopg2.connect(settings.database_url, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres not reachable at DATABASE_URL: {e}")
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    conn.autocommit = True
+    conn.cursor().execute(f"CREATE SCHEMA {schema}")
+    monkeypatch.setattr(settings, 'database_url', schema_dsn(settings.database_url, schema))
+    monkeypatch.setattr(settings, 'classification_cache_file', '')
+    try:
+        yield schema
+    finally:
+        conn.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+        conn.close()
+
+
+# Serves benchmarks/mock_gamma.py in-process and points the gamma base URL at it
+@pytest.fixture
+def mock_gamma(monkeypatch):
+    from mock_gamma import add_arguments, build_server
+
+    @asynccontextmanager
+    async def running(**options):
+        parser = argparse.ArgumentParser()
+        add_arguments(parser)
+        args = parser.parse_args([])
+        for name, value in options.items():
+            setattr(args, name, value)
+
+        server = build_server(args)
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        base_url = f"http://127.0.0.1:{listener.sockets[0].getsockname()[1]}"
+        monkeypatch.setattr(settings, 'polymarket_api_base_url', base_url)
+        async with listener:
+            yield server, base_url
+
+    return running
+
+
+# Inserts events 1..count with one market each (id event_id * 10)
+def seed_events(client: PolymarketClient, count: int):
+    conn = client.get_db_connection()
+    cursor = conn.cursor()
+    for event_id in range(1, count + 1):
+        cursor.execute("INSERT INTO events (id, title, volume) VALUES (%s, %s, %s)", (event_id, f"Event {event_id}", 1e6))
+        cursor.execute("INSERT INTO markets (id, event_id, question) VALUES (%s, %s, %s)", (event_id * 10, event_id, 'Q?'))
+    conn.commit()
+    cursor.close()
+
+
+def event_diff(event_id: int) -> dict:
+    compared_at = datetime.now(timezone.utc).isoformat()
+    return {
+        'event_id': event_id,
+        'compared_at': compared_at,
+        'differences': {
+            'volume': {'old': 1e6, 'new': 2e6, 'difference': 1e6, 'percent_change': 100.0},
+            'markets': [{
+                'market_id': event_id * 10,
+                'event_id': event_id,
+                'differences': {'volume': {'old': 100.0, 'new': 400.0, 'difference': 300.0, 'percent_change': 300.0}},
+                'compared_at': compared_at
+            }]
+        }
+    }
+
+
+def scalar(client: PolymarketClient, query: str, params: tuple = ()):
+    cursor = client.get_db_connection().cursor()
+    cursor.execute(query, params)
+    value = cursor.fetchone()[0]
+    cursor.connection.commit()
+    cursor.close()
+    return value
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from ai_analyze import AIAnalyzer
+from config import settings
+from polymarket_client import PolymarketClient
+from conftest import event_diff, scalar, seed_events
+
+
+def volume_diff(event_id: int, compared_at: datetime, new_volume: float) -> dict:
+    diff = event_diff(event_id)
+    diff['compared_at'] = compared_at.isoformat()
+    diff['differences']['volume'] = {'old': 1e6, 'new': new_volume, 'difference': new_volume - 1e6,
+                                     'percent_change': (new_volume - 1e6) / 1e6 * 100}
+    diff['differences']['markets'][0]['compared_at'] = diff['compared_at']
+    return diff
+
+
+async def canned_analysis(title, description, changes, topic):
+    return f"analysis of {title}"
+
+
+def test_batch_schedules_newest_diff_per_event_by_priority(scratch_schema):
+    now = datetime.now(timezone.utc)
+
+    async def run():
+        writer = PolymarketClient()
+        writer.create_tables()
+        seed_events(writer, 2)
+        scalar(writer, "UPDATE events SET description = title RETURNING 1")
+        # Event 1 moves on every cycle; event 2 moved once, by more than event 1's newest move
+        writer.store_differences([volume_diff(1, now - timedelta(minutes=30), 1.5e6)])
+        writer.store_differences([volume_diff(1, now - timedelta(minutes=20), 1.6e6), volume_diff(2, now - timedelta(minutes=20), 3e6)])
+        writer.store_differences([volume_diff(1, now - timedelta(minutes=10), 1.2e6)])
+
+        analyzer = AIAnalyzer()
+        analyzer.get_ai_analysis = canned_analysis
+        try:
+            return await analyzer.analyze_events()
+        finally:
+            await analyzer.close()
+            await writer.close()
+
+    analyses = asyncio.run(run())
+    assert [analysis['event_id'] for analysis in analyses] == [2, 1]
+    assert datetime.fromisoformat(analyses[1]['compared_at']) == now - timedelta(minutes=10)
+    assert analyses[1]['market_changes']['volume_change']['new_value'] == 1.2e6
+
+
+def difference_row(event_id: int, new_volume: float) -> dict:
+    return {
+        'difference_id': event_id, 'event_id': event_id,
+        'event_title': f"Event {event_id}", 'event_description': f"Event {event_id}",
+        'is_financial': True, 'is_crypto': False, 'is_big_event': False,
+        'volume_old': 1e6, 'volume_new': new_volume, 'max_price_move': None,
+        'compared_at': datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=event_id)
+    }
+
+
+def test_resumed_stream_skips_analyzed_events_and_finalizes(tmp_path):
+    stream = tmp_path / 'analysis.ndjson'
+    output = tmp_path / 'analysis.json'
+    rows = [difference_row(event_id, 1e6 + event_id * 1e5) for event_id in (1, 2, 3)]
+    requested = []
+
+    async def recording_analysis(title, description, changes, topic):
+        requested.append(title)
+        return f"analysis of {title}"
+
+    async def run(analyzer: AIAnalyzer, limit=None):
+        analyzer.get_ai_analysis = recording_analysis
+        try:
+            return await analyzer.analyze_queue(analyzer.build_priority_queue([dict(row) for row in rows]), limit)
+        finally:
+            analyzer.close_stream()
+
+    first = AIAnalyzer()
+    first.open_stream(str(stream))
+    assert asyncio.run(run(first, limit=2)) == []
+    # A crash mid-write leaves a truncated last line
+    with open(stream, 'a', encoding='utf-8') as f:
+        f.write('{"topic": "Event 1", "event_id": 1')
+
+    resumed = AIAnalyzer()
+    resumed.open_stream(str(stream), resume=True)
+    assert len(resumed.completed_keys) == 2
+    asyncio.run(run(resumed))
+    result = resumed.finalize_stream(str(stream), str(output))
+
+    assert requested == ['Event 3', 'Event 2', 'Event 1']
+    assert result['total_topics_analyzed'] == 3
+    assert [topic['event_id'] for topic in result['topics']] == [3, 2, 1]
+    assert json.loads(output.read_text())['topics'] == result['topics']
+
+
+def test_failed_analyses_are_not_recorded_and_stay_queued(tmp_path, monkeypatch):
+    stream = tmp_path / 'analysis.ndjson'
+    rows = [difference_row(event_id, 1e6 + event_id * 1e5) for event_id in (1, 2, 3)]
+
+    class FailingClient:
+        async def post(self, url, headers=None, json=None):
+            return httpx.Response(500, text='upstream error')
+
+        async def aclose(self):
+            pass
+
+    monkeypatch.setattr(settings, 'openai_api_key', 'test-key')
+    analyzer = AIAnalyzer()
+    analyzer._client = FailingClient()
+    analyzer.open_stream(str(stream))
+    try:
+        queue = analyzer.build_priority_queue([dict(row) for row in rows])
+        assert asyncio.run(analyzer.analyze_queue(queue)) == []
+    finally:
+        analyzer.close_stream()
+
+    # Nothing is written or marked done, and every event is left on the queue for the next batch
+    assert stream.read_text() == ''
+    assert analyzer.completed_keys == set()
+    assert sorted(event['event_id'] for _, _, event in queue) == [1, 2, 3]
+
+    resumed = AIAnalyzer()
+    resumed.get_ai_analysis = canned_analysis
+    resumed.open_stream(str(stream), resume=True)
+    try:
+        asyncio.run(resumed.analyze_queue(queue))
+    finally:
+        resumed.close_stream()
+    assert sorted(record['event_id'] for record in resumed.read_stream(str(stream))) == [1, 2, 3]
@@ -0,0 +1,76 @@
+import asyncio
+import itertools
+
+import classification_cache
+from classification_cache import ClassificationCache, keyword_set_version
+from config import settings
+from polymarket_client import PolymarketClient
+
+EVENTS = [
+    {'title': 'Will the Fed cut rates?', 'description': 'FOMC decision', 'category': 'Economy'},
+    {'title': 'Bitcoin above 100k?', 'description': 'BTC price', 'category': 'Crypto'},
+    {'title': 'Best picture winner', 'description': 'Awards', 'category': 'Culture'}
+]
+
+
+class NoScan:
+    def search(self, text):
+        raise AssertionError('cached events must not be scanned')
+
+
+def test_cache_hit_skips_the_keyword_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'classification_cache_file', str(tmp_path / 'cache.sqlite'))
+
+    first = PolymarketClient()
+    expected = first.keyword_matches([dict(event) for event in EVENTS])
+    assert (first.classification_cache.hits, first.classification_cache.misses) == (0, 3)
+    asyncio.run(first.close())
+
+    # A later run with the same keyword sets reads the matches back instead of scanning
+    second = PolymarketClient()
+    second.keyword_patterns = {name: NoScan() for name in second.keyword_patterns}
+    assert second.keyword_matches([dict(event) for event in EVENTS]) == expected
+    assert (second.classification_cache.hits, second.classification_cache.misses) == (3, 0)
+    asyncio.run(second.close())
+
+
+def test_changed_keyword_set_invalidates_entries(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    keyword_sets = {'financial': ['fed', 'rates'], 'crypto': ['bitcoin']}
+    version = keyword_set_version(keyword_sets)
+    assert keyword_set_version({'crypto': ['bitcoin'], 'financial': ['rates', 'fed', 'fed']}) == version
+
+    cache = ClassificationCache(path, version)
+    key = cache.key(EVENTS[0])
+    cache.put(key, {'financial': True, 'crypto': False})
+    cache.close()
+
+    reopened = ClassificationCache(path, version)
+    assert reopened.get_many([key], ['financial', 'crypto']) == {key: {'financial': True, 'crypto': False}}
+    reopened.close()
+
+    changed = keyword_set_version({**keyword_sets, 'crypto': ['bitcoin', 'ethereum']})
+    assert changed != version
+    invalidated = ClassificationCache(path, changed)
+    assert invalidated.conn.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0] == 0
+    assert invalidated.key(EVENTS[0]) != key
+    invalidated.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = itertools.count(1000)
+    monkeypatch.setattr(classification_cache.time, 'time', lambda: next(clock))
+    cache = ClassificationCache(str(tmp_path / 'cache.sqlite'), 'v1', max_entries=2)
+    first, second, third = (cache.key(event) for event in EVENTS)
+
+    cache.put(first, {'financial': True})
+    cache.put(second, {'financial': False})
+    cache.flush()
+    # Reading the first entry makes the second the least recently used
+    cache.get_many([first], ['financial'])
+    cache.flush()
+    cache.put(third, {'financial': False})
+    cache.flush()
+
+    assert sorted(row[0] for row in cache.conn.execute("SELECT key FROM classification_cache")) == sorted([first, third])
+    cache.close()
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import sys
+
+import psycopg2
+
+from config import settings
+from polymarket_client import PolymarketClient
+from conftest import ROOT, event_diff, scalar, seed_events
+
+
+def test_expired_lease_discards_differences(scratch_schema):
+    stale, fresh = PolymarketClient(), PolymarketClient()
+    try:
+        stale.create_tables()
+        seed_events(stale, 2)
+        cycle_id = stale.enqueue_compare_cycle()
+
+        # A zero-second lease is already expired when the next transaction starts
+        claimed = stale.claim_compare_jobs(cycle_id, 'stale', batch_size=10, lease_seconds=0)
+        assert sorted(claimed) == [1, 2]
+        assert sorted(fresh.claim_compare_jobs(cycle_id, 'fresh', batch_size=10, lease_seconds=300)) == [1, 2]
+
+        assert stale.store_differences([event_diff(1), event_diff(2)], lease=(cycle_id, 'stale', claimed)) == 0
+        assert scalar(stale, "SELECT COUNT(*) FROM data_differences") == 0
+        assert scalar(stale, "SELECT COUNT(*) FROM market_movers") == 0
+
+        assert fresh.store_differences([event_diff(1), event_diff(2)], lease=(cycle_id, 'fresh', claimed)) == 2
+        assert scalar(fresh, "SELECT COUNT(*) FROM data_differences") == 2
+        assert scalar(fresh, "SELECT COUNT(*) FROM compare_jobs WHERE status = 'done' AND worker_id = 'fresh'") == 2
+        assert fresh.complete_cycle_if_done(cycle_id)
+    finally:
+        asyncio.run(stale.close())
+        asyncio.run(fresh.close())
+
+
+def test_concurrent_workers_store_each_event_once(scratch_schema, mock_gamma, tmp_path, monkeypatch):
+    # fetch writes polymarket_data.json into the working directory
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        async with mock_gamma(events=60, markets_per_event=3):
+            loader = PolymarketClient()
+            loader.create_tables()
+            await loader.fetch_and_store(limit=60)
+            cycle_id = loader.enqueue_compare_cycle()
+            total_jobs = scalar(loader, "SELECT total_jobs FROM compare_cycles WHERE id = %s", (cycle_id,))
+
+            workers = [PolymarketClient() for _ in range(3)]
+            await asyncio.gather(*(
+                worker.run_compare_worker(cycle_id, batch_size=4, poll_interval=0.05, worker_id=f"worker-{i}", limit=60)
+                for i, worker in enumerate(workers)
+            ))
+
+            done = scalar(loader, "SELECT COUNT(*) FROM compare_jobs WHERE cycle_id = %s AND status = 'done'", (cycle_id,))
+            duplicated = scalar(loader, """
+                SELECT COUNT(*) FROM (
+                    SELECT event_id FROM data_differences GROUP BY event_id HAVING COUNT(*) > 1
+                ) d
+            """)
+            differences = scalar(loader, "SELECT COUNT(*) FROM data_differences")
+            for client in workers + [loader]:
+                await client.close()
+            return total_jobs, done, duplicated, differences
+
+    total_jobs, done, duplicated, differences = asyncio.run(run())
+    assert total_jobs > 0
+    assert done == total_jobs
+    assert duplicated == 0
+    assert 0 < differences <= total_jobs
+
+
+def test_failed_batch_is_released_to_another_worker(scratch_schema, mock_gamma, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        async with mock_gamma(events=4, markets_per_event=1):
+            loader = PolymarketClient()
+            loader.create_tables()
+            await loader.fetch_and_store(limit=4)
+            cycle_id = loader.enqueue_compare_cycle()
+
+            failing, healthy = PolymarketClient(), PolymarketClient()
+            failed = asyncio.Event()
+            claim = failing.claim_compare_jobs
+
+            def claim_once(*args, **kwargs):
+                return [] if failed.is_set() else claim(*args, **kwargs)
+
+            def store_fails(*args, **kwargs):
+                failed.set()
+                raise psycopg2.OperationalError('injected store failure')
+
+            failing.claim_compare_jobs = claim_once
+            failing.store_differences = store_fails
+            # A 300s lease: only an explicit release lets the healthy worker have these jobs within the timeout
+            failing_task = asyncio.ensure_future(failing.run_compare_worker(
+                cycle_id, batch_size=10, lease_seconds=300, poll_interval=0.05, worker_id='failing', limit=4
+            ))
+            await asyncio.wait_for(failed.wait(), 10)
+            await asyncio.wait_for(healthy.run_compare_worker(
+                cycle_id, batch_size=10, lease_seconds=300, poll_interval=0.05, worker_id='healthy', limit=4
+            ), 10)
+            await asyncio.wait_for(failing_task, 10)
+
+            jobs = scalar(loader, """
+                SELECT json_agg(json_build_array(status, worker_id, attempts) ORDER BY event_id)
+                FROM compare_jobs WHERE cycle_id = %s
+            """, (cycle_id,))
+            for client in (loader, failing, healthy):
+                await client.close()
+            return jobs
+
+    jobs = asyncio.run(run())
+    assert jobs and all(job == ['done', 'healthy', 2] for job in jobs)
+
+
+def test_worker_processes_share_a_cycle(scratch_schema, mock_gamma, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        async with mock_gamma(events=40, markets_per_event=3, latency_ms=20) as (_, base_url):
+            loader = PolymarketClient()
+            loader.create_tables()
+            await loader.fetch_and_store(limit=40)
+            cycle_id = loader.enqueue_compare_cycle()
+
+            env = dict(os.environ, DATABASE_URL=settings.database_url, POLYMARKET_API_BASE_URL=base_url)
+            workers = [
+                await asyncio.create_subprocess_exec(
+                    sys.executable, os.path.join(ROOT, 'polymarket_client.py'), 'worker',
+                    '--cycle-id', str(cycle_id), '--batch-size', '3', '--worker-id', f"process-{i}", '--limit', '40',
+                    env=env, cwd=str(tmp_path), stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+                )
+                for i in range(3)
+            ]
+            codes = await asyncio.wait_for(asyncio.gather(*(worker.wait() for worker in workers)), 60)
+
+            jobs = scalar(loader, """
+                SELECT json_build_object(
+                    'total', COUNT(*),
+                    'done', COUNT(*) FILTER (WHERE status = 'done'),
+                    'workers', COUNT(DISTINCT worker_id)
+                )
+                FROM compare_jobs WHERE cycle_id = %s
+            """, (cycle_id,))
+            completed = loader.complete_cycle_if_done(cycle_id)
+            await loader.close()
+            return codes, jobs, completed
+
+    codes, jobs, completed = asyncio.run(run())
+    assert codes == [0, 0, 0]
+    assert jobs['total'] > 0
+    assert jobs['done'] == jobs['total']
+    assert jobs['workers'] > 1
+    assert completed
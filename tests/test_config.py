@@ -0,0 +1,10 @@
+import os
+
+from config import BASE_DIR, Settings
+
+
+def test_relative_data_paths_ignore_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert Settings(data_dir='').data_path('.cache.sqlite') == os.path.join(BASE_DIR, '.cache.sqlite')
+    assert Settings(data_dir=str(tmp_path)).data_path('.cache.sqlite') == str(tmp_path / '.cache.sqlite')
+    assert Settings(data_dir=str(tmp_path)).data_path('/var/cache.sqlite') == '/var/cache.sqlite'
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+from psycopg2.extras import execute_values
+
+from bench_diff_storage import LEGACY_DDL, synthetic_differences
+from polymarket_client import PolymarketClient
+from conftest import scalar
+
+
+# The archives are recreated LIKE the legacy tables, so they carry the column too
+LEGACY = sorted(['data_differences', 'data_differences_archive', 'market_differences', 'market_differences_archive'])
+
+
+def seed_legacy(client: PolymarketClient, events: int = 5, markets_per_event: int = 2, cycles: int = 3):
+    client.create_tables()
+    conn = client.get_db_connection()
+    cursor = conn.cursor()
+    execute_values(cursor, "INSERT INTO events (id, title) VALUES %s", [(i, f"Event {i}") for i in range(1, events + 1)])
+    execute_values(cursor, "INSERT INTO markets (id, event_id, question) VALUES %s", [
+        (i, (i - 1) // markets_per_event + 1, f"Market {i}?") for i in range(1, events * markets_per_event + 1)
+    ])
+    cursor.execute(LEGACY_DDL)
+    for diff in synthetic_differences(events, markets_per_event, cycles):
+        cursor.execute("INSERT INTO data_differences (event_id, differences_data, compared_at) VALUES (%s, %s, %s)",
+                       (diff['event_id'], json.dumps(diff['differences']), diff['compared_at']))
+        execute_values(cursor, "INSERT INTO market_differences (market_id, event_id, differences_data, compared_at) VALUES %s", [
+            (m['market_id'], diff['event_id'], json.dumps(m['differences']), diff['compared_at'])
+            for m in diff['differences']['markets']
+        ])
+    conn.commit()
+    cursor.close()
+
+
+def verify(client: PolymarketClient) -> dict:
+    cursor = client.get_db_connection().cursor()
+    mismatches = client.verify_differences_backfill(cursor)
+    cursor.connection.commit()
+    cursor.close()
+    return mismatches
+
+
+def test_setup_keeps_jsonb_until_verified_drop(scratch_schema):
+    client = PolymarketClient()
+    try:
+        seed_legacy(client)
+        client.create_tables()
+
+        assert client.legacy_difference_tables(client.get_db_connection().cursor()) == LEGACY
+        assert scalar(client, "SELECT COUNT(*) FROM data_differences WHERE market_changes = 2") == 15
+        assert set(verify(client).values()) == {0}
+
+        # Rerunning setup leaves converted rows alone
+        client.create_tables()
+        assert set(verify(client).values()) == {0}
+
+        assert client.drop_legacy_differences() == LEGACY
+        assert client.legacy_difference_tables(client.get_db_connection().cursor()) == []
+        assert scalar(client, "SELECT COUNT(*) FROM market_differences WHERE price_outcomes IS NOT NULL") > 0
+    finally:
+        asyncio.run(client.close())
+
+
+def test_drop_refuses_when_backfill_disagrees(scratch_schema):
+    client = PolymarketClient()
+    try:
+        seed_legacy(client)
+        client.create_tables()
+        cursor = client.get_db_connection().cursor()
+        cursor.execute("UPDATE market_differences SET price_new = NULL WHERE id = (SELECT MIN(id) FROM market_differences)")
+        cursor.connection.commit()
+
+        with pytest.raises(ValueError, match='market_differences'):
+            client.drop_legacy_differences()
+        assert client.legacy_difference_tables(client.get_db_connection().cursor()) == LEGACY
+    finally:
+        asyncio.run(client.close())
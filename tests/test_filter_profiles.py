@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from polymarket_client import PolymarketClient
+
+
+def write_profiles(tmp_path, keyword_sets):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps({
+        'keyword_sets': keyword_sets,
+        'profiles': [{'name': 'custom', 'include_any': list(keyword_sets)}]
+    }))
+    return str(path)
+
+
+@pytest.mark.parametrize('keywords', [[], [''], None])
+def test_empty_keyword_set_is_rejected(tmp_path, keywords):
+    with pytest.raises(ValueError, match="'stablecoin'.*no keywords"):
+        PolymarketClient().load_filter_profiles(write_profiles(tmp_path, {'stablecoin': keywords}))
+
+
+def test_keyword_sets_are_lowercased(tmp_path):
+    client = PolymarketClient()
+    profiles = client.load_filter_profiles(write_profiles(tmp_path, {'stablecoin': ['USDC', 'Tether']}))
+
+    assert client.keyword_sets['stablecoin'] == ['usdc', 'tether']
+    assert [profile['name'] for profile in profiles] == ['default', 'custom']
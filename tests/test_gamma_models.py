@@ -0,0 +1,65 @@
+import asyncio
+import json
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from gamma_models import parse_events
+from polymarket_client import PolymarketClient
+
+
+def encode(events) -> bytes:
+    return json.dumps(events).encode()
+
+
+def test_blank_and_invalid_amounts_become_none():
+    [event] = parse_events(encode([{
+        'id': 1, 'volume': '', 'volume24hr': '12.5', 'liquidity': 'n/a', 'liquidityClob': 'NaN',
+        'markets': [{'id': 2, 'volume': 3, 'volume24hr': None, 'liquidity': {'bad': 1}}]
+    }]))
+
+    assert (event['id'], event['volume'], event['volume24hr'], event['liquidity'], event['liquidityClob']) == ('1', None, 12.5, None, None)
+    assert event['markets'] == [{'id': '2', 'volume': 3.0, 'volume24hr': None, 'liquidity': None}]
+
+
+def test_outcome_lists_are_decoded_or_dropped():
+    [event] = parse_events(encode([{'id': 1, 'markets': [
+        {'id': 2, 'outcomes': '["Yes", "No"]', 'outcomePrices': '["0.25", "0.75"]'},
+        {'id': 3, 'outcomes': '["Yes", "No"', 'outcomePrices': '["0.25", ""]'},
+        {'id': 4, 'outcomes': [None], 'outcomePrices': ['x']}
+    ]}]))
+
+    assert [(m['outcomes'], m['outcomePrices']) for m in event['markets']] == [
+        (['Yes', 'No'], [0.25, 0.75]), (None, None), (None, None)
+    ]
+
+
+def test_broken_events_are_skipped_not_fatal(caplog):
+    events = parse_events(encode([{'id': 1}, {'title': 'no id'}, {'id': 3, 'markets': [5]}, {'id': 4}]))
+
+    assert [event['id'] for event in events] == ['1', '4']
+    assert 'Skipping malformed gamma event' in caplog.text
+
+
+@pytest.mark.parametrize('content', [b'{"error": "rate limited"}', b'[{"id": 1}'])
+def test_body_that_is_not_an_event_list_raises(content):
+    with pytest.raises(ValidationError):
+        parse_events(content)
+
+
+def test_non_finite_amounts_become_none():
+    [event] = parse_events(b'[{"id": 1, "volume": "NaN", "liquidity": "inf", "markets": [{"id": 2, "outcomePrices": "[\\"nan\\", 0.5]"}]}]')
+
+    assert (event['volume'], event['liquidity'], event['markets'][0]['outcomePrices']) == (None, None, None)
+
+
+def test_compare_treats_missing_amounts_as_no_change():
+    [fresh] = parse_events(encode([{'id': 1, 'volume': '', 'volume24hr': 5000, 'liquidity': 9000, 'liquidityClob': 2000}]))
+    stored = {'id': 1, 'volume': Decimal('1000.00'), 'volume24hr': Decimal('1000.00'), 'liquidity': None,
+              'liquidity_clob': Decimal('500.00'), 'markets': []}
+
+    diff = asyncio.run(PolymarketClient().compare_event(stored, fresh))
+
+    assert sorted(diff['differences']) == ['liquidity_clob', 'volume24hr']
+    assert diff['differences']['volume24hr'] == {'old': 1000.0, 'new': 5000.0, 'difference': 4000.0, 'percent_change': 400.0}
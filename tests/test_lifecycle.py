@@ -0,0 +1,96 @@
+import asyncio
+
+from polymarket_client import PolymarketClient
+from conftest import scalar
+
+
+def expire(client: PolymarketClient, event_id: int):
+    cursor = client.get_db_connection().cursor()
+    cursor.execute("UPDATE events SET end_date = NOW() - INTERVAL '1 day' WHERE id = %s", (event_id,))
+    cursor.connection.commit()
+    cursor.close()
+
+
+def test_compare_stores_diffs_before_archiving(scratch_schema, mock_gamma, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        async with mock_gamma(events=10, markets_per_event=2) as (server, _):
+            client = PolymarketClient()
+            try:
+                client.create_tables()
+                await client.fetch_and_store(limit=10)
+                server.state.events['5']['closed'] = True
+                expire(client, 5)
+
+                summary = await client.compare_data(limit=10)
+                return summary, (
+                    scalar(client, "SELECT COUNT(*) FROM events WHERE id = 5"),
+                    scalar(client, "SELECT COUNT(*) FROM data_differences_archive WHERE event_id = 5"),
+                    scalar(client, "SELECT COUNT(*) FROM data_differences"),
+                    scalar(client, "SELECT COUNT(*) FROM market_outcome_prices_archive WHERE market_id IN (5000, 5001)"),
+                    scalar(client, "SELECT COUNT(*) FROM market_movers_archive WHERE event_id = 5")
+                )
+            finally:
+                await client.close()
+
+    summary, (remaining, archived_diffs, stored_diffs, archived_prices, archived_movers) = asyncio.run(run())
+    assert summary['differences'] == 10
+    assert remaining == 0
+    assert archived_diffs == 1
+    assert stored_diffs == 9
+    assert archived_prices > 0
+    assert archived_movers > 0
+
+
+def test_open_rows_are_not_rechecked_within_backoff(scratch_schema, mock_gamma, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        async with mock_gamma(events=3, markets_per_event=1):
+            client = PolymarketClient()
+            try:
+                client.create_tables()
+                await client.fetch_and_store(limit=3)
+                expire(client, 2)
+
+                first = client.lifecycle_candidates()
+                await client.run_lifecycle([])
+                return first, client.lifecycle_candidates(), scalar(client, "SELECT COUNT(*) FROM events")
+            finally:
+                await client.close()
+
+    first, second, remaining = asyncio.run(run())
+    assert first['events'] == [2]
+    assert second == {'events': [], 'markets': []}
+    assert remaining == 3
+
+
+def test_views_refresh_only_when_stored_state_changes(scratch_schema, mock_gamma, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        async with mock_gamma(events=3, markets_per_event=1):
+            client = PolymarketClient()
+            try:
+                client.create_tables()
+                await client.fetch_and_store(limit=3)
+                refreshes = []
+                refresh = client.refresh_materialized_views
+                monkeypatch.setattr(client, 'refresh_materialized_views', lambda: refreshes.append(1) or refresh())
+
+                await client.compare_data(limit=3)
+                unchanged = len(refreshes)
+
+                # An out-of-band write to a compared column bumps the state version
+                scalar(client, "UPDATE events SET volume = volume + 1 WHERE id = 1 RETURNING 1")
+                await client.compare_data(limit=3)
+                return unchanged, len(refreshes), scalar(client, "SELECT volume FROM events_with_market_stats WHERE id = 1") == \
+                    scalar(client, "SELECT volume FROM events WHERE id = 1")
+            finally:
+                await client.close()
+
+    unchanged, after_write, view_current = asyncio.run(run())
+    assert unchanged == 0
+    assert after_write == 1
+    assert view_current
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+from ai_analyze import AIAnalyzer
+from polymarket_client import PolymarketClient
+from conftest import event_diff, scalar, seed_events
+
+
+async def wait_for_records(path, count: int, timeout: float = 10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if path.exists() and len(path.read_text().splitlines()) >= count:
+            return [json.loads(line) for line in path.read_text().splitlines()]
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"expected {count} records in {path}")
+
+
+def test_listen_catches_up_carries_over_and_reconnects(scratch_schema, tmp_path):
+    stream = tmp_path / 'analysis.ndjson'
+    high_water_file = str(stream) + '.highwater'
+
+    async def run():
+        writer = PolymarketClient()
+        writer.create_tables()
+        seed_events(writer, 3)
+        scalar(writer, "UPDATE events SET description = title RETURNING 1")
+
+        analyzer = AIAnalyzer()
+        analyzer.save_high_water(high_water_file, 0)
+
+        async def canned_analysis(title, description, changes, topic):
+            return f"analysis of {title}"
+
+        analyzer.get_ai_analysis = canned_analysis
+        analyzer.open_stream(str(stream), resume=True)
+        try:
+            # Written before anyone listens: only the persisted high-water id can find these
+            writer.store_differences([event_diff(1), event_diff(2)])
+
+            # --limit 1 per batch leaves one event over, which must still be analyzed
+            task = asyncio.ensure_future(analyzer.listen(
+                debounce=0.05, max_wait=0.2, limit=1,
+                high_water_file=high_water_file, catch_up=True, reconnect_delay=0.05
+            ))
+            caught_up = await wait_for_records(stream, 2)
+
+            scalar(writer, """
+                SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+                WHERE query LIKE 'LISTEN %%' AND pid <> pg_backend_pid()
+            """)
+            writer.store_differences([event_diff(3)])
+            after_reconnect = await wait_for_records(stream, 3)
+
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            latest_id = scalar(writer, "SELECT MAX(id) FROM data_differences")
+            return caught_up, after_reconnect, latest_id
+        finally:
+            await analyzer.close()
+            await writer.close()
+
+    caught_up, after_reconnect, latest_id = asyncio.run(run())
+    assert sorted(record['event_id'] for record in caught_up) == [1, 2]
+    assert sorted(record['event_id'] for record in after_reconnect) == [1, 2, 3]
+    assert json.loads(open(high_water_file).read()) == {'difference_id': latest_id}
+
+
+def test_budget_cut_event_is_kept_below_the_high_water_mark(scratch_schema, tmp_path):
+    stream = tmp_path / 'analysis.ndjson'
+    high_water_file = str(stream) + '.highwater'
+
+    async def run():
+        writer = PolymarketClient()
+        writer.create_tables()
+        seed_events(writer, 2)
+        scalar(writer, "UPDATE events SET description = title RETURNING 1")
+        writer.store_differences([event_diff(1), event_diff(2)])
+
+        analyzer = AIAnalyzer()
+        analyzer.save_high_water(high_water_file, 0)
+
+        async def budget_spending_analysis(title, description, changes, topic):
+            analyzer.tokens_used = 10000
+            return f"analysis of {title}"
+
+        async def canned_analysis(title, description, changes, topic):
+            return f"analysis of {title}"
+
+        analyzer.get_ai_analysis = budget_spending_analysis
+        analyzer.open_stream(str(stream))
+        try:
+            # The first analysis spends the whole budget, so listen() stops with the second event cut
+            await asyncio.wait_for(analyzer.listen(
+                debounce=0.05, max_wait=0.2, token_budget=10000,
+                high_water_file=high_water_file, catch_up=True
+            ), timeout=10)
+            analyzer.close_stream()
+            analyzed = [json.loads(line) for line in stream.read_text().splitlines()]
+            cut_event = 2 if analyzed[0]['event_id'] == 1 else 1
+            cut_id = scalar(writer, "SELECT id FROM data_differences WHERE event_id = %s", (cut_event,))
+            saved = analyzer.load_high_water(high_water_file)
+        finally:
+            await analyzer.close()
+
+        # A resumed listener catches up from the saved high-water mark and analyzes the cut event
+        resumed = AIAnalyzer()
+        resumed.get_ai_analysis = canned_analysis
+        resumed.open_stream(str(stream), resume=True)
+        try:
+            task = asyncio.ensure_future(resumed.listen(
+                debounce=0.05, max_wait=0.2, high_water_file=high_water_file, catch_up=True
+            ))
+            records = await wait_for_records(stream, 2)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        finally:
+            await resumed.close()
+            await writer.close()
+        return analyzed, cut_event, cut_id, saved, records
+
+    analyzed, cut_event, cut_id, saved, records = asyncio.run(run())
+    assert len(analyzed) == 1
+    assert saved == cut_id - 1
+    assert [record['event_id'] for record in records[1:]] == [cut_event]
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config import settings
+from polymarket_client import PolymarketClient
+from conftest import event_diff, scalar, seed_events
+
+
+def market_volume_diff(event_id: int, observed_at: datetime, old: float, new: float) -> dict:
+    diff = event_diff(event_id)
+    diff['compared_at'] = observed_at.isoformat()
+    market = diff['differences']['markets'][0]
+    market['compared_at'] = diff['compared_at']
+    market['differences'] = {'volume': {'old': old, 'new': new, 'difference': new - old,
+                                        'percent_change': (new - old) / old * 100}}
+    return diff
+
+
+def test_top_movers_rejects_window_past_retention(monkeypatch):
+    monkeypatch.setattr(settings, 'movers_windows', '1h,24h')
+    with pytest.raises(ValueError, match='exceeds the movers retention'):
+        PolymarketClient().top_movers('7d')
+
+
+def test_top_movers_ranks_per_market_and_prunes_past_longest_window(scratch_schema, monkeypatch):
+    monkeypatch.setattr(settings, 'movers_windows', '1h,24h')
+    now = datetime.now(timezone.utc)
+    client = PolymarketClient()
+    try:
+        client.create_tables()
+        seed_events(client, 3)
+
+        # Older cycle: inside 24h but not 1h, plus one row already past the longest window
+        client.store_differences([
+            market_volume_diff(1, now - timedelta(hours=5), 1000, 100),
+            market_volume_diff(2, now - timedelta(hours=5), 100, 150),
+            market_volume_diff(3, now - timedelta(hours=30), 100, 10000)
+        ])
+        # Latest cycle
+        client.store_differences([
+            market_volume_diff(1, now - timedelta(minutes=10), 1000, 1100),
+            market_volume_diff(2, now - timedelta(minutes=10), 100, 400),
+            market_volume_diff(3, now - timedelta(minutes=10), 1000, 800)
+        ])
+
+        # Pruning keeps everything inside the longest window (24h), not just the shortest (1h)
+        assert scalar(client, "SELECT COUNT(*) FROM market_movers WHERE observed_at < NOW() - INTERVAL '24 hours'") == 0
+        assert scalar(client, "SELECT COUNT(*) FROM market_movers WHERE observed_at < NOW() - INTERVAL '1 hour'") == 2
+
+        # One row per market, its largest move by magnitude, with the sign kept
+        day = client.top_movers('24h', 'volume', 'abs')
+        assert [(mover['market_id'], mover['change']) for mover in day] == [(10, -900.0), (20, 300.0), (30, -200.0)]
+
+        hour = client.top_movers('1h', 'volume', 'abs')
+        assert [(mover['market_id'], mover['change']) for mover in hour] == [(20, 300.0), (30, -200.0), (10, 100.0)]
+
+        by_pct = client.top_movers('24h', 'volume', 'pct')
+        assert [(mover['market_id'], mover['percent_change']) for mover in by_pct] == [(20, 300.0), (10, -90.0), (30, -20.0)]
+
+        assert [mover['market_id'] for mover in client.top_movers('24h', 'volume', 'abs', limit=2)] == [10, 20]
+    finally:
+        asyncio.run(client.close())
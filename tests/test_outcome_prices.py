@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from gamma_models import parse_events
+from polymarket_client import PolymarketClient
+from conftest import scalar, seed_events
+
+PRICES_QUERY = """
+    SELECT COALESCE(json_agg(json_build_array(market_id, outcome_index, outcome, price)
+                             ORDER BY market_id, outcome_index), '[]')
+    FROM market_outcome_prices
+"""
+
+
+def test_store_events_replaces_outcome_price_rows(scratch_schema):
+    client = PolymarketClient()
+    try:
+        client.create_tables()
+        for prices in ('["0.25", "0.75"]', '["0.4"]'):
+            client.store_events(parse_events(json.dumps([{'id': 1, 'title': 'Event 1', 'markets': [
+                {'id': 10, 'question': 'Q?', 'outcomes': '["Yes", "No"]', 'outcomePrices': prices}
+            ]}]).encode()))
+
+        assert scalar(client, PRICES_QUERY) == [[10, 0, 'Yes', 0.4]]
+    finally:
+        asyncio.run(client.close())
+
+
+def test_backfill_skips_malformed_legacy_prices(scratch_schema):
+    client = PolymarketClient()
+    try:
+        client.create_tables()
+        seed_events(client, 6)
+        cursor = client.get_db_connection().cursor()
+        # Legacy rows: arrays, JSON-encoded strings, {outcome: price} objects, bad JSON and non-numeric prices
+        for market_id, outcomes, prices in (
+            (10, ['Yes', 'No'], ['0.4', '0.6']),
+            (20, '["Yes", "No"]', '["0.3", "0.7"]'),
+            (30, ['Yes', 'No'], {'Yes': 0.2, 'No': 0.8}),
+            (40, ['Yes', 'No'], '["0.3", '),
+            (50, ['Yes', 'No'], ['0.5', 'abc']),
+            (60, ['Yes', 'No'], {'Yes': 'x', 'No': 0.5})
+        ):
+            cursor.execute("UPDATE markets SET outcomes = %s::jsonb, outcome_prices = %s::jsonb WHERE id = %s",
+                           (json.dumps(outcomes), json.dumps(prices), market_id))
+        cursor.execute("DELETE FROM market_outcome_prices")
+        cursor.connection.commit()
+        cursor.close()
+
+        client.create_tables()
+
+        assert scalar(client, PRICES_QUERY) == [
+            [10, 0, 'Yes', 0.4], [10, 1, 'No', 0.6],
+            [20, 0, 'Yes', 0.3], [20, 1, 'No', 0.7],
+            [30, 0, 'Yes', 0.2], [30, 1, 'No', 0.8]
+        ]
+    finally:
+        asyncio.run(client.close())
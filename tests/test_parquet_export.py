@@ -0,0 +1,80 @@
+import asyncio
+import glob
+import os
+
+import psycopg2
+import pytest
+
+from config import settings
+from polymarket_client import PolymarketClient
+from conftest import seed_events
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+from parquet_export import ParquetExporter
+
+
+def exported_ids(output_dir: str, table: str, column: str = 'id'):
+    ids = []
+    for path in sorted(glob.glob(os.path.join(output_dir, table, 'date=*', '*.parquet'))):
+        ids += pq.read_table(path).column(column).to_pylist()
+    return sorted(ids)
+
+
+@pytest.fixture
+def client(scratch_schema):
+    client = PolymarketClient()
+    client.create_tables()
+    seed_events(client, 3)
+    yield client
+    asyncio.run(client.close())
+
+
+def test_full_export_replaces_existing_partitions(client, tmp_path):
+    output_dir = str(tmp_path)
+    ParquetExporter(client, output_dir).export(['events'])
+    exporter = ParquetExporter(client, output_dir)
+    exporter.run_id += '-full'
+    assert exporter.export(['events'], full=True) == {'events': 3}
+
+    assert exported_ids(output_dir, 'events') == [1, 2, 3]
+    assert not glob.glob(os.path.join(output_dir, '.events*'))
+
+
+def test_bookkeeping_updates_do_not_reexport(client, tmp_path):
+    output_dir = str(tmp_path)
+    assert ParquetExporter(client, output_dir).export(['events']) == {'events': 3}
+
+    cursor = client.get_db_connection().cursor()
+    cursor.execute("UPDATE events SET missed_cycles = missed_cycles + 1")
+    cursor.execute("UPDATE events SET volume = 2e6 WHERE id = 2")
+    cursor.connection.commit()
+    cursor.close()
+
+    exporter = ParquetExporter(client, output_dir)
+    exporter.run_id += '-next'
+    assert exporter.export(['events']) == {'events': 1}
+
+
+def test_rows_from_open_transactions_are_exported_after_commit(client, tmp_path):
+    output_dir = str(tmp_path)
+    writer = psycopg2.connect(settings.database_url)
+    try:
+        # The open transaction stamps market 30 before market 20 is written, but commits after the export
+        cursor = writer.cursor()
+        cursor.execute("""
+            INSERT INTO market_rollups (market_id, resolution, bucket_start)
+            VALUES (30, '1h', date_trunc('hour', NOW()))
+        """)
+        client.update_rollups([{'id': 20, 'volume': 100.0, 'volume24hr': 10.0, 'liquidity': 5.0, 'prices': []}])
+
+        first = ParquetExporter(client, output_dir)
+        assert first.export(['market_rollups']) == {'market_rollups': 0}
+
+        writer.commit()
+        second = ParquetExporter(client, output_dir)
+        second.run_id += '-next'
+        assert second.export(['market_rollups']) == {'market_rollups': 4}
+        assert exported_ids(output_dir, 'market_rollups', 'market_id') == [20, 20, 20, 30]
+    finally:
+        writer.close()
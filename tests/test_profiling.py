@@ -0,0 +1,52 @@
+import asyncio
+import contextlib
+import pstats
+import time
+
+import ai_analyze
+from polymarket_client import PolymarketClient
+from profiling import StageProfiler, stage
+
+
+def busy_allocation(seconds: float):
+    chunks = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        chunks.append(bytearray(4096))
+    return chunks
+
+
+def test_stage_writes_pstats_collapsed_stacks_allocations_and_summary(tmp_path):
+    profiler = StageProfiler(str(tmp_path), interval=0.001)
+    with stage(profiler, 'work'):
+        chunks = busy_allocation(0.1)
+        # Nested stages run inside the outer one instead of starting a second profile
+        with stage(profiler, 'nested'):
+            pass
+    summary = profiler.write()
+
+    assert chunks and list(profiler.stages) == ['work']
+    assert pstats.Stats(str(tmp_path / 'work.pstats')).total_calls > 0
+    assert 'test_profiling.py:busy_allocation' in (tmp_path / 'work.collapsed').read_text()
+    assert 'KiB' in (tmp_path / 'work.alloc.txt').read_text()
+    assert (tmp_path / 'summary.txt').read_text().strip() == summary
+    assert summary.splitlines()[1].split()[:2] == ['work', '1']
+
+
+def test_stage_is_a_nullcontext_without_a_profiler():
+    assert isinstance(stage(None, 'work'), contextlib.nullcontext)
+
+
+def test_profile_flag_writes_a_profile_per_stage(scratch_schema, tmp_path, capsys):
+    client = PolymarketClient()
+    client.create_tables()
+    asyncio.run(client.close())
+
+    profile_dir = tmp_path / 'profiles'
+    asyncio.run(ai_analyze.main(['--profile', str(profile_dir), '--output', str(tmp_path / 'analysis.json')]))
+
+    for name in ('fetch_differences', 'prioritize', 'save'):
+        for suffix in ('.pstats', '.collapsed', '.alloc.txt'):
+            assert (profile_dir / f"{name}{suffix}").exists()
+    assert 'fetch_differences' in (profile_dir / 'summary.txt').read_text()
+    assert '=== STAGE PROFILE ===' in capsys.readouterr().out
@@ -0,0 +1,60 @@
+import psycopg2
+
+from config import settings
+from query_tracing import QueryTracer, connect, is_read_only, normalize_statement
+
+
+def test_normalize_statement_collapses_literals_and_values_lists():
+    assert normalize_statement(b"SELECT *\n  FROM events WHERE id = 42 AND title = 'it''s'") == \
+        "SELECT * FROM events WHERE id = ? AND title = ?"
+    assert normalize_statement("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y'), (3, 'z')") == \
+        "INSERT INTO t (a, b) VALUES (...)"
+    assert normalize_statement("SELECT 1.5") == normalize_statement("SELECT 27")
+
+
+def test_only_plain_reads_count_as_read_only():
+    assert is_read_only("SELECT * FROM events")
+    assert is_read_only("WITH recent AS (SELECT id FROM events) SELECT * FROM recent")
+    assert not is_read_only("WITH moved AS (DELETE FROM events RETURNING *) SELECT * FROM moved")
+    assert not is_read_only("SELECT id FROM compare_jobs FOR UPDATE SKIP LOCKED")
+    assert not is_read_only("SELECT nextval('events_id_seq')")
+    assert not is_read_only("UPDATE events SET active = false")
+
+
+def test_tracer_counts_calls_rows_and_captures_slow_plans(scratch_schema):
+    tracer = QueryTracer(explain_threshold_ms=0)
+    conn = connect(settings.database_url, tracer)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE traced (id SERIAL PRIMARY KEY, value INTEGER)")
+        for value in (1, 2):
+            cursor.execute("INSERT INTO traced (value) VALUES (%s)", (value,))
+        cursor.execute("SELECT * FROM traced WHERE value > %s", (0,))
+        cursor.execute("SELECT * FROM traced WHERE value > %s", (1,))
+        conn.commit()
+
+        stats = tracer.statements["SELECT * FROM traced WHERE value > %s"]
+        assert (stats['calls'], stats['rows']) == (2, 3)
+        assert tracer.statements["INSERT INTO traced (value) VALUES (...)"]['calls'] == 2
+
+        # One plan per statement; the read is re-run under ANALYZE, the write is only planned
+        plans = {slow['statement']: slow for slow in tracer.slow_queries}
+        assert plans["SELECT * FROM traced WHERE value > %s"]['analyzed']
+        assert 'actual time' in plans["SELECT * FROM traced WHERE value > %s"]['plan']
+        assert not plans["INSERT INTO traced (value) VALUES (...)"]['analyzed']
+        assert 'actual time' not in plans["INSERT INTO traced (value) VALUES (...)"]['plan']
+        assert len(tracer.slow_queries) == len(plans)
+
+        cursor.execute("SELECT array_agg(id ORDER BY id) FROM traced")
+        assert cursor.fetchone()[0] == [1, 2]
+        assert 'estimated plan' in tracer.summary()
+    finally:
+        conn.close()
+
+
+def test_untraced_connection_is_plain_psycopg2(scratch_schema):
+    conn = connect(settings.database_url)
+    try:
+        assert type(conn) is psycopg2.extensions.connection
+    finally:
+        conn.close()
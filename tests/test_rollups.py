@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from polymarket_client import PolymarketClient
+from conftest import scalar, seed_events
+
+
+def test_update_rollups_prunes_old_minute_buckets(scratch_schema):
+    client = PolymarketClient()
+    try:
+        client.create_tables()
+        seed_events(client, 1)
+        market = {'id': 10, 'volume': 100.0, 'volume24hr': 10.0, 'liquidity': 5.0, 'prices': [0.4, 0.6]}
+        now = datetime.now(timezone.utc)
+
+        client.update_rollups([market], observed_at=now - timedelta(days=3))
+        client.update_rollups([market], observed_at=now)
+
+        query = "SELECT COUNT(*) FROM {} WHERE resolution = %s"
+        assert scalar(client, query.format('market_rollups'), ('1m',)) == 1
+        assert scalar(client, query.format('market_price_rollups'), ('1m',)) == 2
+        assert scalar(client, query.format('market_rollups'), ('1h',)) == 2
+        assert scalar(client, query.format('market_price_rollups'), ('1d',)) == 4
+    finally:
+        asyncio.run(client.close())
+
+
+def test_missing_amounts_do_not_overwrite_rollups(scratch_schema):
+    client = PolymarketClient()
+    try:
+        client.create_tables()
+        seed_events(client, 1)
+        observed_at = datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+        client.update_rollups([{'id': 10, 'volume': None, 'volume24hr': 10.0, 'liquidity': 5.0, 'prices': []}], observed_at)
+        client.update_rollups([{'id': 10, 'volume': 100.0, 'volume24hr': None, 'liquidity': 7.0, 'prices': []}], observed_at)
+        client.update_rollups([{'id': 10, 'volume': None, 'volume24hr': None, 'liquidity': None, 'prices': []}], observed_at)
+
+        [bucket] = client.fetch_rollups(10, '1h')
+        assert (bucket['volume_first'], bucket['volume_last'], bucket['volume_max']) == (100.0, 100.0, 100.0)
+        assert (bucket['volume24hr_first'], bucket['volume24hr_last'], bucket['volume24hr_max']) == (10.0, 10.0, 10.0)
+        assert (bucket['liquidity_first'], bucket['liquidity_last'], bucket['liquidity_max']) == (5.0, 7.0, 7.0)
+    finally:
+        asyncio.run(client.close())
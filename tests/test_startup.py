@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+from bench_startup import budget_for, lazy_leaks, measure
+from cli import COMMANDS
+
+
+# Slow or shared hosts can loosen the budgets the same way as bench_startup.py --scale
+BUDGET_SCALE = float(os.environ.get('STARTUP_BUDGET_SCALE', '1.0'))
+
+
+@pytest.mark.parametrize('command', list(COMMANDS))
+def test_command_startup_within_budget(command):
+    import_ms, _, modules = measure(command, repeat=3)
+
+    assert not lazy_leaks(modules), f"{command} imports lazy modules before dispatch"
+    assert import_ms <= budget_for(command, BUDGET_SCALE)
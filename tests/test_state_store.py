@@ -0,0 +1,94 @@
+import asyncio
+
+import psycopg2
+
+from polymarket_client import PolymarketClient
+
+
+EVENT_FIELDS = ('id', 'title', 'description', 'active', 'volume', 'volume24hr', 'liquidity', 'liquidity_clob')
+MARKET_FIELDS = ('id', 'event_id', 'question', 'volume', 'volume24hr', 'liquidity', 'outcomes', 'outcome_prices', 'prices', 'active')
+
+
+def number(value):
+    return float(value) if value is not None and not isinstance(value, (bool, str)) else value
+
+
+# Reduces cached and freshly read events to the fields the comparison uses, with numerics as floats
+def normalize(events):
+    normalized = {}
+    for event in events:
+        markets = sorted(event['markets'], key=lambda market: market['id'])
+        normalized[event['id']] = (
+            tuple(number(event[field]) for field in EVENT_FIELDS),
+            [tuple([number(value) for value in market[field]] if isinstance(market[field], list) else number(market[field])
+                   for field in MARKET_FIELDS) for market in markets]
+        )
+    return normalized
+
+
+def assert_cache_matches_database(client: PolymarketClient):
+    assert client.state_store.warm
+    assert client.state_store.version == client.state_version()
+    assert normalize(client.stored_state()) == normalize(list(client.iter_stored_events()))
+
+
+def test_write_through_matches_fresh_read(scratch_schema, mock_gamma, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        async with mock_gamma(events=8, markets_per_event=3):
+            client = PolymarketClient()
+            try:
+                client.create_tables()
+                await client.fetch_and_store(limit=8)
+                client.stored_state()
+
+                # The next fetch drifts every amount and price
+                await client.fetch_and_store(limit=8)
+                assert_cache_matches_database(client)
+
+                markets = {market['id'] for market in client.state_store.events['2']['markets']}
+                assert {2000, 2001} <= markets
+                client.archive_rows('markets', [2000, 2001])
+                assert_cache_matches_database(client)
+                assert {market['id'] for market in client.state_store.events['2']['markets']} == markets - {2000, 2001}
+
+                cached = set(client.state_store.events)
+                assert '3' in cached
+                client.archive_rows('events', [3])
+                assert_cache_matches_database(client)
+                assert set(client.state_store.events) == cached - {'3'}
+            finally:
+                await client.close()
+
+    asyncio.run(run())
+
+
+def test_recover_after_failed_statement(scratch_schema):
+    client = PolymarketClient()
+    try:
+        client.create_tables()
+        cursor = client.get_db_connection().cursor()
+        try:
+            cursor.execute("SELECT * FROM no_such_table")
+        except psycopg2.Error:
+            pass
+        client.recover_db_connection()
+        cursor.execute("SELECT 1")
+        assert cursor.fetchone() == (1,)
+        client.get_db_connection().commit()
+
+        # A connection the server dropped mid-cycle is replaced on next use
+        admin = psycopg2.connect(client.get_db_connection().dsn)
+        admin.autocommit = True
+        admin.cursor().execute("SELECT pg_terminate_backend(%s)", (client.get_db_connection().get_backend_pid(),))
+        admin.close()
+        try:
+            client.state_version()
+        except psycopg2.Error:
+            pass
+        client.recover_db_connection()
+        assert client.db_conn.closed
+        assert client.state_version() is not None
+    finally:
+        asyncio.run(client.close())
@@ -0,0 +1,275 @@
+import asyncio
+import gc
+import importlib.util
+import time
+
+import httpx
+import pytest
+
+from transport import CircuitBreaker, CircuitOpenError, ResilientTransport
+
+
+URL = 'http://gamma.test/markets/1'
+
+
+def make_transport(handler, **options) -> ResilientTransport:
+    options.setdefault('backoff_base', 0.0)
+    return ResilientTransport(transport=httpx.MockTransport(handler), **options)
+
+
+def run(transport: ResilientTransport, coroutine):
+    async def body():
+        try:
+            return await coroutine
+        finally:
+            await transport.aclose()
+    return asyncio.run(body())
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Records retry delays instead of waiting them out
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+def test_retries_transient_errors_then_succeeds(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError('refused', request=request)
+        if len(calls) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={'id': '1'})
+
+    transport = make_transport(handler, max_retries=3)
+    response = run(transport, transport.get(URL, 'markets'))
+
+    assert response.json() == {'id': '1'}
+    assert len(calls) == 3
+    assert transport.stats['retries'] == 2
+    assert transport.stats['failures'] == 0
+
+
+def test_gives_up_after_max_retries(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    transport = make_transport(handler, max_retries=2, failure_threshold=10)
+    with pytest.raises(httpx.HTTPStatusError):
+        run(transport, transport.get(URL, 'markets'))
+
+    assert len(calls) == 3
+    assert transport.stats['failures'] == 1
+
+
+def test_client_errors_are_not_retried(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    transport = make_transport(handler, max_retries=3)
+    with pytest.raises(httpx.HTTPStatusError):
+        run(transport, transport.get(URL, 'markets'))
+
+    assert len(calls) == 1
+    assert transport.breaker_for(URL).state == 'closed'
+
+
+def test_429_waits_for_retry_after(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={'Retry-After': '7'})
+        return httpx.Response(200)
+
+    transport = make_transport(handler, max_retries=1, backoff_max=1.0)
+    assert run(transport, transport.get(URL, 'markets')).status_code == 200
+    assert sleeps == [7.0]
+
+
+def test_retry_after_is_capped():
+    transport = make_transport(lambda request: httpx.Response(200), retry_after_max=5.0)
+    try:
+        assert transport.retry_after(httpx.Response(429, headers={'Retry-After': '120'})) == 5.0
+        assert transport.retry_after(httpx.Response(429, headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})) == 0.0
+        assert transport.retry_after(httpx.Response(429, headers={'Retry-After': 'soon'})) is None
+        assert transport.retry_after(httpx.Response(429)) is None
+    finally:
+        asyncio.run(transport.aclose())
+
+
+def test_breaker_opens_and_fails_fast(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502)
+
+    transport = make_transport(handler, max_retries=5, failure_threshold=2, reset_timeout=60.0)
+    with pytest.raises(CircuitOpenError):
+        run(transport, transport.get(URL, 'markets'))
+
+    assert len(calls) == 2
+    assert transport.breaker_for(URL).state == 'open'
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker('gamma.test', failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker('gamma.test', failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    breaker.opened_at -= 60.0
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_unexpected_error_releases_half_open_trial():
+    def handler(request):
+        raise RuntimeError('boom')
+
+    transport = make_transport(handler, failure_threshold=1, reset_timeout=60.0)
+    breaker = transport.breaker_for(URL)
+    breaker.record_failure()
+    breaker.opened_at -= 60.0
+
+    with pytest.raises(RuntimeError):
+        run(transport, transport.get(URL, 'markets'))
+
+    assert breaker.state == 'half_open'
+    assert not breaker.trial_in_flight
+    assert breaker.allow()
+
+
+def test_failed_attempts_record_latency(sleeps):
+    transport = make_transport(lambda request: httpx.Response(503), max_retries=2, failure_threshold=10)
+    with pytest.raises(httpx.HTTPStatusError):
+        run(transport, transport.get(URL, 'markets'))
+
+    assert len(transport.latencies['markets']) == 3
+
+
+def test_slow_request_is_hedged():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        # The first attempt stalls well past the observed latency, the hedge answers at once
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json={'attempt': len(calls)})
+
+    transport = make_transport(handler, hedge_endpoints={'markets'}, hedge_min_samples=5)
+    for _ in range(5):
+        transport.record_latency('markets', 0.01)
+
+    started = time.monotonic()
+    response = run(transport, transport.get(URL, 'markets'))
+
+    assert response.json() == {'attempt': 2}
+    assert time.monotonic() - started < 2
+    assert transport.stats['hedges'] == 1
+    assert transport.stats['hedge_wins'] == 1
+
+
+def test_no_hedge_without_enough_samples():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200)
+
+    transport = make_transport(handler, hedge_endpoints={'markets'}, hedge_min_samples=5)
+    run(transport, transport.get(URL, 'markets'))
+
+    assert len(calls) == 1
+    assert transport.stats['hedges'] == 0
+
+
+
+def test_losing_attempt_error_is_retrieved(caplog):
+    transport = make_transport(lambda request: httpx.Response(200), hedge_endpoints={'markets'}, hedge_min_samples=5)
+    for _ in range(5):
+        transport.record_latency('markets', 0.01)
+
+    async def body():
+        for _ in range(20):
+            gate = asyncio.get_running_loop().create_future()
+            attempts = []
+
+            # The primary fails as soon as the hedge answers, so both finish before send_hedged wakes up
+            async def send_once(method, url, endpoint, **kwargs):
+                attempts.append(url)
+                if len(attempts) == 1:
+                    await gate
+                    raise httpx.ConnectError('refused')
+                gate.set_result(None)
+                await asyncio.sleep(0)
+                return httpx.Response(200)
+
+            transport.send_once = send_once
+            assert (await transport.send_hedged('GET', URL, 'markets')).status_code == 200
+
+    run(transport, body())
+    gc.collect()
+    assert 'never retrieved' not in caplog.text
+
+
+def test_attempt_failing_after_cancel_is_retrieved(caplog):
+    transport = make_transport(lambda request: httpx.Response(200), hedge_endpoints={'markets'}, hedge_min_samples=5)
+    for _ in range(5):
+        transport.record_latency('markets', 0.01)
+    attempts = []
+
+    # The primary's response is already in when the hedge wins, so cancelling it still ends in an error
+    async def send_once(method, url, endpoint, **kwargs):
+        attempts.append(url)
+        if len(attempts) == 1:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                raise httpx.ConnectError('refused')
+        return httpx.Response(200)
+
+    transport.send_once = send_once
+    assert run(transport, transport.send_hedged('GET', URL, 'markets')).status_code == 200
+    gc.collect()
+    assert 'never retrieved' not in caplog.text
+
+
+def test_http2_falls_back_without_h2(monkeypatch, caplog):
+    real_find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name, *args: None if name == 'h2' else real_find_spec(name, *args))
+    transport = ResilientTransport(http2=True)
+    asyncio.run(transport.aclose())
+    assert "falling back to HTTP/1.1" in caplog.text
@@ -0,0 +1,238 @@
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"Circuit for {self.host} closed")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"Circuit for {self.host} opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+
+class ResilientTransport:
+    def __init__(self, timeouts: Optional[Dict[str, float]] = None, default_timeout: float = 30.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 hedge_endpoints: Optional[set] = None, hedge_percentile: float = 0.95,
+                 hedge_min_samples: int = 20, latency_window: int = 200,
+                 max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0, http2: bool = False, retry_after_max: float = 60.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        if http2 and importlib.util.find_spec('h2') is None:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+        self.client = httpx.AsyncClient(
+            timeout=default_timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            http2=http2,
+            transport=transport
+        )
+        self.timeouts = timeouts or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_endpoints = hedge_endpoints or set()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window = latency_window
+
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.stats = {'requests': 0, 'retries': 0, 'hedges': 0, 'hedge_wins': 0, 'failures': 0}
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+        return self.breakers[host]
+
+    def record_latency(self, endpoint: str, elapsed: float):
+        if endpoint not in self.latencies:
+            self.latencies[endpoint] = deque(maxlen=self.latency_window)
+        self.latencies[endpoint].append(elapsed)
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        if endpoint not in self.hedge_endpoints:
+            return None
+        samples = self.latencies.get(endpoint)
+        if not samples or len(samples) < self.hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))]
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def retry_after(self, response: httpx.Response) -> Optional[float]:
+        # Retry-After is either delta-seconds or an HTTP date
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(self.retry_after_max, max(0.0, seconds))
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code >= 500 or status_code == 429
+
+    async def send_once(self, method: str, url: str, endpoint: str, **kwargs: Any) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            response = await self.client.request(method, url, timeout=self.timeouts.get(endpoint, httpx.USE_CLIENT_DEFAULT), **kwargs)
+            response.raise_for_status()
+            return response
+        finally:
+            # Failed and timed-out attempts count too, or the hedge delay only ever sees the fast path
+            self.record_latency(endpoint, time.monotonic() - started)
+
+    def start_attempt(self, method: str, url: str, endpoint: str, **kwargs: Any) -> asyncio.Task:
+        # A losing attempt can still fail after the winner returned, either in the same wakeup or
+        # because its response was already read when it was cancelled. Reading its outcome keeps
+        # asyncio from logging "Task exception was never retrieved".
+        task = asyncio.ensure_future(self.send_once(method, url, endpoint, **kwargs))
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    async def send_hedged(self, method: str, url: str, endpoint: str, **kwargs: Any) -> httpx.Response:
+        delay = self.hedge_delay(endpoint)
+        if delay is None:
+            return await self.send_once(method, url, endpoint, **kwargs)
+
+        primary = self.start_attempt(method, url, endpoint, **kwargs)
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+
+            self.stats['hedges'] += 1
+            logger.debug(f"Hedging {url} after {delay:.3f}s")
+            hedge = self.start_attempt(method, url, endpoint, **kwargs)
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats['hedge_wins'] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def request(self, method: str, url: str, endpoint: str = 'default', **kwargs: Any) -> httpx.Response:
+        breaker = self.breaker_for(url)
+        self.stats['requests'] += 1
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries + 1):
+            trial = breaker.state == 'half_open'
+            if not breaker.allow():
+                self.stats['failures'] += 1
+                raise CircuitOpenError(f"Circuit open for {breaker.host}")
+
+            retry_after = None
+            try:
+                response = await self.send_hedged(method, url, endpoint, **kwargs)
+                breaker.record_success()
+                return response
+            except httpx.HTTPStatusError as e:
+                if not self.is_retryable_status(e.response.status_code):
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                last_error = e
+                retry_after = self.retry_after(e.response)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                last_error = e
+            finally:
+                # A cancelled or unexpected error must not leave the half-open trial claimed forever
+                if trial:
+                    breaker.trial_in_flight = False
+
+            if attempt < self.max_retries:
+                self.stats['retries'] += 1
+                delay = self.backoff(attempt) if retry_after is None else max(retry_after, self.backoff(attempt))
+                logger.debug(f"Retrying {url} in {delay:.2f}s after {last_error!r} (attempt {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+
+        self.stats['failures'] += 1
+        raise last_error
+
+    async def get(self, url: str, endpoint: str = 'default', **kwargs: Any) -> httpx.Response:
+        return await self.request('GET', url, endpoint, **kwargs)